@@ -0,0 +1,117 @@
+# accounts/authentication.py
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from data.lru import TTLLRUCache
+from data.tiles import user_aoi_ids
+
+# Cache per proses. Invalidasi lewat signal hanya berlaku di proses yang sama,
+# jadi TIMEOUT membatasi data basi di worker lain.
+_params = getattr(settings, 'AUTH_TOKEN_CACHE', None) or {}
+_token_cache = TTLLRUCache(
+    max_entries=int(_params.get('MAX_ENTRIES', 10000)),
+    timeout=int(_params.get('TIMEOUT', 60)),
+)
+_aoi_cache = TTLLRUCache(
+    max_entries=int(_params.get('MAX_ENTRIES', 10000)),
+    timeout=int(_params.get('TIMEOUT', 60)),
+)
+# Jalur tile async hanya butuh user_id, tidak menyimpan instance Token/User
+_token_user_cache = TTLLRUCache(
+    max_entries=int(_params.get('MAX_ENTRIES', 10000)),
+    timeout=int(_params.get('TIMEOUT', 60)),
+)
+
+
+def _copy_token(token):
+    """Salinan Token dan User untuk satu request. Instance di cache dipakai bersama semua
+    thread, jadi atribut dan cache relasi yang diset view tidak boleh menempel di sana"""
+    user = copy.copy(token.user)
+    user._state.fields_cache = {}
+    user.__dict__.pop('_prefetched_objects_cache', None)
+    token = copy.copy(token)
+    token.user = user
+    return token
+
+
+def resolve_token(key):
+    """Token (dengan user) untuk key, None jika token tidak ada. Setiap pemanggilan
+    mendapat instance baru, lihat _copy_token"""
+    token = _token_cache.get(key)
+    if token is None:
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            return None
+        _token_cache.set(key, token)
+    return _copy_token(token)
+
+
+def get_user_aoi_ids(user):
+    """Daftar id AOI user (string, terurut), di-cache per user"""
+    aoi_ids = _aoi_cache.get(user.pk)
+    if aoi_ids is None:
+        aoi_ids = user_aoi_ids(user)
+        _aoi_cache.set(user.pk, aoi_ids)
+    return aoi_ids
+
+
+async def aresolve_token_user_id(key, fetchone):
+    """Versi async resolve_token untuk jalur ASGI, hasilnya user_id atau None.
+    fetchone: coroutine (sql, params) -> row dari pool koneksi async"""
+    user_id = _token_user_cache.get(key)
+    if user_id is None:
+        row = await fetchone(f"SELECT user_id FROM {Token._meta.db_table} WHERE key = %s", [key])
+        if row is None:
+            return None
+        user_id = row[0]
+        _token_user_cache.set(key, user_id)
+    return user_id
+
+
+async def aget_user_aoi_ids(user_id, fetchall):
+    """Versi async get_user_aoi_ids, memakai cache AOI yang sama"""
+    aoi_ids = _aoi_cache.get(user_id)
+    if aoi_ids is None:
+        through = get_user_model().areas_of_interest.through
+        user_column = through._meta.get_field('users').column
+        aoi_column = through._meta.get_field('areaofinterest').column
+        rows = await fetchall(
+            f"SELECT {aoi_column} FROM {through._meta.db_table} WHERE {user_column} = %s", [user_id]
+        )
+        aoi_ids = sorted(str(row[0]) for row in rows)
+        _aoi_cache.set(user_id, aoi_ids)
+    return aoi_ids
+
+
+def invalidate_token(key):
+    _token_cache.delete(key)
+    _token_user_cache.delete(key)
+
+
+def invalidate_user_aois(user_id=None):
+    """Hapus cache AOI satu user, atau semua user jika user_id None"""
+    if user_id is None:
+        _aoi_cache.clear()
+    else:
+        _aoi_cache.delete(user_id)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication DRF dengan lookup token yang di-cache"""
+
+    def authenticate_credentials(self, key):
+        token = resolve_token(key)
+        if token is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
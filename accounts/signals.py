@@ -1,9 +1,12 @@
 # accounts/signals.py
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+from data.models import AreaOfInterest
 from .models import AccountNotificationSetting
+from .authentication import invalidate_token, invalidate_user_aois
 
 User = get_user_model()
 
@@ -11,3 +14,38 @@ User = get_user_model()
 def create_user_notification_settings(sender, instance, created, **kwargs):
     if created:
         AccountNotificationSetting.objects.create(user=instance)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """User yang berubah (mis. dinonaktifkan) harus di-resolve ulang dari database"""
+    for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        invalidate_token(key)
+    invalidate_user_aois(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.areas_of_interest.through)
+def invalidate_user_aoi_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        # user.areas_of_interest.add/remove/clear(...)
+        invalidate_user_aois(instance.pk)
+    elif pk_set:
+        # aoi.users_aoi.add/remove(...)
+        for user_id in pk_set:
+            invalidate_user_aois(user_id)
+    else:
+        # aoi.users_aoi.clear(): user yang terdampak tidak diketahui
+        invalidate_user_aois()
+
+
+@receiver(post_delete, sender=AreaOfInterest)
+def invalidate_deleted_aoi_membership(sender, instance, **kwargs):
+    # Relasi M2M ikut terhapus tanpa m2m_changed
+    invalidate_user_aois()
@@ -11,7 +11,7 @@ from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
-from rest_framework.authentication import TokenAuthentication
+from .authentication import CachedTokenAuthentication
 from notifications.services import NotificationService
 
 
@@ -78,7 +78,7 @@ def user_info_view(request):
 
 
 class AccountNotificationSettingView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -0,0 +1,759 @@
+# data/analytics.py
+"""Agregasi untuk endpoint chart dan statistik dashboard.
+
+Semua angka dibaca dari AlertDailyRollup (agregat harian yang dijaga trigger database),
+sehingga biayanya bergantung pada jumlah hari dan AOI, bukan jumlah alert. Setiap chart
+dihitung dengan satu query terkelompok (date_trunc + SUM ... FILTER); periode tanpa data
+diisi 0 di Python.
+
+Hasil fungsi analytics di-cache per proses (lihat cached_analytics) dan menjadi basi tepat
+saat versi data TileDataVersion scope AOI berubah.
+"""
+import base64
+import functools
+import json
+import threading
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .lru import TTLLRUCache
+from .models import AlertDailyRollup, HotspotAlert, DeforestationAlerts, HOTSPOT_ALERT_CATEGORIES
+from .tile_cache import tile_variant
+from .tiles import tile_data_versions
+
+GRANULARITIES = ('day', 'week', 'month')
+
+HOTSPOT_CATEGORIES = tuple(category for category, _label in HOTSPOT_ALERT_CATEGORIES)
+
+# (bucket rollup, nama, confidence minimum, confidence maksimum) untuk pie chart deforestation.
+# Harus sama dengan data_deforestation_confidence_bucket() di migrasi 0018; di luar rentang = 'other'
+DEFORESTATION_CONFIDENCE_RANGES = (
+    ('low', 'Low (0-2)', 0, 2),
+    ('medium', 'Medium (3-4)', 3, 4),
+    ('high', 'High (5+)', 5, 100),
+)
+
+# Agregat harian per layer dengan kolom sama seperti trigger rollup, dipakai rebuild_alert_rollup
+ROLLUP_SELECT_SQL = {
+    'hotspotalert': """
+        SELECT 'hotspotalert', a.area_of_interest_id, a.alert_date, a.category, COALESCE(h.source, ''),
+               COUNT(*), 0, COALESCE(SUM(a.confidence), 0), COUNT(a.confidence)
+        FROM data_hotspotalert a
+        LEFT JOIN data_hotspots h ON h.id = a.hotspot_id
+        WHERE a.alert_date BETWEEN %s AND %s
+        GROUP BY 2, 3, 4, 5
+    """,
+    'deforestation': """
+        SELECT 'deforestation', a.company_id, a.alert_date, data_deforestation_confidence_bucket(a.confidence), '',
+               COUNT(*), COALESCE(SUM(a.area), 0), COALESCE(SUM(a.confidence), 0), COUNT(a.confidence)
+        FROM data_deforestationalerts a
+        WHERE a.alert_date BETWEEN %s AND %s
+        GROUP BY 2, 3, 4
+    """,
+}
+
+ROLLUP_SOURCE_TABLES = {
+    'hotspotalert': 'data_hotspotalert',
+    'deforestation': 'data_deforestationalerts',
+}
+
+
+def get_analytics_cache_settings():
+    params = getattr(settings, 'ANALYTICS_CACHE', None) or {}
+    return {
+        'ENABLED': bool(params.get('ENABLED', True)),
+        'TIMEOUT': int(params.get('TIMEOUT', 300)),
+        'MAX_ENTRIES': int(params.get('MAX_ENTRIES', 2048)),
+    }
+
+
+_cache_params = get_analytics_cache_settings()
+_result_cache = TTLLRUCache(max_entries=_cache_params['MAX_ENTRIES'], timeout=_cache_params['TIMEOUT'])
+_cache_counters = {'hits': 0, 'misses': 0}
+_cache_counters_lock = threading.Lock()
+
+
+def _count_cache(name):
+    with _cache_counters_lock:
+        _cache_counters[name] += 1
+
+
+def analytics_cache_stats():
+    """Jumlah hit/miss cache analytics proses ini sejak start atau clear_analytics_cache"""
+    with _cache_counters_lock:
+        hits, misses = _cache_counters['hits'], _cache_counters['misses']
+    return {
+        'enabled': _cache_params['ENABLED'],
+        'entries': len(_result_cache),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+    }
+
+
+def clear_analytics_cache():
+    _result_cache.clear()
+    with _cache_counters_lock:
+        _cache_counters.update(hits=0, misses=0)
+
+
+def analytics_version(layer, aoi_ids):
+    """Versi data layer untuk scope AOI, bagian dari kunci cache analytics"""
+    return tile_data_versions([layer], aoi_ids)[layer]
+
+
+def cached_analytics(layer):
+    """Cache hasil fungsi analytics (aoi_ids, *args) per proses.
+
+    Kunci: nama fungsi, hash himpunan AOI, argumen (rentang tanggal sudah dinormalisasi) dan
+    versi data layer + AOI dari TileDataVersion, yang dinaikkan trigger setiap alert/AOI berubah.
+    Pemanggil yang sudah membaca versi (analytics_version) bisa memberikannya lewat `version=`.
+    Hasil dibagi antar request, jangan diubah oleh pemanggil.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(aoi_ids, *args, version=None):
+            if not _cache_params['ENABLED']:
+                return fn(aoi_ids, *args)
+            if version is None:
+                version = analytics_version(layer, aoi_ids)
+            key = (fn.__name__, tile_variant(aoi_ids), version, args)
+            result = _result_cache.get(key)
+            if result is not None:
+                _count_cache('hits')
+                return result
+            _count_cache('misses')
+            result = fn(aoi_ids, *args)
+            _result_cache.set(key, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def parse_date_range(params, default_days=365):
+    """(start_date, end_date) dari ?start_date=&end_date=, default default_days hari terakhir.
+    Raise ValueError jika format tanggal tidak valid"""
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    if not start_date or not end_date:
+        end_date = timezone.now().date()
+        return end_date - timedelta(days=default_days), end_date
+    try:
+        return (
+            datetime.strptime(start_date, '%Y-%m-%d').date(),
+            datetime.strptime(end_date, '%Y-%m-%d').date(),
+        )
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+
+
+def parse_granularity(value, default='month'):
+    if not value:
+        return default
+    if value not in GRANULARITIES:
+        raise ValueError(f"Invalid granularity. Choose from: {', '.join(GRANULARITIES)}")
+    return value
+
+
+def bucket_start(day, granularity):
+    """Awal periode yang memuat day, sama dengan date_trunc PostgreSQL (minggu mulai Senin)"""
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _next_bucket(day, granularity):
+    if granularity == 'month':
+        if day.month == 12:
+            return day.replace(year=day.year + 1, month=1)
+        return day.replace(month=day.month + 1)
+    return day + timedelta(days=7 if granularity == 'week' else 1)
+
+
+def iter_buckets(start_date, end_date, granularity):
+    """Awal setiap periode dari start_date sampai end_date"""
+    current = bucket_start(start_date, granularity)
+    while current <= end_date:
+        yield current
+        current = _next_bucket(current, granularity)
+
+
+def bucket_label(day, granularity):
+    if granularity == 'month':
+        return day.strftime('%b %Y')
+    return day.strftime('%Y-%m-%d')
+
+
+def rebuild_rollup(layer, start_date, end_date):
+    """Bangun ulang baris rollup layer untuk rentang tanggal dari tabel alert, hasilnya jumlah baris rollup"""
+    table = ROLLUP_SOURCE_TABLES[layer]
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Tahan penulisan alert selama rebuild agar delta dari trigger tidak hilang atau dihitung dua kali
+        cursor.execute(f"LOCK TABLE {table} IN SHARE MODE")
+        cursor.execute(
+            "DELETE FROM data_alertdailyrollup WHERE layer = %s AND day BETWEEN %s AND %s",
+            [layer, start_date, end_date],
+        )
+        cursor.execute(
+            """
+            INSERT INTO data_alertdailyrollup
+                (layer, area_of_interest_id, day, bucket, source, count, area_sum, confidence_sum, confidence_count)
+            """ + ROLLUP_SELECT_SQL[layer],
+            [start_date, end_date],
+        )
+        return cursor.rowcount
+
+
+def _rollup(layer, aoi_ids, start_date, end_date):
+    return AlertDailyRollup.objects.filter(
+        layer=layer, area_of_interest_id__in=aoi_ids, day__range=[start_date, end_date]
+    )
+
+
+def _grouped_counts(queryset, granularity, aggregates):
+    """dict awal periode -> baris agregat, dari satu query GROUP BY date_trunc"""
+    rows = (
+        queryset
+        .annotate(period=Trunc('day', granularity, output_field=DateField()))
+        .order_by()
+        .values('period')
+        .annotate(**aggregates)
+    )
+    return {row['period']: row for row in rows}
+
+
+def _series(by_bucket, start_date, end_date, granularity):
+    series = []
+    for bucket in iter_buckets(start_date, end_date, granularity):
+        count = by_bucket[bucket]['total'] if bucket in by_bucket else 0
+        series.append({'name': bucket_label(bucket, granularity), 'value': count, 'amt': count * 100})
+    return series
+
+
+# (bucket rollup, nama) untuk pie chart per layer
+HOTSPOT_PIE_BUCKETS = tuple((category, category) for category in HOTSPOT_CATEGORIES)
+DEFORESTATION_PIE_BUCKETS = tuple((bucket, name) for bucket, name, _low, _high in DEFORESTATION_CONFIDENCE_RANGES)
+
+
+def _chart_data(by_bucket, start_date, end_date, granularity, pie_buckets):
+    """Data chart dari dict awal periode -> {'total', 'bucket_<bucket>'}"""
+    return {
+        'granularity': granularity,
+        'monthly_data': _series(by_bucket, start_date, end_date, granularity),
+        'pie_data': [
+            {'name': name, 'value': sum(row.get(f'bucket_{bucket}') or 0 for row in by_bucket.values())}
+            for bucket, name in pie_buckets
+        ],
+    }
+
+
+def _rollup_chart(layer, aoi_ids, start_date, end_date, granularity, pie_buckets):
+    aggregates = {'total': Sum('count')}
+    aggregates.update({f'bucket_{bucket}': Sum('count', filter=Q(bucket=bucket)) for bucket, _name in pie_buckets})
+    by_bucket = _grouped_counts(_rollup(layer, aoi_ids, start_date, end_date), granularity, aggregates)
+    return _chart_data(by_bucket, start_date, end_date, granularity, pie_buckets)
+
+
+@cached_analytics('hotspotalert')
+def hotspot_chart(aoi_ids, start_date, end_date, granularity='month'):
+    """Data ChartHotspot.tsx: jumlah alert per periode dan per kategori"""
+    return _rollup_chart('hotspotalert', aoi_ids, start_date, end_date, granularity, HOTSPOT_PIE_BUCKETS)
+
+
+@cached_analytics('deforestation')
+def deforestation_chart(aoi_ids, start_date, end_date, granularity='month'):
+    """Data ChartDeforestation.tsx: jumlah alert per periode dan per rentang confidence"""
+    return _rollup_chart('deforestation', aoi_ids, start_date, end_date, granularity, DEFORESTATION_PIE_BUCKETS)
+
+
+# Kolom tabel perusahaan (alias SQL) yang boleh dipakai ?sort=
+HOTSPOT_COMPANY_SORTS = ('name', 'total_events', 'aman', 'perhatian', 'waspada', 'bahaya')
+DEFORESTATION_COMPANY_SORTS = ('name', 'total_events', 'total_area', 'avg_confidence')
+
+
+def parse_table_params(params, sorts, default_sort='total_events', default_limit=10, max_limit=500):
+    """(sort, order, limit, offset) dari query string tabel, raise ValueError jika tidak valid"""
+    sort = params.get('sort') or default_sort
+    if sort not in sorts:
+        raise ValueError(f"Invalid sort. Choose from: {', '.join(sorts)}")
+    order = (params.get('order') or ('asc' if sort == 'name' else 'desc')).lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError("Invalid order. Use asc or desc")
+    try:
+        limit = int(params.get('limit', default_limit))
+        offset = int(params.get('offset', 0))
+    except ValueError:
+        raise ValueError("limit and offset must be integers")
+    if not 1 <= limit <= max_limit or offset < 0:
+        raise ValueError(f"limit must be between 1 and {max_limit} and offset must not be negative")
+    return sort, order, limit, offset
+
+
+def _company_table(layer, columns, aoi_ids, start_date, end_date, sort, order, limit, offset):
+    """(baris, jumlah seluruh baris) tabel per AOI dari satu query GROUP BY atas rollup.
+    Urutan dan halaman dihitung database; AOI tanpa alert dalam rentang tidak ikut"""
+    if not aoi_ids:
+        return [], 0
+    sql = f"""
+        SELECT aoi.name, SUM(r.count) AS total_events, {columns}, COUNT(*) OVER () AS total_rows
+        FROM data_alertdailyrollup r
+        JOIN data_areaofinterest aoi ON aoi.id = r.area_of_interest_id
+        WHERE r.layer = %s AND r.area_of_interest_id = ANY(%s::uuid[]) AND r.day BETWEEN %s AND %s
+        GROUP BY aoi.id, aoi.name
+        HAVING SUM(r.count) > 0
+        ORDER BY {sort} {order} NULLS LAST, aoi.name, aoi.id
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [layer, list(aoi_ids), start_date, end_date, limit, offset])
+        names = [col[0] for col in cursor.description]
+        rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+    if rows:
+        total = rows[0]['total_rows']
+    elif offset:
+        # Halaman di luar jangkauan: COUNT(*) OVER () tidak punya baris untuk dibaca
+        total = _company_table_count(layer, aoi_ids, start_date, end_date)
+    else:
+        total = 0
+    for row in rows:
+        del row['total_rows']
+    return rows, total
+
+
+def _company_table_count(layer, aoi_ids, start_date, end_date):
+    return (
+        _rollup(layer, aoi_ids, start_date, end_date)
+        .order_by()
+        .values('area_of_interest_id')
+        .annotate(total=Sum('count'))
+        .filter(total__gt=0)
+        .count()
+    )
+
+
+# Kolom tabel perusahaan selain name/total_events, agregat atas rollup `r` per AOI
+HOTSPOT_COMPANY_COLUMNS = ', '.join(
+    f"COALESCE(SUM(r.count) FILTER (WHERE r.bucket = '{category}'), 0) AS {category.lower()}"
+    for category in HOTSPOT_CATEGORIES
+)
+DEFORESTATION_COMPANY_COLUMNS = (
+    "SUM(r.area_sum) AS total_area, "
+    "SUM(r.confidence_sum)::numeric / NULLIF(SUM(r.confidence_count), 0) AS avg_confidence"
+)
+
+
+def _hotspot_company_row(row):
+    return {
+        'name': row['name'],
+        'total_events': row['total_events'],
+        **{category.lower(): row[category.lower()] for category in HOTSPOT_CATEGORIES},
+    }
+
+
+def _deforestation_company_row(row):
+    return {
+        'name': row['name'],
+        'total_events': row['total_events'],
+        'total_area': float(row['total_area'] or 0),
+        'avg_confidence': round(float(row['avg_confidence'] or 0), 2),
+    }
+
+
+@cached_analytics('hotspotalert')
+def hotspot_company_table(aoi_ids, start_date, end_date, sort='total_events', order='desc', limit=10, offset=0):
+    """Data CompanyTable.tsx hotspot: (baris per AOI dengan jumlah per kategori, jumlah seluruh baris)"""
+    rows, total = _company_table(
+        'hotspotalert', HOTSPOT_COMPANY_COLUMNS, aoi_ids, start_date, end_date, sort, order, limit, offset
+    )
+    return [_hotspot_company_row(row) for row in rows], total
+
+
+@cached_analytics('deforestation')
+def deforestation_company_table(aoi_ids, start_date, end_date, sort='total_events', order='desc', limit=10, offset=0):
+    """Data CompanyTable.tsx deforestation: (baris per AOI dengan luas dan rata-rata confidence, jumlah seluruh baris)"""
+    rows, total = _company_table(
+        'deforestation', DEFORESTATION_COMPANY_COLUMNS, aoi_ids, start_date, end_date, sort, order, limit, offset
+    )
+    return [_deforestation_company_row(row) for row in rows], total
+
+
+def _rollup_totals(layer, aoi_ids, start_date, end_date):
+    return _rollup(layer, aoi_ids, start_date, end_date).aggregate(
+        total_events=Sum('count'),
+        total_area=Sum('area_sum'),
+        aoi_count=Count('area_of_interest_id', distinct=True),
+    )
+
+
+def _hotspot_stats_data(totals, aoi_ids):
+    return {
+        'total_events': totals['total_events'] or 0,
+        # Jumlah AOI unik yang punya alert dalam rentang tanggal
+        'total_areas': totals['aoi_count'],
+        'total_companies': len(aoi_ids),
+    }
+
+
+def _deforestation_stats_data(totals, aoi_ids):
+    return {
+        'total_events': totals['total_events'] or 0,
+        'total_area': float(totals['total_area'] or 0),
+        'total_companies': totals['aoi_count'],
+    }
+
+
+@cached_analytics('hotspotalert')
+def hotspot_stats(aoi_ids, start_date, end_date):
+    """Data HotspotStats.tsx"""
+    return _hotspot_stats_data(_rollup_totals('hotspotalert', aoi_ids, start_date, end_date), aoi_ids)
+
+
+@cached_analytics('deforestation')
+def deforestation_stats(aoi_ids, start_date, end_date):
+    """Data DeforestationStats.tsx"""
+    return _deforestation_stats_data(_rollup_totals('deforestation', aoi_ids, start_date, end_date), aoi_ids)
+
+
+def parse_page_params(params, max_page_size=500):
+    """(page, page_size) dari query string daftar event, raise ValueError jika tidak valid"""
+    try:
+        page = int(params.get('page', 1))
+        page_size = int(params.get('page_size', 10))
+    except ValueError:
+        raise ValueError("page and page_size must be integers")
+    if page < 1 or not 1 <= page_size <= max_page_size:
+        raise ValueError(f"page must be positive and page_size between 1 and {max_page_size}")
+    return page, page_size
+
+
+def _paginate(queryset, page, page_size, serialize):
+    total_count = queryset.count()
+    start_index = (page - 1) * page_size
+    end_index = start_index + page_size
+    return {
+        'data': [serialize(alert) for alert in queryset[start_index:end_index]],
+        'pagination': {
+            'current_page': page,
+            'page_size': page_size,
+            'total_count': total_count,
+            'total_pages': (total_count + page_size - 1) // page_size,
+            'has_next': end_index < total_count,
+            'has_previous': page > 1
+        }
+    }
+
+
+COUNT_MODES = ('exact', 'estimated', 'none')
+
+
+def encode_cursor(alert_date, pk):
+    """Cursor opaque untuk posisi (alert_date, id) alert terakhir di halaman"""
+    raw = json.dumps([alert_date.isoformat(), pk], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(value, model=None):
+    """(alert_date, pk) dari cursor encode_cursor. Jika `model` diberikan, pk dikonversi ke tipe
+    primary key model tersebut. Raise ValueError jika cursor rusak atau dimanipulasi"""
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != 2:
+            raise ValueError
+        alert_date, pk = payload
+        # bool adalah subclass int, list/dict tidak hashable untuk kunci cache
+        if not isinstance(alert_date, str) or isinstance(pk, bool) or not isinstance(pk, (str, int)):
+            raise ValueError
+        if model is not None:
+            pk = model._meta.pk.to_python(pk)
+        return date.fromisoformat(alert_date), pk
+    except (ValueError, TypeError, ValidationError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_cursor_params(params, max_page_size=500, model=None):
+    """(after, page_size, count_mode) untuk mode cursor (?cursor=, kosong untuk halaman pertama).
+    after None atau (alert_date, id); raise ValueError jika tidak valid"""
+    cursor = params.get('cursor')
+    after = decode_cursor(cursor, model) if cursor else None
+    try:
+        page_size = int(params.get('page_size', 10))
+    except ValueError:
+        raise ValueError("page_size must be an integer")
+    if not 1 <= page_size <= max_page_size:
+        raise ValueError(f"page_size must be between 1 and {max_page_size}")
+    count_mode = params.get('count') or 'none'
+    if count_mode not in COUNT_MODES:
+        raise ValueError(f"Invalid count. Choose from: {', '.join(COUNT_MODES)}")
+    return after, page_size, count_mode
+
+
+def estimated_count(queryset):
+    """Perkiraan jumlah baris dari rencana query PostgreSQL (EXPLAIN), tanpa menjalankan COUNT(*)"""
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _keyset_page(queryset, after, page_size, count_mode, serialize):
+    """Halaman setelah posisi after dengan urutan (-alert_date, -id). Memakai index alert_date
+    dan tidak memindai baris halaman sebelumnya seperti OFFSET"""
+    page = queryset
+    if after is not None:
+        alert_date, pk = after
+        page = page.filter(Q(alert_date__lt=alert_date) | Q(alert_date=alert_date, pk__lt=pk))
+    # Satu baris ekstra untuk has_next tanpa query tambahan
+    alerts = list(page[:page_size + 1])
+    has_next = len(alerts) > page_size
+    alerts = alerts[:page_size]
+
+    pagination = {
+        'page_size': page_size,
+        'next_cursor': encode_cursor(alerts[-1].alert_date, alerts[-1].pk) if has_next else None,
+        'has_next': has_next,
+        'count_mode': count_mode,
+    }
+    if count_mode == 'exact':
+        pagination['total_count'] = queryset.count()
+    elif count_mode == 'estimated':
+        pagination['total_count'] = estimated_count(queryset)
+    return {'data': [serialize(alert) for alert in alerts], 'pagination': pagination}
+
+
+def _hotspot_event(alert):
+    return {
+        'company': alert.area_of_interest.name,
+        'date': alert.alert_date.strftime('%Y-%m-%d'),
+        'time': alert.hotspot.times.strftime('%H:%M') if alert.hotspot.times else '00:00',
+        'distance': f"{alert.distance:.2f}" if alert.distance else "0.00",
+        'satellite': alert.hotspot.sat if alert.hotspot.sat else 'Unknown',
+        'category': alert.get_category_display(),
+        'hotspot_id': alert.hotspot.id,
+        'aoi_id': alert.area_of_interest.id
+    }
+
+
+def _deforestation_event(alert):
+    return {
+        'company': alert.company.name,
+        'date': alert.alert_date.strftime('%Y-%m-%d'),
+        'area': f"{alert.area:.2f}" if alert.area else "0.00",
+        'confidence': alert.confidence or 0,
+        'event_id': alert.event_id,
+        'aoi_id': alert.company.id
+    }
+
+
+def _hotspot_events(aoi_ids, start_date, end_date):
+    return HotspotAlert.objects.filter(
+        area_of_interest_id__in=aoi_ids,
+        alert_date__range=[start_date, end_date]
+    ).select_related('area_of_interest', 'hotspot').order_by('-alert_date', '-id')
+
+
+def _deforestation_events(aoi_ids, start_date, end_date):
+    return DeforestationAlerts.objects.filter(
+        company_id__in=aoi_ids,
+        alert_date__range=[start_date, end_date]
+    ).select_related('company').order_by('-alert_date', '-id')
+
+
+@cached_analytics('hotspotalert')
+def hotspot_event_list(aoi_ids, start_date, end_date, page=1, page_size=10):
+    """Data EventList.tsx hotspot: alert terbaru dengan pagination"""
+    return _paginate(_hotspot_events(aoi_ids, start_date, end_date), page, page_size, _hotspot_event)
+
+
+@cached_analytics('deforestation')
+def deforestation_event_list(aoi_ids, start_date, end_date, page=1, page_size=10):
+    """Data EventList.tsx deforestation: alert terbaru dengan pagination"""
+    return _paginate(
+        _deforestation_events(aoi_ids, start_date, end_date), page, page_size, _deforestation_event
+    )
+
+
+@cached_analytics('hotspotalert')
+def hotspot_event_list_after(aoi_ids, start_date, end_date, after=None, page_size=10, count_mode='none'):
+    """Seperti hotspot_event_list dengan pagination cursor (keyset)"""
+    return _keyset_page(
+        _hotspot_events(aoi_ids, start_date, end_date), after, page_size, count_mode, _hotspot_event
+    )
+
+
+@cached_analytics('deforestation')
+def deforestation_event_list_after(aoi_ids, start_date, end_date, after=None, page_size=10, count_mode='none'):
+    """Seperti deforestation_event_list dengan pagination cursor (keyset)"""
+    return _keyset_page(
+        _deforestation_events(aoi_ids, start_date, end_date), after, page_size, count_mode, _deforestation_event
+    )
+
+
+EVENT_MODELS = {'hotspotalert': HotspotAlert, 'deforestation': DeforestationAlerts}
+
+
+def event_list_page(layer, aoi_ids, params, version=None):
+    """Daftar event layer dengan mode page/page_size, atau mode cursor jika ?cursor= ada.
+    `version` lihat cached_analytics. Raise ValueError jika parameter tidak valid"""
+    # Tanpa rentang tanggal eksplisit memakai 30 hari terakhir
+    start_date, end_date = parse_date_range(params, default_days=30)
+    if 'cursor' in params:
+        after, page_size, count_mode = parse_cursor_params(params, model=EVENT_MODELS[layer])
+        event_list = hotspot_event_list_after if layer == 'hotspotalert' else deforestation_event_list_after
+        return event_list(aoi_ids, start_date, end_date, after, page_size, count_mode, version=version)
+    page, page_size = parse_page_params(params)
+    event_list = hotspot_event_list if layer == 'hotspotalert' else deforestation_event_list
+    return event_list(aoi_ids, start_date, end_date, page, page_size, version=version)
+
+
+DASHBOARD_PANELS = ('stats', 'chart', 'company_table', 'event_list')
+
+# Panel dashboard yang dihitung dari AlertDailyRollup dalam satu query (lihat _dashboard_rollup_panels)
+ROLLUP_PANELS = ('stats', 'chart', 'company_table')
+
+# layer -> (data stats, bucket pie chart, kolom tabel perusahaan, baris tabel perusahaan, kolom sort)
+_DASHBOARD_LAYERS = {
+    'hotspotalert': (
+        _hotspot_stats_data, HOTSPOT_PIE_BUCKETS, HOTSPOT_COMPANY_COLUMNS, _hotspot_company_row,
+        HOTSPOT_COMPANY_SORTS,
+    ),
+    'deforestation': (
+        _deforestation_stats_data, DEFORESTATION_PIE_BUCKETS, DEFORESTATION_COMPANY_COLUMNS,
+        _deforestation_company_row, DEFORESTATION_COMPANY_SORTS,
+    ),
+}
+
+DASHBOARD_STATS_SQL = """
+    SELECT json_build_object(
+        'total_events', COALESCE(SUM(count), 0), 'total_area', COALESCE(SUM(area_sum), 0),
+        'aoi_count', COUNT(DISTINCT area_of_interest_id)
+    ) FROM r
+"""
+
+DASHBOARD_PERIODS_SQL = """
+    SELECT json_agg(json_build_array(period, bucket, count)) FROM (
+        SELECT date_trunc(%(granularity)s, day)::date AS period, bucket, SUM(count) AS count
+        FROM r GROUP BY 1, 2
+    ) periods
+"""
+
+DASHBOARD_COMPANY_ROWS_SQL = """
+    SELECT json_agg(page ORDER BY page.position) FROM (
+        SELECT companies.*, row_number() OVER (ORDER BY {sort} {order} NULLS LAST, name, id) AS position
+        FROM companies
+        ORDER BY position
+        LIMIT %(limit)s OFFSET %(offset)s
+    ) page
+"""
+
+
+def _dashboard_rollup_panels(layer, aoi_ids, start_date, end_date, panels, granularity, table):
+    """Panel stats, chart dan company_table dari satu query: baris rollup scope dibaca sekali
+    (CTE r) lalu diagregasi per panel. `table` adalah (sort, order, limit, offset)"""
+    stats_data, pie_buckets, company_columns, company_row, _sorts = _DASHBOARD_LAYERS[layer]
+    sort, order, limit, offset = table or ('total_events', 'desc', 0, 0)
+    with_table = 'company_table' in panels
+    sql = f"""
+        WITH r AS MATERIALIZED (
+            SELECT area_of_interest_id, day, bucket, count, area_sum, confidence_sum, confidence_count
+            FROM data_alertdailyrollup
+            WHERE layer = %(layer)s AND area_of_interest_id = ANY(%(aoi_ids)s::uuid[])
+            AND day BETWEEN %(start_date)s AND %(end_date)s
+        ),
+        companies AS (
+            SELECT aoi.id, aoi.name, SUM(r.count) AS total_events, {company_columns}
+            FROM r JOIN data_areaofinterest aoi ON aoi.id = r.area_of_interest_id
+            GROUP BY aoi.id, aoi.name
+            HAVING SUM(r.count) > 0
+        )
+        SELECT
+            ({DASHBOARD_STATS_SQL if 'stats' in panels else 'NULL'}),
+            ({DASHBOARD_PERIODS_SQL if 'chart' in panels else 'NULL'}),
+            ({'SELECT COUNT(*) FROM companies' if with_table else 'NULL'}),
+            ({DASHBOARD_COMPANY_ROWS_SQL.format(sort=sort, order=order) if with_table else 'NULL'})
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'layer': layer, 'aoi_ids': list(aoi_ids), 'start_date': start_date, 'end_date': end_date,
+            'granularity': granularity, 'limit': limit, 'offset': offset,
+        })
+        stats, periods, company_count, company_rows = cursor.fetchone()
+
+    result = {}
+    if 'stats' in panels:
+        result['stats'] = stats_data(stats, aoi_ids)
+    if 'chart' in panels:
+        by_bucket = {}
+        for period, bucket, count in periods or ():
+            row = by_bucket.setdefault(date.fromisoformat(period), {'total': 0})
+            row['total'] += count
+            row[f'bucket_{bucket}'] = row.get(f'bucket_{bucket}', 0) + count
+        result['chart'] = _chart_data(by_bucket, start_date, end_date, granularity, pie_buckets)
+    if with_table:
+        result['company_table'] = {
+            'data': [company_row(row) for row in company_rows or ()],
+            'total_count': company_count,
+        }
+    return result
+
+
+@cached_analytics('hotspotalert')
+def hotspot_dashboard_panels(aoi_ids, start_date, end_date, panels, granularity=None, table=None):
+    return _dashboard_rollup_panels('hotspotalert', aoi_ids, start_date, end_date, panels, granularity, table)
+
+
+@cached_analytics('deforestation')
+def deforestation_dashboard_panels(aoi_ids, start_date, end_date, panels, granularity=None, table=None):
+    return _dashboard_rollup_panels('deforestation', aoi_ids, start_date, end_date, panels, granularity, table)
+
+
+def parse_panels(value):
+    """Daftar panel dari ?panels=, dalam urutan DASHBOARD_PANELS"""
+    if not value:
+        return list(DASHBOARD_PANELS)
+    panels = {panel.strip() for panel in value.split(',') if panel.strip()}
+    if not panels or panels - set(DASHBOARD_PANELS):
+        raise ValueError(f"Invalid panels. Choose from: {', '.join(DASHBOARD_PANELS)}")
+    return [panel for panel in DASHBOARD_PANELS if panel in panels]
+
+
+def dashboard_bundle(layer, aoi_ids, params):
+    """Semua panel dashboard layer dalam satu respons. Parameter sama dengan endpoint per panel
+    (start_date/end_date, granularity, sort/order/limit/offset, page/page_size atau cursor/count);
+    tanggal dan AOI di-parse sekali dan versi data dibaca sekali untuk semua panel.
+    Raise ValueError jika parameter tidak valid"""
+    company_sorts = _DASHBOARD_LAYERS[layer][-1]
+    panels = parse_panels(params.get('panels'))
+    start_date, end_date = parse_date_range(params)
+
+    # Validasi semua parameter sebelum query pertama
+    granularity = parse_granularity(params.get('granularity')) if 'chart' in panels else None
+    table = parse_table_params(params, company_sorts) if 'company_table' in panels else None
+    if 'event_list' in panels:
+        if 'cursor' in params:
+            parse_cursor_params(params, model=EVENT_MODELS[layer])
+        else:
+            parse_page_params(params)
+
+    version = analytics_version(layer, aoi_ids) if _cache_params['ENABLED'] else None
+    bundle = {}
+    rollup_panels = tuple(panel for panel in panels if panel in ROLLUP_PANELS)
+    if rollup_panels:
+        dashboard_panels = hotspot_dashboard_panels if layer == 'hotspotalert' else deforestation_dashboard_panels
+        bundle.update(dashboard_panels(
+            aoi_ids, start_date, end_date, rollup_panels, granularity, table, version=version
+        ))
+    if 'event_list' in panels:
+        bundle['event_list'] = event_list_page(layer, aoi_ids, params, version=version)
+    return bundle
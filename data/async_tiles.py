@@ -0,0 +1,280 @@
+# data/async_tiles.py
+"""Jalur tile MVT async untuk ASGI (lihat monitoringbackend/asgi.py).
+
+Tile dilayani langsung sebagai aplikasi ASGI tanpa view Django, memakai pool koneksi
+psycopg 3 async sehingga request yang menunggu PostGIS tidak menahan thread. Query, kunci
+cache, ETag, kompresi dan advisory lock render antar worker sama dengan BaseUserTileView.
+
+Perbedaannya: tile hotspot rentang tanggal tidak disusun dari fragmen per hari
+(HOTSPOT_DAY_FRAGMENTS), tetapi dirender utuh dan di-cache dengan kunci rentang tanggal.
+"""
+import asyncio
+import logging
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.http import parse_etags
+
+try:
+    from psycopg import AsyncClientCursor, OperationalError as PsycopgOperationalError
+    from psycopg.conninfo import make_conninfo
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:  # psycopg 3 hanya dibutuhkan jalur async
+    AsyncConnectionPool = None
+
+from accounts.authentication import aresolve_token_user_id, aget_user_aoi_ids
+from .tile_archive import read_archived_tile
+from .tile_cache import get_tile_cache, tile_variant
+from .tile_compression import IDENTITY, combine_tiles, compress_tile, encode_for_client
+from .tiles import (
+    TILE_ROUTES, TILE_VERSIONS_SQL, layer_filters, parse_tile_filters, route_tile_layers,
+    tile_data_versions_from_rows, tile_etag, tile_render_lock_id, tile_render_sql, tile_versions_params,
+    scope_aoi_ids, _layer_variant,
+)
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = None
+# Render tile identik yang sedang berjalan di event loop ini
+_inflight = {}
+
+
+def get_async_tile_settings():
+    params = getattr(settings, 'TILE_ASYNC', None) or {}
+    return {
+        'PREFIX': params.get('PREFIX') or '',
+        'MIN_SIZE': int(params.get('MIN_SIZE', 2)),
+        'MAX_SIZE': int(params.get('MAX_SIZE', 20)),
+        'TIMEOUT': float(params.get('TIMEOUT', 10)),
+    }
+
+
+def _conninfo():
+    db = settings.DATABASES['default']
+    values = {
+        'dbname': db.get('NAME'),
+        'user': db.get('USER'),
+        'password': db.get('PASSWORD'),
+        'host': db.get('HOST'),
+        'port': db.get('PORT'),
+    }
+    return make_conninfo(**{k: v for k, v in values.items() if v})
+
+
+async def get_pool():
+    """Pool koneksi async, dibuka saat pertama dipakai"""
+    global _pool, _pool_lock
+    if _pool is not None:
+        return _pool
+    if AsyncConnectionPool is None:
+        raise ImproperlyConfigured("The async tile path requires the psycopg and psycopg_pool packages")
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _pool is None:
+            params = get_async_tile_settings()
+            # Client-side binding seperti psycopg2/Django agar query builder di tiles.py bisa dipakai apa adanya
+            pool = AsyncConnectionPool(
+                _conninfo(),
+                min_size=params['MIN_SIZE'],
+                max_size=params['MAX_SIZE'],
+                timeout=params['TIMEOUT'],
+                kwargs={'autocommit': True, 'cursor_factory': AsyncClientCursor},
+                open=False,
+            )
+            await pool.open()
+            _pool = pool
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def fetchone(sql, params):
+    pool = await get_pool()
+    async with pool.connection() as conn:
+        cursor = await conn.execute(sql, params)
+        return await cursor.fetchone()
+
+
+async def fetchall(sql, params):
+    pool = await get_pool()
+    async with pool.connection() as conn:
+        cursor = await conn.execute(sql, params)
+        return await cursor.fetchall()
+
+
+async def atile_versions(layers, z, x, y, aoi_ids):
+    if not aoi_ids:
+        return {layer: '0' for layer in layers}
+    rows = await fetchall(TILE_VERSIONS_SQL, tile_versions_params(layers, z, x, y, aoi_ids))
+    return tile_data_versions_from_rows(layers, rows)
+
+
+async def _arender_compressed(conn, layers, z, x, y, aoi_ids, filters, variants, cache):
+    if aoi_ids:
+        sql, params = tile_render_sql(layers, z, x, y, aoi_ids, filters)
+        cursor = await conn.execute(sql, params)
+        row = await cursor.fetchone()
+    else:
+        row = [None] * len(layers)
+    tiles = {layer: compress_tile(bytes(data) if data else b'') for layer, data in zip(layers, row)}
+    if cache is not None:
+        def store():
+            for layer, (encoding, data) in tiles.items():
+                cache.set(layer, z, x, y, variants[layer], encoding, data)
+        await asyncio.to_thread(store)
+    return tiles
+
+
+async def _arender_locked(conn, key, layers, z, x, y, aoi_ids, filters, variants, cache):
+    """Versi async tiles._tile_render_lock: worker yang menunggu lock membaca cache dulu
+    sebelum merender sendiri"""
+    lock_id = tile_render_lock_id(key)
+    async with conn.transaction():
+        cursor = await conn.execute("SELECT pg_try_advisory_xact_lock(%s)", [lock_id])
+        if not (await cursor.fetchone())[0]:
+            try:
+                async with conn.transaction():
+                    await conn.execute("SELECT set_config('lock_timeout', %s, true)",
+                                       [f"{int(cache.lock_timeout * 1000)}ms"])
+                    await conn.execute("SELECT pg_advisory_xact_lock(%s)", [lock_id])
+                    await conn.execute("SELECT set_config('lock_timeout', '0', true)")
+            except PsycopgOperationalError:
+                logger.warning(f"Timed out waiting for concurrent render of {key}, rendering anyway")
+            cached = await asyncio.to_thread(
+                lambda: {layer: cache.get(layer, z, x, y, variants[layer]) for layer in layers}
+            )
+            if all(tile is not None for tile in cached.values()):
+                return cached
+        return await _arender_compressed(conn, layers, z, x, y, aoi_ids, filters, variants, cache)
+
+
+async def _arender_and_cache(key, layers, z, x, y, aoi_ids, filters, variants, cache):
+    pool = await get_pool()
+    async with pool.connection() as conn:
+        if cache is not None and cache.shared and cache.lock_timeout:
+            return await _arender_locked(conn, key, layers, z, x, y, aoi_ids, filters, variants, cache)
+        return await _arender_compressed(conn, layers, z, x, y, aoi_ids, filters, variants, cache)
+
+
+async def aget_or_render_tiles(layers, z, x, y, aoi_ids, filters=None, versions=None):
+    """Versi async get_or_render_tiles. Baca arsip/cache (I/O file) di thread,
+    render yang belum ada lewat pool async dan gabungkan render identik yang bersamaan."""
+    cache = get_tile_cache()
+    use_cache = cache is not None and cache.is_cacheable(z)
+    variants = {layer: _layer_variant(layer, aoi_ids, filters, versions) for layer in layers}
+
+    def lookup():
+        found = {}
+        for layer in layers:
+            tile = None
+            if not layer_filters(layer, filters):
+                tile = read_archived_tile(tile_variant(aoi_ids), layer, z, x, y, (versions or {}).get(layer))
+            if tile is None and use_cache:
+                tile = cache.get(layer, z, x, y, variants[layer])
+            if tile is not None:
+                found[layer] = tile
+        return found
+
+    tiles = await asyncio.to_thread(lookup)
+    missing = [layer for layer in layers if layer not in tiles]
+    if missing:
+        key = '|'.join(f"{layer}/{z}/{x}/{y}/{variants[layer]}" for layer in missing)
+        future = _inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(_arender_and_cache(
+                key, missing, z, x, y, aoi_ids, filters, variants, cache if use_cache else None
+            ))
+            _inflight[key] = future
+            future.add_done_callback(lambda _f: _inflight.pop(key, None))
+        # shield: client yang disconnect tidak membatalkan render yang ditunggu request lain
+        tiles.update(await asyncio.shield(future))
+    return tiles
+
+
+async def _respond(send, status, body=b'', content_type='text/plain; charset=utf-8', headers=(), head=False):
+    raw_headers = [(b'content-length', str(len(body)).encode())]
+    if body or status >= 400:
+        raw_headers.append((b'content-type', content_type.encode()))
+    raw_headers += [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': b'' if head else body})
+
+
+def _cors_headers(origin):
+    if origin and origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', ()):
+        headers = [('Access-Control-Allow-Origin', origin)]
+        if getattr(settings, 'CORS_ALLOW_CREDENTIALS', False):
+            headers.append(('Access-Control-Allow-Credentials', 'true'))
+        return headers
+    return []
+
+
+async def handle_tile_request(route, z, x, y, query, headers):
+    """Hasil (status, body, content_type, headers) untuk satu request tile, semantik sama dengan BaseUserTileView"""
+    text = 'text/plain; charset=utf-8'
+    token_key = query.get('token')
+    if not token_key:
+        return 403, b'Token required', text, []
+    user_id = await aresolve_token_user_id(token_key, fetchone)
+    if user_id is None:
+        return 403, b'Invalid token', text, []
+
+    try:
+        layers = route_tile_layers(route, query.get('layers'))
+        filters = parse_tile_filters(query)
+    except ValueError as e:
+        return 400, str(e).encode('utf-8'), text, []
+
+    aoi_ids = scope_aoi_ids(await aget_user_aoi_ids(user_id, fetchall), filters)
+    versions = await atile_versions(layers, z, x, y, aoi_ids)
+    etag = tile_etag(layers, z, x, y, aoi_ids, filters, versions)
+    response_headers = [('ETag', etag), ('Cache-Control', 'private, no-cache')]
+
+    if_none_match = parse_etags(headers.get('if-none-match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        return 304, b'', text, response_headers
+
+    tiles = await aget_or_render_tiles(layers, z, x, y, aoi_ids, filters, versions)
+    encoding, tile = combine_tiles([tiles[layer] for layer in layers])
+    if not tile:
+        return 204, b'', text, response_headers
+    encoding, tile = encode_for_client(encoding, tile, headers.get('accept-encoding', ''))
+    if encoding != IDENTITY:
+        response_headers.append(('Content-Encoding', encoding))
+    return 200, tile, 'application/x-protobuf', response_headers
+
+
+async def tile_application(scope, receive, send):
+    """Aplikasi ASGI untuk <PREFIX><layer>/<z>/<x>/<y>/"""
+    method = scope['method']
+    head = method == 'HEAD'
+    prefix = get_async_tile_settings()['PREFIX']
+    parts = scope['path'][len(prefix):].strip('/').split('/')
+
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    cors = _cors_headers(headers.get('origin'))
+    vary = [('Vary', 'Accept-Encoding, Origin')]
+
+    if method not in ('GET', 'HEAD'):
+        return await _respond(send, 405, b'Method not allowed', headers=cors + [('Allow', 'GET, HEAD')])
+    if len(parts) != 4 or parts[0] not in TILE_ROUTES or not all(part.isdigit() for part in parts[1:]):
+        return await _respond(send, 404, b'Not found', headers=cors, head=head)
+
+    z, x, y = (int(part) for part in parts[1:])
+    query = {k: v[-1] for k, v in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+    try:
+        status, body, content_type, response_headers = await handle_tile_request(
+            parts[0], z, x, y, query, headers
+        )
+    except Exception:
+        logger.exception(f"Async tile request failed: {scope['path']}")
+        return await _respond(send, 500, b'Internal server error', headers=cors, head=head)
+    await _respond(send, status, body, content_type, response_headers + vary + cors, head=head)
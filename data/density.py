@@ -0,0 +1,243 @@
+# data/density.py
+"""Kepadatan hotspot alert per sel grid (square/hex) untuk AOI user, dihitung di PostGIS.
+
+Sel memakai grid global EPSG:3857 dengan origin (0, 0) sehingga (i, j) stabil antar request:
+square i = floor(x / size), j = floor(y / size); hex memakai indeks ST_HexagonGrid.
+Resolusi yang terdaftar di HOTSPOT_GRID['PRECOMPUTED'] dibaca dari HotspotGridDaily
+(`python manage.py build_hotspot_grid`) hanya untuk hari yang sudah tutup (lebih tua dari
+LAG_DAYS) dan versi datanya (TileDayVersion) belum berubah sejak dibangun; hari lain dihitung live.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .analytics import cached_analytics
+from .models import AreaOfInterest
+
+GRID_SHAPES = ('square', 'hex')
+
+
+def get_hotspot_grid_settings():
+    params = getattr(settings, 'HOTSPOT_GRID', None) or {}
+    precomputed = params.get('PRECOMPUTED') or ()
+    if isinstance(precomputed, str):
+        precomputed = [item for item in precomputed.split(',') if item.strip()]
+    resolutions = set()
+    for item in precomputed:
+        if isinstance(item, str):
+            shape, _sep, size = item.strip().partition(':')
+            item = (shape, size)
+        resolutions.add((item[0], int(item[1])))
+    return {
+        'MIN_SIZE': int(params.get('MIN_SIZE', 250)),
+        'MAX_SIZE': int(params.get('MAX_SIZE', 200000)),
+        'PRECOMPUTED': resolutions,
+        'LAG_DAYS': max(1, int(params.get('LAG_DAYS', 2))),
+    }
+
+
+def last_closed_day():
+    """Hari terakhir yang dianggap lengkap untuk HotspotGridDaily: alert yang datang terlambat
+    biasanya masih masuk dalam LAG_DAYS hari"""
+    return timezone.localdate() - timedelta(days=get_hotspot_grid_settings()['LAG_DAYS'])
+
+
+def parse_grid_params(params):
+    """(shape, size) dari ?shape=square|hex&size=<meter>, raise ValueError jika tidak valid"""
+    grid = get_hotspot_grid_settings()
+    shape = params.get('shape') or 'hex'
+    if shape not in GRID_SHAPES:
+        raise ValueError(f"Invalid shape. Choose from: {', '.join(GRID_SHAPES)}")
+    try:
+        size = int(params.get('size', 5000))
+    except ValueError:
+        raise ValueError("size must be an integer (meters)")
+    if not grid['MIN_SIZE'] <= size <= grid['MAX_SIZE']:
+        raise ValueError(f"size must be between {grid['MIN_SIZE']} and {grid['MAX_SIZE']} meters")
+    return shape, size
+
+
+def _cell_sql(shape):
+    """(join, kolom i, kolom j) yang memetakan titik h.geom_3857 ke tepat satu sel"""
+    if shape == 'hex':
+        # LIMIT 1: titik di tepi dua heksagon tidak dihitung dua kali; ORDER BY agar selnya
+        # selalu sama antara build HotspotGridDaily dan hitungan live
+        return (
+            """CROSS JOIN LATERAL (
+                SELECT hex.i, hex.j FROM ST_HexagonGrid(%(size)s, h.geom_3857) AS hex
+                WHERE ST_Intersects(hex.geom, h.geom_3857) ORDER BY hex.i, hex.j LIMIT 1
+            ) cell""",
+            "cell.i",
+            "cell.j",
+        )
+    return "", "floor(ST_X(h.geom_3857) / %(size)s)::int", "floor(ST_Y(h.geom_3857) / %(size)s)::int"
+
+
+def _alert_cells_sql(shape, group_columns, by_days=False):
+    """SELECT agregat alert per sel, ditambah kolom group_columns (mis. AOI dan hari).
+    Tanggal dari rentang start_date/end_date, atau daftar `days` jika by_days"""
+    join_sql, i_sql, j_sql = _cell_sql(shape)
+    date_sql = (
+        "alerts.alert_date = ANY(%(days)s::date[])" if by_days
+        else "alerts.alert_date BETWEEN %(start_date)s AND %(end_date)s"
+    )
+    extra = ''.join(f", {column}" for column in group_columns)
+    group_sql = ', '.join(str(n) for n in range(1, 3 + len(group_columns)))
+    return f"""
+        SELECT {i_sql} AS i, {j_sql} AS j{extra},
+               COUNT(*) AS count, MAX(COALESCE(alerts.confidence, 0)) AS max_confidence
+        FROM data_hotspotalert alerts
+        JOIN data_hotspots h ON alerts.hotspot_id = h.id
+        {join_sql}
+        WHERE alerts.area_of_interest_id = ANY(%(aoi_ids)s::uuid[])
+        AND {date_sql}
+        AND h.geom_3857 IS NOT NULL
+        GROUP BY {group_sql}
+    """
+
+
+def _live_cells(shape, size, aoi_ids, start_date=None, end_date=None, days=None):
+    with connection.cursor() as cursor:
+        cursor.execute(_alert_cells_sql(shape, (), by_days=days is not None), {
+            'size': size, 'aoi_ids': list(aoi_ids), 'start_date': start_date, 'end_date': end_date,
+            'days': list(days or ()),
+        })
+        return cursor.fetchall()
+
+
+def _precomputed_cutoff(shape, size):
+    """Hari terakhir yang ada di HotspotGridDaily untuk resolusi ini, None jika kosong"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT MAX(day) FROM data_hotspotgriddaily WHERE shape = %s AND size = %s", [shape, size]
+        )
+        return cursor.fetchone()[0]
+
+
+def stale_grid_days(shape, size, start_date, end_date, aoi_ids=None):
+    """Hari di rentang yang versi TileDayVersion-nya (dijaga trigger) sudah berbeda dengan versi saat
+    HotspotGridDaily dibangun, mis. alert terlambat, alert diganti atau hotspot dipindah. aoi_ids None = semua AOI"""
+    aoi_sql = "AND area_of_interest_id = ANY(%(aoi_ids)s::uuid[])" if aoi_ids is not None else ""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT COALESCE(v.day, g.day)
+            FROM (
+                SELECT day, SUM(version) AS version FROM data_tiledayversion
+                WHERE layer = 'hotspotalert' AND day BETWEEN %(start_date)s AND %(end_date)s {aoi_sql}
+                GROUP BY day
+            ) v
+            FULL JOIN (
+                SELECT day, SUM(version) AS version FROM data_hotspotgriddayversion
+                WHERE shape = %(shape)s AND size = %(size)s AND day BETWEEN %(start_date)s AND %(end_date)s {aoi_sql}
+                GROUP BY day
+            ) g ON v.day = g.day
+            WHERE COALESCE(v.version, 0) <> COALESCE(g.version, 0)
+            ORDER BY 1
+            """,
+            {'shape': shape, 'size': size, 'start_date': start_date, 'end_date': end_date,
+             'aoi_ids': list(aoi_ids or ())},
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _precomputed_cells(shape, size, aoi_ids, start_date, end_date, exclude_days=()):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT i, j, SUM(count), MAX(max_confidence)
+            FROM data_hotspotgriddaily
+            WHERE shape = %s AND size = %s AND area_of_interest_id = ANY(%s::uuid[])
+            AND day BETWEEN %s AND %s AND NOT day = ANY(%s::date[])
+            GROUP BY i, j
+            """,
+            [shape, size, list(aoi_ids), start_date, end_date, list(exclude_days)],
+        )
+        return cursor.fetchall()
+
+
+@cached_analytics('hotspotalert')
+def hotspot_density(aoi_ids, start_date, end_date, shape='hex', size=5000):
+    """Jumlah alert dan confidence maksimum per sel grid sebagai array kolom yang ringkas"""
+    rows = []
+    if aoi_ids:
+        live_start = start_date
+        if (shape, size) in get_hotspot_grid_settings()['PRECOMPUTED']:
+            # Hanya hari yang sudah tutup; hari yang berubah setelah dibangun
+            # (versi TileDayVersion berbeda) dihitung live
+            cutoff = min(_precomputed_cutoff(shape, size) or start_date - timedelta(days=1), last_closed_day())
+            if cutoff >= start_date:
+                precomputed_end = min(cutoff, end_date)
+                stale = stale_grid_days(shape, size, start_date, precomputed_end, aoi_ids)
+                rows += _precomputed_cells(shape, size, aoi_ids, start_date, precomputed_end, stale)
+                if stale:
+                    rows += _live_cells(shape, size, aoi_ids, days=stale)
+                live_start = cutoff + timedelta(days=1)
+        if live_start <= end_date:
+            rows += _live_cells(shape, size, aoi_ids, live_start, end_date)
+    return merge_cells(rows, shape, size)
+
+
+def merge_cells(rows, shape, size):
+    """Gabungkan baris (i, j, count, max_confidence) dari bagian precomputed dan live menjadi
+    array kolom terurut per (i, j)"""
+    cells = {}
+    for i, j, count, max_confidence in rows:
+        if (i, j) in cells:
+            previous_count, previous_confidence = cells[(i, j)]
+            cells[(i, j)] = (previous_count + count, max(previous_confidence, max_confidence))
+        else:
+            cells[(i, j)] = (count, max_confidence)
+
+    keys = sorted(cells)
+    return {
+        'shape': shape,
+        'size': size,
+        'srid': 3857,
+        'i': [i for i, _j in keys],
+        'j': [j for _i, j in keys],
+        'count': [int(cells[key][0]) for key in keys],
+        'max_confidence': [cells[key][1] for key in keys],
+    }
+
+
+def build_hotspot_grid(shape, size, start_date, end_date, aoi_ids=None):
+    """Hitung ulang HotspotGridDaily satu resolusi untuk rentang tanggal, hasilnya jumlah baris"""
+    if aoi_ids is None:
+        aoi_ids = [str(aoi_id) for aoi_id in AreaOfInterest.objects.values_list('id', flat=True)]
+    params = {
+        'shape': shape, 'size': size, 'aoi_ids': list(aoi_ids), 'start_date': start_date, 'end_date': end_date,
+    }
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in ('data_hotspotgriddaily', 'data_hotspotgriddayversion'):
+            cursor.execute(
+                f"""
+                DELETE FROM {table}
+                WHERE shape = %(shape)s AND size = %(size)s AND area_of_interest_id = ANY(%(aoi_ids)s::uuid[])
+                AND day BETWEEN %(start_date)s AND %(end_date)s
+                """,
+                params,
+            )
+        # Versi dibaca sebelum sel: alert yang masuk selama build membuat hari itu langsung dianggap basi
+        cursor.execute(
+            """
+            INSERT INTO data_hotspotgriddayversion (shape, size, area_of_interest_id, day, version)
+            SELECT %(shape)s, %(size)s, area_of_interest_id, day, version
+            FROM data_tiledayversion
+            WHERE layer = 'hotspotalert' AND area_of_interest_id = ANY(%(aoi_ids)s::uuid[])
+            AND day BETWEEN %(start_date)s AND %(end_date)s
+            """,
+            params,
+        )
+        cursor.execute(
+            """
+            INSERT INTO data_hotspotgriddaily
+                (shape, size, i, j, area_of_interest_id, day, count, max_confidence)
+            SELECT %(shape)s, %(size)s, cells.*
+            FROM ({cells}) cells
+            """.format(cells=_alert_cells_sql(shape, ('alerts.area_of_interest_id', 'alerts.alert_date'))),
+            params,
+        )
+        return cursor.rowcount
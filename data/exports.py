@@ -0,0 +1,146 @@
+# data/exports.py
+"""Ekspor HotspotAlert/DeforestationAlerts sebagai CSV, NDJSON atau GeoJSON secara streaming.
+
+Baris dibaca lewat server-side cursor (QuerySet.iterator) dan langsung ditulis ke respons,
+sehingga memori tetap konstan berapa pun jumlah baris. Geometry di-serialisasi oleh PostGIS.
+"""
+import csv
+import json
+import uuid
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .analytics import parse_date_range
+from .models import HotspotAlert, DeforestationAlerts
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'geojson': 'application/geo+json',
+}
+
+# Kolom ekspor per layer: nama kolom -> path field QuerySet.values()
+EXPORT_COLUMNS = {
+    'hotspotalert': {
+        'id': 'id',
+        'alert_date': 'alert_date',
+        'category': 'category',
+        'confidence': 'confidence',
+        'distance': 'distance',
+        'aoi_id': 'area_of_interest_id',
+        'aoi_name': 'area_of_interest__name',
+        'hotspot_id': 'hotspot_id',
+        'source': 'hotspot__source',
+        'satellite': 'hotspot__sat',
+        'time': 'hotspot__times',
+        'lat': 'hotspot__lat',
+        'long': 'hotspot__long',
+    },
+    'deforestation': {
+        'id': 'id',
+        'event_id': 'event_id',
+        'alert_date': 'alert_date',
+        'confidence': 'confidence',
+        'area': 'area',
+        'aoi_id': 'company_id',
+        'aoi_name': 'company__name',
+    },
+}
+
+
+def get_export_settings():
+    params = getattr(settings, 'ALERT_EXPORT', None) or {}
+    return {
+        'CHUNK_SIZE': int(params.get('CHUNK_SIZE', 2000)),
+    }
+
+
+def parse_export_params(params, aoi_ids):
+    """(aoi_ids, start_date, end_date, include_geom) dengan filter sama seperti dashboard
+    (start_date/end_date) ditambah ?aoi_id=<uuid>[,<uuid>] yang mempersempit AOI user.
+    Raise ValueError jika parameter tidak valid"""
+    start_date, end_date = parse_date_range(params)
+    selected = params.get('aoi_id')
+    if selected:
+        try:
+            selected = {str(uuid.UUID(value.strip())) for value in selected.split(',') if value.strip()}
+        except ValueError:
+            raise ValueError("Invalid aoi_id")
+        aoi_ids = [aoi_id for aoi_id in aoi_ids if aoi_id in selected]
+    include_geom = params.get('geom', 'false').lower() == 'true'
+    return aoi_ids, start_date, end_date, include_geom
+
+
+def export_queryset(layer, aoi_ids, start_date, end_date, include_geom):
+    """QuerySet values() berurutan (-alert_date, -id), geometry sebagai teks GeoJSON di kolom 'geometry'"""
+    columns = EXPORT_COLUMNS[layer]
+    if layer == 'hotspotalert':
+        queryset = HotspotAlert.objects.filter(area_of_interest_id__in=aoi_ids)
+        geometry = AsGeoJSON('hotspot__geom')
+    else:
+        queryset = DeforestationAlerts.objects.filter(company_id__in=aoi_ids)
+        geometry = AsGeoJSON('geom')
+    queryset = queryset.filter(alert_date__range=[start_date, end_date]).order_by('-alert_date', '-id')
+    # Alias agar nama kolom hasil sama dengan EXPORT_COLUMNS, bukan path field
+    aliases = {name: F(path) for name, path in columns.items() if name != path}
+    if include_geom:
+        aliases['geometry'] = geometry
+    return queryset.values(*[name for name, path in columns.items() if name == path], **aliases)
+
+
+class _Echo:
+    """Buffer semu untuk csv.writer: write mengembalikan baris, bukan menyimpannya"""
+
+    def write(self, value):
+        return value
+
+
+def _json(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def _rows(queryset):
+    return queryset.iterator(chunk_size=get_export_settings()['CHUNK_SIZE'])
+
+
+def stream_csv(layer, queryset, include_geom):
+    header = list(EXPORT_COLUMNS[layer]) + (['geometry'] if include_geom else [])
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in _rows(queryset):
+        yield writer.writerow(['' if row[name] is None else row[name] for name in header])
+
+
+def stream_ndjson(layer, queryset, include_geom):
+    for row in _rows(queryset):
+        if include_geom and row['geometry']:
+            row['geometry'] = json.loads(row['geometry'])
+        yield _json(row) + '\n'
+
+
+def stream_geojson(layer, queryset, include_geom):
+    yield '{"type":"FeatureCollection","features":['
+    separator = ''
+    for row in _rows(queryset):
+        # Teks GeoJSON dari PostGIS disisipkan apa adanya tanpa parse ulang
+        geometry = row.pop('geometry', None) or 'null'
+        yield f'{separator}{{"type":"Feature","geometry":{geometry},"properties":{_json(row)}}}'
+        separator = ','
+    yield ']}'
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+    'geojson': stream_geojson,
+}
+
+
+def stream_export(layer, export_format, aoi_ids, start_date, end_date, include_geom):
+    """Iterator potongan teks ekspor. GeoJSON selalu memuat geometry"""
+    include_geom = include_geom or export_format == 'geojson'
+    queryset = export_queryset(layer, aoi_ids, start_date, end_date, include_geom)
+    return STREAMERS[export_format](layer, queryset, include_geom)
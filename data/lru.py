@@ -0,0 +1,60 @@
+# data/lru.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLLRUCache:
+    """Cache in-memory thread-safe dengan batas jumlah entry (LRU) dan TTL.
+
+    `lock` (reentrant) juga dipegang saat on_evict dipanggil, sehingga pemakai bisa menjaga
+    struktur data tambahan (mis. index) dengan lock yang sama.
+    """
+
+    def __init__(self, max_entries=1024, timeout=300, on_evict=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.on_evict = on_evict
+        self._data = OrderedDict()
+        self.lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                self._pop(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self.lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                oldest = next(iter(self._data))
+                self._pop(oldest)
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            keys = list(self._data)
+            for key in keys:
+                self._pop(key)
+
+    def __len__(self):
+        with self.lock:
+            return len(self._data)
+
+    def _pop(self, key):
+        # Dipanggil saat lock sudah dipegang
+        if self._data.pop(key, None) is not None and self.on_evict:
+            self.on_evict(key)
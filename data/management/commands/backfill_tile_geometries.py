@@ -0,0 +1,59 @@
+# data/management/commands/backfill_tile_geometries.py
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from data.models import AreaOfInterest
+from data.tiles import refresh_generalized_geometries, DEFORESTATION_SIMPLIFY_TOLERANCE
+
+
+# (tabel, kolom primary key, kolom sumber, kolom target, ekspresi SQL nilai target)
+TILE_GEOMETRY_COLUMNS = (
+    ('data_areaofinterest', 'id', 'geometry', 'geometry_3857', "ST_Transform(geometry, 3857)"),
+    ('data_hotspots', 'id', 'geom', 'geom_3857', "ST_Transform(geom::geometry, 3857)"),
+    ('data_deforestationalerts', 'id', 'geom', 'geom_3857', "ST_Transform(geom::geometry, 3857)"),
+    # Diisi setelah geom_3857 sehingga bisa dihitung dari kolom tersebut
+    ('data_deforestationalerts', 'id', 'geom_3857', 'geom_3857_simplified',
+     f"ST_SimplifyPreserveTopology(geom_3857, {DEFORESTATION_SIMPLIFY_TOLERANCE})"),
+    ('data_deforestationalerts', 'id', 'geom_3857', 'centroid_3857', "ST_PointOnSurface(geom_3857)"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Isi kolom geometry EPSG:3857 (dipakai query tile) untuk baris yang belum terisi, "
+        "lalu hitung ulang geometry AOI yang disederhanakan per level zoom"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        for table, pk, source, target, expression in TILE_GEOMETRY_COLUMNS:
+            sql = f"""
+                UPDATE {table} SET {target} = {expression}
+                WHERE {pk} IN (
+                    SELECT {pk} FROM {table}
+                    WHERE {target} IS NULL AND {source} IS NOT NULL
+                    LIMIT %s
+                )
+            """
+            total = 0
+            while True:
+                # Batch kecil per transaksi agar lock baris tidak ditahan lama
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(sql, [batch_size])
+                    updated = cursor.rowcount
+                total += updated
+                if updated < batch_size:
+                    break
+            self.stdout.write(f"{table}.{target}: {total} rows backfilled")
+
+        aoi_ids = list(AreaOfInterest.objects.values_list('id', flat=True))
+        for i in range(0, len(aoi_ids), 100):
+            with transaction.atomic():
+                refresh_generalized_geometries(aoi_ids[i:i + 100])
+        self.stdout.write(f"Generalized geometries refreshed for {len(aoi_ids)} AOIs")
+
+        self.stdout.write(self.style.SUCCESS("Tile geometries backfilled"))
@@ -0,0 +1,449 @@
+# data/management/commands/benchmark_tiles.py
+import asyncio
+import json
+import math
+import queue
+import random
+import threading
+import time
+from datetime import date, time as dtime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.gis.geos import Point, Polygon
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Users
+from data.models import AreaOfInterest, Hotspots, HotspotAlert, DeforestationAlerts, HOTSPOT_ALERT_CATEGORIES
+from data.tile_cache import get_tile_cache, lonlat_to_tile
+from data.tiles import refresh_generalized_geometries, user_aoi_ids
+from data.views import (
+    UserAreaOfInterestTileView, UserHotspotAlertTileView, UserDeforestationTileView, UserCombinedTileView,
+)
+
+from .pregenerate_tiles import INDONESIA_BBOX
+
+# Semua data sintetis diberi prefix ini agar bisa dihapus dengan --cleanup
+BENCH_PREFIX = 'bench-'
+BENCH_EMAIL = 'tile-benchmark@example.invalid'
+
+# view -> (nama URL, view sync, segmen route jalur async)
+TILE_VIEWS = {
+    'aoi': ('user-aois-tile', UserAreaOfInterestTileView, 'user-aois'),
+    'hotspotalert': ('hotspotalert-tile', UserHotspotAlertTileView, 'hotspotalert'),
+    'deforestation': ('deforestation-tile', UserDeforestationTileView, 'deforestation'),
+    'combined': ('combined-tile', UserCombinedTileView, 'combined'),
+}
+
+
+def _random_polygon(rng, cx, cy, radius, vertices):
+    """Polygon sederhana (star-shaped) di sekitar (cx, cy), radius dalam derajat"""
+    angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(vertices))
+    ring = [
+        (cx + math.cos(a) * radius * rng.uniform(0.5, 1.0), cy + math.sin(a) * radius * rng.uniform(0.5, 1.0))
+        for a in angles
+    ]
+    ring.append(ring[0])
+    return Polygon(ring, srid=4326)
+
+
+def _percentile(values, pct):
+    """Percentile nearest-rank"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _stats(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return {}
+    return {
+        'p50': round(_percentile(values, 50), 3),
+        'p95': round(_percentile(values, 95), 3),
+        'p99': round(_percentile(values, 99), 3),
+        'max': round(max(values), 3),
+        'mean': round(sum(values) / len(values), 3),
+    }
+
+
+class _QueryTimer:
+    """execute_wrapper yang menjumlahkan waktu eksekusi SQL"""
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total += time.perf_counter() - started
+            self.count += 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark tile endpoint: seed data sintetis (opsional), replay trace pan/zoom z/x/y ke tile view, "
+        "lalu laporkan latency p50/p95/p99, ukuran tile dan waktu SQL per zoom sebagai JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Buat data sintetis sebelum benchmark')
+        parser.add_argument('--cleanup', action='store_true', help='Hapus data sintetis lalu keluar')
+        parser.add_argument('--aois', type=int, default=50)
+        parser.add_argument('--hotspots', type=int, default=20000)
+        parser.add_argument('--deforestation', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=90, help='Rentang tanggal alert sintetis')
+        parser.add_argument('--user', default=BENCH_EMAIL, help='Email user yang AOI-nya dipakai (default user sintetis)')
+        parser.add_argument('--view', action='append', choices=TILE_VIEWS, help='Tile view yang dibenchmark (default semua)')
+        parser.add_argument('--traces', type=int, default=20)
+        parser.add_argument('--steps', type=int, default=15, help='Jumlah langkah pan/zoom per trace')
+        parser.add_argument('--viewport', nargs=2, type=int, default=(4, 3), metavar=('COLS', 'ROWS'))
+        parser.add_argument('--min-zoom', type=int, default=5)
+        parser.add_argument('--max-zoom', type=int, default=14)
+        parser.add_argument('--passes', type=int, default=2,
+                            help='Jumlah replay; pass pertama dingin kecuali --keep-cache')
+        parser.add_argument('--keep-cache', action='store_true', help='Jangan kosongkan tile cache sebelum replay')
+        parser.add_argument('--accept-encoding', default='gzip')
+        parser.add_argument('--random-seed', type=int, default=42)
+        parser.add_argument('--mode', choices=('sync', 'async', 'both'), default='sync',
+                            help='Replay ke view Django (sync), jalur ASGI data/async_tiles.py (async) atau keduanya')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Request bersamaan: thread untuk sync, coroutine untuk async')
+        parser.add_argument('--output', help='Tulis hasil JSON ke file (default stdout)')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self._cleanup()
+            return
+
+        rng = random.Random(options['random_seed'])
+        if options['seed']:
+            self._seed(rng, options)
+
+        try:
+            user = Users.objects.get(email=options['user'])
+        except Users.DoesNotExist:
+            raise CommandError(f"User {options['user']} not found (use --seed to create synthetic data)")
+        aoi_ids = user_aoi_ids(user)
+        if not aoi_ids:
+            raise CommandError(f"User {options['user']} has no areas of interest")
+        token, _created = Token.objects.get_or_create(user=user)
+
+        traces = self._build_traces(rng, aoi_ids, options)
+        views = options['view'] or list(TILE_VIEWS)
+        result = {
+            'generated_at': timezone.now().isoformat(),
+            'params': {
+                key: options[key] for key in (
+                    'user', 'traces', 'steps', 'viewport', 'min_zoom', 'max_zoom',
+                    'passes', 'keep_cache', 'accept_encoding', 'random_seed', 'mode', 'concurrency',
+                )
+            },
+            'settings': {
+                'TILE_CACHE': (getattr(settings, 'TILE_CACHE', None) or {}).get('BACKEND'),
+                'TILE_COMPRESSION': getattr(settings, 'TILE_COMPRESSION', None),
+            },
+            'aoi_count': len(aoi_ids),
+            'tile_requests_per_pass': sum(len(trace) for trace in traces),
+            'passes': [],
+        }
+
+        cache = get_tile_cache()
+        for pass_no in range(options['passes']):
+            cold = pass_no == 0 and not options['keep_cache']
+            started = time.perf_counter()
+            samples = {}
+            for view in views:
+                for mode in ('sync', 'async'):
+                    if options['mode'] not in (mode, 'both'):
+                        continue
+                    # Pass dingin: setiap replay mulai dari cache kosong agar sync dan async sebanding
+                    if cold and cache is not None:
+                        cache.clear()
+                    if mode == 'sync':
+                        samples[view] = self._replay(view, traces, token.key, options)
+                    else:
+                        samples[f"async:{view}"] = asyncio.run(self._replay_async(view, traces, token.key, options))
+            result['passes'].append({
+                'pass': pass_no + 1,
+                'cold': cold,
+                'wall_s': round(time.perf_counter() - started, 3),
+                'views': {view: self._summarize(*view_samples) for view, view_samples in samples.items()},
+            })
+
+        output = json.dumps(result, indent=2, sort_keys=True, default=str)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self._print_summary(result)
+        else:
+            self.stdout.write(output)
+
+    # Seed data
+
+    @transaction.atomic
+    def _seed(self, rng, options):
+        minx, miny, maxx, maxy = INDONESIA_BBOX
+        today = date.today()
+        categories = [value for value, _label in HOTSPOT_ALERT_CATEGORIES]
+
+        aois, centers = [], []
+        for i in range(options['aois']):
+            cx, cy = rng.uniform(minx + 1, maxx - 1), rng.uniform(miny + 1, maxy - 1)
+            radius = rng.uniform(0.05, 0.5)
+            aois.append(AreaOfInterest(
+                name=f"{BENCH_PREFIX}aoi-{i}",
+                geometry=_random_polygon(rng, cx, cy, radius, rng.randint(12, 96)),
+            ))
+            centers.append((cx, cy, radius))
+        AreaOfInterest.objects.bulk_create(aois, batch_size=500)
+        # bulk_create tidak memicu signal, generalisasi dihitung langsung
+        refresh_generalized_geometries([str(aoi.id) for aoi in aois])
+
+        hotspots, alerts = [], []
+        for i in range(options['hotspots']):
+            index = rng.randrange(len(aois))
+            cx, cy, radius = centers[index]
+            lon = cx + rng.uniform(-1.5, 1.5) * radius
+            lat = cy + rng.uniform(-1.5, 1.5) * radius
+            alert_date = today - timedelta(days=rng.randint(0, options['days']))
+            conf = rng.randint(0, 100)
+            hotspots.append(Hotspots(
+                id=f"{BENCH_PREFIX}{i}", key=f"{BENCH_PREFIX}{i}", source=rng.choice(['LAPAN', 'SIPONGI']),
+                radius=375.0, long=lon, lat=lat, provinsi='BENCH', kabupaten='BENCH', kecamatan='BENCH',
+                date=alert_date, times=dtime(rng.randint(0, 23), rng.randint(0, 59)), conf=conf,
+                sat=rng.choice(['NOAA20', 'SNPP', 'TERRA', 'AQUA']), geom=Point(lon, lat, srid=4326),
+            ))
+            alerts.append(HotspotAlert(
+                hotspot_id=f"{BENCH_PREFIX}{i}", area_of_interest=aois[index],
+                distance=rng.uniform(0, 5000), category=rng.choice(categories),
+                alert_date=alert_date, confidence=conf,
+            ))
+        Hotspots.objects.bulk_create(hotspots, batch_size=2000)
+        HotspotAlert.objects.bulk_create(alerts, batch_size=2000)
+
+        deforestation = []
+        for i in range(options['deforestation']):
+            index = rng.randrange(len(aois))
+            cx, cy, radius = centers[index]
+            deforestation.append(DeforestationAlerts(
+                id=f"{BENCH_PREFIX}{i}", company=aois[index], event_id=f"{BENCH_PREFIX}event-{i}",
+                alert_date=today - timedelta(days=rng.randint(0, options['days'])),
+                confidence=rng.randint(0, 100), area=Decimal(f"{rng.uniform(0.1, 50):.4f}"),
+                geom=_random_polygon(
+                    rng, cx + rng.uniform(-1, 1) * radius, cy + rng.uniform(-1, 1) * radius,
+                    rng.uniform(0.002, 0.02), rng.randint(6, 24),
+                ),
+            ))
+        DeforestationAlerts.objects.bulk_create(deforestation, batch_size=2000)
+
+        user, created = Users.objects.get_or_create(email=BENCH_EMAIL, defaults={'name': 'Tile benchmark'})
+        if created:
+            user.set_unusable_password()
+            user.save()
+        user.areas_of_interest.add(*aois)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(aois)} AOI, {len(hotspots)} hotspot alerts, {len(deforestation)} deforestation alerts"
+        ))
+
+    def _cleanup(self):
+        with transaction.atomic():
+            Users.objects.filter(email=BENCH_EMAIL).delete()
+            deleted_aois, _ = AreaOfInterest.objects.filter(name__startswith=BENCH_PREFIX).delete()
+            deleted_hotspots, _ = Hotspots.objects.filter(id__startswith=BENCH_PREFIX).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted synthetic benchmark data ({deleted_aois} AOI rows, {deleted_hotspots} hotspot rows incl. cascades)"
+        ))
+
+    # Trace
+
+    def _build_traces(self, rng, aoi_ids, options):
+        """Trace pan/zoom: mulai di zoom minimum pada sebuah AOI, lalu zoom in/out dan geser viewport.
+        Tile yang sudah diminta dalam trace yang sama tidak diminta lagi (dianggap ada di cache browser)."""
+        centers = [
+            (geom.centroid.x, geom.centroid.y)
+            for geom in AreaOfInterest.objects.filter(id__in=aoi_ids).values_list('geometry', flat=True)
+            if geom is not None and not geom.empty
+        ]
+        cols, rows = options['viewport']
+        min_zoom, max_zoom = options['min_zoom'], options['max_zoom']
+
+        traces = []
+        for _ in range(options['traces']):
+            lon, lat = rng.choice(centers)
+            z = min_zoom
+            cx, cy = lonlat_to_tile(lon, lat, z)
+            seen, trace = set(), []
+            for _step in range(options['steps']):
+                n = 2 ** z
+                for dx in range(-(cols // 2), cols - cols // 2):
+                    for dy in range(-(rows // 2), rows - rows // 2):
+                        tile = (z, (cx + dx) % n, min(max(cy + dy, 0), n - 1))
+                        if tile not in seen:
+                            seen.add(tile)
+                            trace.append(tile)
+
+                action = rng.random()
+                if action < 0.45 and z < max_zoom:
+                    z, cx, cy = z + 1, cx * 2 + rng.randint(0, 1), cy * 2 + rng.randint(0, 1)
+                elif action < 0.6 and z > min_zoom:
+                    z, cx, cy = z - 1, cx // 2, cy // 2
+                else:
+                    cx, cy = cx + rng.randint(-1, 1), cy + rng.randint(-1, 1)
+            traces.append(trace)
+        return traces
+
+    # Replay
+
+    def _replay(self, view_name, traces, token_key, options):
+        """Replay trace ke view Django. Dengan --concurrency > 1 request dibagi ke beberapa thread,
+        masing-masing dengan koneksi database sendiri. Hasil (samples, wall detik)"""
+        url_name, view_class, _route = TILE_VIEWS[view_name]
+        view = view_class.as_view()
+        factory = RequestFactory()
+        pending = queue.Queue()
+        for trace in traces:
+            for tile in trace:
+                pending.put(tile)
+        samples = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        z, x, y = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    request = factory.get(
+                        reverse(url_name, kwargs={'z': z, 'x': x, 'y': y}),
+                        {'token': token_key},
+                        HTTP_ACCEPT_ENCODING=options['accept_encoding'],
+                    )
+                    timer = _QueryTimer()
+                    with connection.execute_wrapper(timer):
+                        started = time.perf_counter()
+                        response = view(request, z=z, x=x, y=y)
+                        elapsed = time.perf_counter() - started
+                    with lock:
+                        samples.append({
+                            'z': z,
+                            'status': response.status_code,
+                            'ms': elapsed * 1000,
+                            'sql_ms': timer.total * 1000,
+                            'queries': timer.count,
+                            'bytes': len(response.content) if response.status_code == 200 else 0,
+                        })
+            finally:
+                if threading.current_thread() is not threading.main_thread():
+                    connection.close()
+
+        started = time.perf_counter()
+        if options['concurrency'] <= 1:
+            worker()
+        else:
+            threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return samples, time.perf_counter() - started
+
+    async def _replay_async(self, view_name, traces, token_key, options):
+        """Replay trace langsung ke aplikasi ASGI tile async. Waktu SQL tidak diukur per request"""
+        from data.async_tiles import close_pool, get_async_tile_settings, tile_application
+
+        prefix = get_async_tile_settings()['PREFIX'] or '/'
+        route = TILE_VIEWS[view_name][2]
+        semaphore = asyncio.Semaphore(max(options['concurrency'], 1))
+        query_string = f"token={token_key}".encode('latin-1')
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def request(z, x, y):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            scope = {
+                'type': 'http', 'method': 'GET', 'path': f"{prefix}{route}/{z}/{x}/{y}/",
+                'query_string': query_string,
+                'headers': [(b'accept-encoding', options['accept_encoding'].encode('latin-1'))],
+            }
+            async with semaphore:
+                started = time.perf_counter()
+                await tile_application(scope, receive, send)
+                elapsed = time.perf_counter() - started
+            status = messages[0]['status']
+            return {
+                'z': z,
+                'status': status,
+                'ms': elapsed * 1000,
+                'sql_ms': None,
+                'queries': None,
+                'bytes': len(messages[1]['body']) if status == 200 else 0,
+            }
+
+        started = time.perf_counter()
+        try:
+            samples = await asyncio.gather(*(request(z, x, y) for trace in traces for z, x, y in trace))
+        finally:
+            # Pool terikat ke event loop asyncio.run ini
+            await close_pool()
+        return list(samples), time.perf_counter() - started
+
+    def _summarize(self, samples, wall):
+        by_zoom = {}
+        for sample in samples:
+            by_zoom.setdefault(sample['z'], []).append(sample)
+
+        def summary(group):
+            status = {}
+            for sample in group:
+                status[str(sample['status'])] = status.get(str(sample['status']), 0) + 1
+            sizes = [sample['bytes'] for sample in group]
+            return {
+                'requests': len(group),
+                'status': status,
+                'latency_ms': _stats([sample['ms'] for sample in group]),
+                'sql_ms': _stats([sample['sql_ms'] for sample in group]),
+                'queries_mean': (
+                    round(sum(sample['queries'] for sample in group) / len(group), 2)
+                    if group[0]['queries'] is not None else None
+                ),
+                'bytes': {'total': sum(sizes), 'mean': round(sum(sizes) / len(sizes), 1), 'max': max(sizes)},
+            }
+
+        return {
+            'wall_s': round(wall, 3),
+            'requests_per_s': round(len(samples) / wall, 1) if wall else None,
+            'all': summary(samples) if samples else {},
+            'zoom': {str(z): summary(group) for z, group in sorted(by_zoom.items())},
+        }
+
+    def _print_summary(self, result):
+        for pass_result in result['passes']:
+            label = 'cold' if pass_result['cold'] else 'warm'
+            self.stdout.write(f"Pass {pass_result['pass']} ({label}), {pass_result['wall_s']}s")
+            for view, summary in pass_result['views'].items():
+                overall = summary['all']
+                if not overall:
+                    continue
+                self.stdout.write(
+                    f"  {view:20} n={overall['requests']:5} "
+                    f"p50={overall['latency_ms']['p50']:8.2f}ms p95={overall['latency_ms']['p95']:8.2f}ms "
+                    f"p99={overall['latency_ms']['p99']:8.2f}ms rps={summary['requests_per_s']} "
+                    f"bytes_mean={overall['bytes']['mean']}"
+                )
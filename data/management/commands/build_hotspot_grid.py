@@ -0,0 +1,71 @@
+# data/management/commands/build_hotspot_grid.py
+from datetime import timedelta
+
+from dateutil.parser import parse as dateparse
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+
+from data.density import (
+    GRID_SHAPES, build_hotspot_grid, get_hotspot_grid_settings, last_closed_day, stale_grid_days,
+)
+from data.models import HotspotAlert
+
+
+class Command(BaseCommand):
+    help = (
+        "Hitung grid kepadatan hotspot harian (HotspotGridDaily) untuk resolusi di "
+        "settings.HOTSPOT_GRID['PRECOMPUTED']. Jalankan berkala setelah ingest; default 7 hari terakhir "
+        "yang sudah tutup (LAG_DAYS), ditambah hari lama yang berubah setelah dibangun (versi "
+        "TileDayVersion berbeda), mis. karena alert datang terlambat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Tanggal alert awal (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Tanggal alert akhir (YYYY-MM-DD), default hari terakhir yang sudah tutup')
+        parser.add_argument('--all', action='store_true', help='Bangun ulang seluruh riwayat alert')
+        parser.add_argument('--shape', choices=GRID_SHAPES, help='Hanya resolusi dengan bentuk ini')
+        parser.add_argument('--size', type=int, help='Hanya resolusi dengan ukuran sel ini (meter)')
+        parser.add_argument('--skip-stale', action='store_true',
+                            help='Jangan bangun ulang hari lama yang berubah setelah dibangun')
+        parser.add_argument('--days-per-batch', type=int, default=31,
+                            help='Jumlah hari per transaksi agar lock tidak ditahan lama')
+
+    def handle(self, *args, **options):
+        resolutions = sorted(get_hotspot_grid_settings()['PRECOMPUTED'])
+        if options['shape']:
+            resolutions = [r for r in resolutions if r[0] == options['shape']]
+        if options['size']:
+            resolutions = [r for r in resolutions if r[1] == options['size']]
+        if not resolutions:
+            raise CommandError("No precomputed resolutions selected (settings.HOTSPOT_GRID['PRECOMPUTED'])")
+
+        try:
+            end_date = dateparse(options['end']).date() if options['end'] else last_closed_day()
+            if options['all']:
+                start_date = HotspotAlert.objects.aggregate(first=Min('alert_date'))['first'] or end_date
+            elif options['start']:
+                start_date = dateparse(options['start']).date()
+            else:
+                start_date = end_date - timedelta(days=7)
+        except (ValueError, OverflowError):
+            raise CommandError("Invalid date, use YYYY-MM-DD")
+
+        step = timedelta(days=max(1, options['days_per_batch']))
+        for shape, size in resolutions:
+            total = 0
+            batch_start = start_date
+            while batch_start <= end_date:
+                batch_end = min(batch_start + step - timedelta(days=1), end_date)
+                total += build_hotspot_grid(shape, size, batch_start, batch_end)
+                batch_start = batch_end + timedelta(days=1)
+            self.stdout.write(f"{shape}/{size}: {total} grid rows for {start_date} - {end_date}")
+
+            if not options['skip_stale']:
+                first = HotspotAlert.objects.aggregate(first=Min('alert_date'))['first']
+                stale = stale_grid_days(shape, size, first, end_date) if first else []
+                for day in stale:
+                    build_hotspot_grid(shape, size, day, day)
+                if stale:
+                    self.stdout.write(f"{shape}/{size}: rebuilt {len(stale)} days with late alerts")
+
+        self.stdout.write(self.style.SUCCESS("Hotspot density grid built"))
@@ -0,0 +1,69 @@
+# data/management/commands/invalidate_tile_cache.py
+from dateutil.parser import parse as dateparse
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from data.tile_cache import get_tile_cache, TILE_LAYERS
+from data.tiles import bump_tile_region_versions
+
+BUMP_HOTSPOT_ALERT_REGIONS_SQL = """
+    SELECT data_bump_tile_region_version('hotspotalert', array_agg(alerts.area_of_interest_id), array_agg(h.geom_3857))
+    FROM data_hotspotalert alerts JOIN data_hotspots h ON alerts.hotspot_id = h.id
+    WHERE alerts.id > %s
+"""
+
+BUMP_DEFORESTATION_REGIONS_SQL = """
+    SELECT data_bump_tile_region_version('deforestation', array_agg(company_id), array_agg(geom_3857))
+    FROM data_deforestationalerts
+    WHERE updated >= %s
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Invalidasi tile MVT di sekitar bbox/alert dengan menaikkan versi region (TileRegionVersion), "
+        "sehingga tile tersebut dirender ulang di semua cache dan arsip pre-render. Trigger database sudah "
+        "melakukannya untuk ingest biasa; perintah ini untuk memaksa render ulang. --all menghapus seluruh cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Hapus seluruh tile cache')
+        parser.add_argument('--bbox', nargs=4, type=float, metavar=('MINX', 'MINY', 'MAXX', 'MAXY'),
+                            help='Invalidasi tile yang menutupi bbox (EPSG:4326)')
+        parser.add_argument('--layer', action='append', choices=TILE_LAYERS,
+                            help='Layer yang diinvalidasi untuk --bbox (default semua layer)')
+        parser.add_argument('--hotspot-alert-since-id', type=int,
+                            help='Invalidasi tile untuk HotspotAlert dengan id lebih besar dari nilai ini')
+        parser.add_argument('--deforestation-since',
+                            help='Invalidasi tile untuk DeforestationAlerts yang diubah sejak tanggal ini (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            cache = get_tile_cache()
+            if cache is None:
+                raise CommandError("Tile cache is disabled (settings.TILE_CACHE['BACKEND'] is empty)")
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS("Tile cache cleared"))
+            return
+
+        regions = 0
+        if options['bbox']:
+            regions += bump_tile_region_versions(tuple(options['bbox']), options['layer'] or TILE_LAYERS)
+
+        since_id = options['hotspot_alert_since_id']
+        if since_id is not None:
+            with connection.cursor() as cursor:
+                cursor.execute(BUMP_HOTSPOT_ALERT_REGIONS_SQL, [since_id])
+                regions += cursor.fetchone()[0] or 0
+
+        since_date = options['deforestation_since']
+        if since_date:
+            try:
+                since_date = dateparse(since_date).date()
+            except (ValueError, OverflowError):
+                raise CommandError("Invalid --deforestation-since format. Use YYYY-MM-DD")
+            with connection.cursor() as cursor:
+                cursor.execute(BUMP_DEFORESTATION_REGIONS_SQL, [since_date])
+                regions += cursor.fetchone()[0] or 0
+
+        self.stdout.write(self.style.SUCCESS(f"Invalidated {regions} tile regions"))
@@ -0,0 +1,139 @@
+# data/management/commands/pregenerate_tiles.py
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from accounts.models import Users
+from data.tile_archive import TileArchiveWriter, archive_path, get_archive_settings
+from data.tile_cache import tiles_for_bbox, tile_variant, TILE_LAYERS
+from data.tiles import render_tile, tile_versions, user_aoi_ids
+
+# Perkiraan bbox Indonesia (minx, miny, maxx, maxy)
+INDONESIA_BBOX = (94.0, -11.5, 141.5, 6.5)
+
+EXTENT_SQL = """
+    SELECT 'aoi', ST_XMin(b), ST_YMin(b), ST_XMax(b), ST_YMax(b) FROM (
+        SELECT ST_Extent(geometry) AS b
+        FROM data_areaofinterest WHERE id = ANY(%s::uuid[]) GROUP BY id
+    ) e
+    UNION ALL
+    SELECT 'hotspotalert', ST_XMin(b), ST_YMin(b), ST_XMax(b), ST_YMax(b) FROM (
+        SELECT ST_Extent(h.geom::geometry) AS b
+        FROM data_hotspotalert alerts JOIN data_hotspots h ON alerts.hotspot_id = h.id
+        WHERE alerts.area_of_interest_id = ANY(%s::uuid[]) GROUP BY alerts.area_of_interest_id
+    ) e
+    UNION ALL
+    SELECT 'deforestation', ST_XMin(b), ST_YMin(b), ST_XMax(b), ST_YMax(b) FROM (
+        SELECT ST_Extent(geom::geometry) AS b
+        FROM data_deforestationalerts WHERE company_id = ANY(%s::uuid[]) GROUP BY company_id
+    ) e
+"""
+
+
+def _clip_bbox(bbox, bounds):
+    minx, miny = max(bbox[0], bounds[0]), max(bbox[1], bounds[1])
+    maxx, maxy = min(bbox[2], bounds[2]), min(bbox[3], bounds[3])
+    if minx > maxx or miny > maxy:
+        return None
+    return minx, miny, maxx, maxy
+
+
+def _render_chunk(args):
+    """Dijalankan di worker process, masing-masing dengan koneksi database sendiri"""
+    aoi_ids, tiles = args
+    rows = []
+    for layer, z, x, y in tiles:
+        # Versi dibaca sebelum render: ingest selama render membuat tile ini langsung dianggap usang
+        version = tile_versions([layer], z, x, y, aoi_ids)[layer]
+        rows.append((layer, z, x, y, render_tile(layer, z, x, y, aoi_ids), version))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render tile AOI, hotspot alert dan deforestation ke arsip MBTiles per scope AOI "
+        "(settings.TILE_ARCHIVE['LOCATION']) memakai process pool"
+    )
+
+    def add_arguments(self, parser):
+        archive = get_archive_settings()
+        parser.add_argument('--user', action='append', help='Email user (default semua user yang punya AOI)')
+        parser.add_argument('--min-zoom', type=int, default=archive['MIN_ZOOM'])
+        parser.add_argument('--max-zoom', type=int, default=archive['MAX_ZOOM'])
+        parser.add_argument('--bbox', nargs=4, type=float, default=INDONESIA_BBOX,
+                            metavar=('MINX', 'MINY', 'MAXX', 'MAXY'))
+        parser.add_argument('--layer', action='append', choices=TILE_LAYERS)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=64)
+
+    def handle(self, *args, **options):
+        if not get_archive_settings()['LOCATION']:
+            raise CommandError("settings.TILE_ARCHIVE['LOCATION'] is not set")
+
+        users = Users.objects.filter(is_active=True, areas_of_interest__isnull=False).distinct()
+        if options['user']:
+            users = users.filter(email__in=options['user'])
+
+        # User dengan himpunan AOI yang sama memakai arsip yang sama
+        scopes = {}
+        for user in users:
+            aoi_ids = user_aoi_ids(user)
+            scopes.setdefault(tile_variant(aoi_ids), aoi_ids)
+
+        layers = options['layer'] or TILE_LAYERS
+        for scope, aoi_ids in scopes.items():
+            self._generate_scope(scope, aoi_ids, layers, options)
+
+    def _candidate_tiles(self, aoi_ids, layers, options):
+        with connection.cursor() as cursor:
+            cursor.execute(EXTENT_SQL, [aoi_ids, aoi_ids, aoi_ids])
+            extents = cursor.fetchall()
+
+        tiles = set()
+        for layer, minx, miny, maxx, maxy in extents:
+            if layer not in layers:
+                continue
+            bbox = _clip_bbox((minx, miny, maxx, maxy), options['bbox'])
+            if bbox is None:
+                continue
+            for z, x, y in tiles_for_bbox(bbox, options['min_zoom'], options['max_zoom']):
+                tiles.add((layer, z, x, y))
+        return sorted(tiles)
+
+    def _generate_scope(self, scope, aoi_ids, layers, options):
+        started = time.monotonic()
+        tiles = self._candidate_tiles(aoi_ids, layers, options)
+        chunk_size = options['chunk_size']
+        jobs = [(aoi_ids, tiles[i:i + chunk_size]) for i in range(0, len(tiles), chunk_size)]
+
+        writer = TileArchiveWriter(archive_path(scope))
+        writer.set_metadata(
+            name=scope,
+            format='pbf',
+            type='overlay',
+            minzoom=options['min_zoom'],
+            maxzoom=options['max_zoom'],
+            bounds=','.join(str(v) for v in options['bbox']),
+            layers=','.join(layers),
+            aoi_ids=','.join(aoi_ids),
+            generated_at=timezone.now().isoformat(),
+        )
+
+        # Koneksi parent ditutup dulu agar tidak ikut terwarisi oleh worker hasil fork
+        connections.close_all()
+        written = 0
+        with ProcessPoolExecutor(max_workers=options['workers'],
+                                 mp_context=multiprocessing.get_context('fork')) as pool:
+            for rows in pool.map(_render_chunk, jobs):
+                writer.write_tiles(rows)
+                written += len(rows)
+        writer.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Scope {scope} ({len(aoi_ids)} AOI): {written} tiles in {time.monotonic() - started:.1f}s"
+        ))
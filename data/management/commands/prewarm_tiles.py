@@ -0,0 +1,104 @@
+# data/management/commands/prewarm_tiles.py
+import json
+import os
+import time
+
+from dateutil.parser import parse as dateparse
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+
+from data.models import HotspotAlert, DeforestationAlerts
+from data.tile_cache import get_tile_cache, geometry_extent
+from data.tile_prewarm import get_prewarm_settings, prewarm_tiles
+
+
+class Command(BaseCommand):
+    help = (
+        "Render ulang ke tile cache hanya tile yang terdampak HotspotAlert/DeforestationAlerts baru. "
+        "Jalankan setelah ingest; tanpa opsi --*-since memakai watermark dari run sebelumnya."
+    )
+
+    def add_arguments(self, parser):
+        params = get_prewarm_settings()
+        parser.add_argument('--hotspot-alert-since-id', type=int,
+                            help='Prewarm untuk HotspotAlert dengan id lebih besar dari nilai ini')
+        parser.add_argument('--deforestation-since',
+                            help='Prewarm untuk DeforestationAlerts yang diubah sejak tanggal ini (YYYY-MM-DD)')
+        parser.add_argument('--min-zoom', type=int, default=params['MIN_ZOOM'])
+        parser.add_argument('--max-zoom', type=int, default=params['MAX_ZOOM'])
+        parser.add_argument('--workers', type=int, default=params['WORKERS'])
+        parser.add_argument('--no-watermark', action='store_true', help='Jangan baca/tulis file watermark')
+
+    def handle(self, *args, **options):
+        cache = get_tile_cache()
+        if cache is None:
+            raise CommandError("Tile cache is disabled (settings.TILE_CACHE['BACKEND'] is empty)")
+        if not cache.shared:
+            raise CommandError("Tile cache backend is per process, prewarming it from a command has no effect")
+
+        params = get_prewarm_settings()
+        watermark_file = None if options['no_watermark'] else params['WATERMARK_FILE']
+        watermark = self._read_watermark(watermark_file)
+
+        since_id = options['hotspot_alert_since_id']
+        since_date = options['deforestation_since']
+        if since_id is None and since_date is None:
+            if not watermark:
+                # Run pertama: hanya catat posisi sekarang, bukan prewarm seluruh histori
+                self._write_watermark(watermark_file)
+                self.stdout.write("No watermark yet, recorded current position; nothing to prewarm")
+                return
+            since_id = watermark.get('hotspot_alert_id')
+            since_date = watermark.get('deforestation_date')
+        if since_date:
+            try:
+                since_date = dateparse(since_date).date()
+            except (ValueError, OverflowError):
+                raise CommandError("Invalid --deforestation-since format. Use YYYY-MM-DD")
+
+        # Watermark diambil sebelum membaca perubahan agar alert yang masuk selama prewarm tidak terlewat
+        next_watermark = self._current_position()
+
+        changes = []
+        if since_id is not None:
+            rows = HotspotAlert.objects.filter(id__gt=since_id).values_list(
+                'area_of_interest_id', 'hotspot__long', 'hotspot__lat'
+            )
+            for aoi_id, lon, lat in rows.order_by().distinct().iterator():
+                if lon is not None and lat is not None:
+                    changes.append(('hotspotalert', aoi_id, (lon, lat, lon, lat)))
+        if since_date:
+            rows = DeforestationAlerts.objects.filter(updated__gte=since_date).values_list('company_id', 'geom')
+            for aoi_id, geom in rows.iterator():
+                changes.append(('deforestation', aoi_id, geometry_extent(geom)))
+
+        started = time.monotonic()
+        count = prewarm_tiles(changes, options['workers'], options['min_zoom'], options['max_zoom'])
+        self._write_watermark(watermark_file, next_watermark)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Prewarmed {count} tiles from {len(changes)} changed alerts in {time.monotonic() - started:.1f}s"
+        ))
+
+    def _current_position(self):
+        max_id = HotspotAlert.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        return {'hotspot_alert_id': max_id, 'deforestation_date': timezone.localdate().isoformat()}
+
+    def _read_watermark(self, path):
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Failed to read watermark {path}: {str(e)}")
+
+    def _write_watermark(self, path, position=None):
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(position or self._current_position(), f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from data.tile_cache import get_tile_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Buang file tile cache yang kedaluwarsa (termasuk varian versi data lama setelah ingest), "
+        "lalu file terlama sampai ukuran cache di bawah TILE_CACHE['MAX_SIZE_MB']. Jalankan berkala via cron."
+    )
+
+    def add_arguments(self, parser):
+        params = getattr(settings, 'TILE_CACHE', None) or {}
+        parser.add_argument('--max-age', type=int, default=int(params.get('TIMEOUT', 86400)),
+                            help='Hapus file yang lebih tua dari sekian detik (default TILE_CACHE TIMEOUT)')
+        parser.add_argument('--max-size-mb', type=int, default=int(params.get('MAX_SIZE_MB', 2048)),
+                            help='Batas total ukuran cache dalam MB, 0 = tanpa batas')
+
+    def handle(self, *args, **options):
+        cache = get_tile_cache()
+        if cache is None:
+            raise CommandError("Tile cache is disabled (settings.TILE_CACHE['BACKEND'] is empty)")
+        max_size = options['max_size_mb'] * 1024 * 1024 if options['max_size_mb'] else None
+        removed = cache.purge(max_age=options['max_age'] or None, max_size=max_size)
+        self.stdout.write(self.style.SUCCESS(f"Purged {removed} tile cache files"))
@@ -0,0 +1,34 @@
+# data/management/commands/rebuild_alert_rollup.py
+from datetime import date
+
+from dateutil.parser import parse as dateparse
+from django.core.management.base import BaseCommand, CommandError
+
+from data.analytics import ROLLUP_SOURCE_TABLES, rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Bangun ulang tabel AlertDailyRollup (dipakai endpoint analytics) dari tabel alert. "
+        "Normalnya tabel dijaga trigger database; jalankan setelah perbaikan data massal atau restore."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layer', choices=sorted(ROLLUP_SOURCE_TABLES),
+                            help='Hanya bangun ulang layer ini (default semua)')
+        parser.add_argument('--start', help='Tanggal alert awal (YYYY-MM-DD), default semua')
+        parser.add_argument('--end', help='Tanggal alert akhir (YYYY-MM-DD), default semua')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = dateparse(options['start']).date() if options['start'] else date.min
+            end_date = dateparse(options['end']).date() if options['end'] else date.max
+        except (ValueError, OverflowError):
+            raise CommandError("Invalid date, use YYYY-MM-DD")
+
+        layers = [options['layer']] if options['layer'] else sorted(ROLLUP_SOURCE_TABLES)
+        for layer in layers:
+            rows = rebuild_rollup(layer, start_date, end_date)
+            self.stdout.write(f"{layer}: {rows} rollup rows rebuilt")
+
+        self.stdout.write(self.style.SUCCESS("Alert rollup rebuilt"))
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.2 on 2026-10-17 09:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+# Kolom EPSG:3857 diisi oleh trigger supaya data yang di-ingest langsung ke
+# database (di luar ORM) juga ikut terisi. Backfill data lama dengan
+# `python manage.py backfill_tile_geometries`.
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION data_areaofinterest_set_geometry_3857() RETURNS trigger AS $$
+BEGIN
+    NEW.geometry_3857 := ST_Transform(NEW.geometry, 3857);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_areaofinterest_geometry_3857
+    BEFORE INSERT OR UPDATE OF geometry ON data_areaofinterest
+    FOR EACH ROW EXECUTE FUNCTION data_areaofinterest_set_geometry_3857();
+
+CREATE OR REPLACE FUNCTION data_hotspots_set_geom_3857() RETURNS trigger AS $$
+BEGIN
+    NEW.geom_3857 := ST_Transform(NEW.geom::geometry, 3857);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_hotspots_geom_3857
+    BEFORE INSERT OR UPDATE OF geom ON data_hotspots
+    FOR EACH ROW EXECUTE FUNCTION data_hotspots_set_geom_3857();
+
+CREATE OR REPLACE FUNCTION data_deforestationalerts_set_geom_3857() RETURNS trigger AS $$
+BEGIN
+    NEW.geom_3857 := ST_Transform(NEW.geom::geometry, 3857);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_deforestationalerts_geom_3857
+    BEFORE INSERT OR UPDATE OF geom ON data_deforestationalerts
+    FOR EACH ROW EXECUTE FUNCTION data_deforestationalerts_set_geom_3857();
+"""
+
+REVERSE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS data_areaofinterest_geometry_3857 ON data_areaofinterest;
+DROP FUNCTION IF EXISTS data_areaofinterest_set_geometry_3857();
+DROP TRIGGER IF EXISTS data_hotspots_geom_3857 ON data_hotspots;
+DROP FUNCTION IF EXISTS data_hotspots_set_geom_3857();
+DROP TRIGGER IF EXISTS data_deforestationalerts_geom_3857 ON data_deforestationalerts;
+DROP FUNCTION IF EXISTS data_deforestationalerts_set_geom_3857();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0012_alter_deforestationverification_alert_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='areaofinterest',
+            name='geometry_3857',
+            field=django.contrib.gis.db.models.fields.GeometryField(blank=True, editable=False, null=True, srid=3857),
+        ),
+        migrations.AddField(
+            model_name='hotspots',
+            name='geom_3857',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, editable=False, null=True, srid=3857),
+        ),
+        migrations.AddField(
+            model_name='deforestationalerts',
+            name='geom_3857',
+            field=django.contrib.gis.db.models.fields.PolygonField(blank=True, editable=False, null=True, srid=3857),
+        ),
+        migrations.RunSQL(TRIGGER_SQL, REVERSE_TRIGGER_SQL),
+    ]
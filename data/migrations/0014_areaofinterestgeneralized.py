@@ -0,0 +1,27 @@
+# Generated by Django 5.2.2 on 2026-10-17 10:00
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0013_tile_geometry_3857'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AreaOfInterestGeneralized',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField()),
+                ('geom', django.contrib.gis.db.models.fields.GeometryField(srid=3857)),
+                ('area_of_interest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generalized_geometries', to='data.areaofinterest')),
+            ],
+            options={
+                'unique_together': {('area_of_interest', 'level')},
+            },
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 5.2.2 on 2026-10-17 11:00
+
+from django.db import migrations, models
+
+
+# Trigger level statement dengan transition table: satu batch ingest hanya menaikkan
+# versi sekali per AOI yang terdampak.
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION data_bump_tile_data_version(p_layer text, p_aoi_ids uuid[]) RETURNS void AS $$
+    INSERT INTO data_tiledataversion (layer, area_of_interest_id, version)
+    SELECT p_layer, ids.aoi_id, 1
+    FROM (SELECT DISTINCT unnest(p_aoi_ids) AS aoi_id) ids
+    WHERE ids.aoi_id IS NOT NULL
+    ON CONFLICT (layer, area_of_interest_id)
+    DO UPDATE SET version = data_tiledataversion.version + 1;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION data_hotspotalert_bump_tile_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM data_bump_tile_data_version('hotspotalert', ARRAY(SELECT area_of_interest_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM data_bump_tile_data_version('hotspotalert', ARRAY(
+            SELECT area_of_interest_id FROM new_rows UNION SELECT area_of_interest_id FROM old_rows
+        ));
+    ELSE
+        PERFORM data_bump_tile_data_version('hotspotalert', ARRAY(SELECT area_of_interest_id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_hotspotalert_tile_version_insert
+    AFTER INSERT ON data_hotspotalert REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_bump_tile_version();
+CREATE TRIGGER data_hotspotalert_tile_version_update
+    AFTER UPDATE ON data_hotspotalert REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_bump_tile_version();
+CREATE TRIGGER data_hotspotalert_tile_version_delete
+    AFTER DELETE ON data_hotspotalert REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_bump_tile_version();
+
+CREATE OR REPLACE FUNCTION data_deforestationalerts_bump_tile_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM data_bump_tile_data_version('deforestation', ARRAY(SELECT company_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM data_bump_tile_data_version('deforestation', ARRAY(
+            SELECT company_id FROM new_rows UNION SELECT company_id FROM old_rows
+        ));
+    ELSE
+        PERFORM data_bump_tile_data_version('deforestation', ARRAY(SELECT company_id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_deforestationalerts_tile_version_insert
+    AFTER INSERT ON data_deforestationalerts REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_deforestationalerts_bump_tile_version();
+CREATE TRIGGER data_deforestationalerts_tile_version_update
+    AFTER UPDATE ON data_deforestationalerts REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_deforestationalerts_bump_tile_version();
+CREATE TRIGGER data_deforestationalerts_tile_version_delete
+    AFTER DELETE ON data_deforestationalerts REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_deforestationalerts_bump_tile_version();
+
+CREATE OR REPLACE FUNCTION data_areaofinterest_bump_tile_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM data_bump_tile_data_version('aoi', ARRAY(SELECT id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM data_bump_tile_data_version('aoi', ARRAY(SELECT id FROM new_rows UNION SELECT id FROM old_rows));
+    ELSE
+        PERFORM data_bump_tile_data_version('aoi', ARRAY(SELECT id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_areaofinterest_tile_version_insert
+    AFTER INSERT ON data_areaofinterest REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_areaofinterest_bump_tile_version();
+CREATE TRIGGER data_areaofinterest_tile_version_update
+    AFTER UPDATE ON data_areaofinterest REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_areaofinterest_bump_tile_version();
+CREATE TRIGGER data_areaofinterest_tile_version_delete
+    AFTER DELETE ON data_areaofinterest REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_areaofinterest_bump_tile_version();
+"""
+
+REVERSE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS data_hotspotalert_tile_version_insert ON data_hotspotalert;
+DROP TRIGGER IF EXISTS data_hotspotalert_tile_version_update ON data_hotspotalert;
+DROP TRIGGER IF EXISTS data_hotspotalert_tile_version_delete ON data_hotspotalert;
+DROP FUNCTION IF EXISTS data_hotspotalert_bump_tile_version();
+DROP TRIGGER IF EXISTS data_deforestationalerts_tile_version_insert ON data_deforestationalerts;
+DROP TRIGGER IF EXISTS data_deforestationalerts_tile_version_update ON data_deforestationalerts;
+DROP TRIGGER IF EXISTS data_deforestationalerts_tile_version_delete ON data_deforestationalerts;
+DROP FUNCTION IF EXISTS data_deforestationalerts_bump_tile_version();
+DROP TRIGGER IF EXISTS data_areaofinterest_tile_version_insert ON data_areaofinterest;
+DROP TRIGGER IF EXISTS data_areaofinterest_tile_version_update ON data_areaofinterest;
+DROP TRIGGER IF EXISTS data_areaofinterest_tile_version_delete ON data_areaofinterest;
+DROP FUNCTION IF EXISTS data_areaofinterest_bump_tile_version();
+DROP FUNCTION IF EXISTS data_bump_tile_data_version(text, uuid[]);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0014_areaofinterestgeneralized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TileDataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('layer', models.CharField(max_length=32)),
+                ('area_of_interest_id', models.UUIDField()),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('layer', 'area_of_interest_id')},
+            },
+        ),
+        migrations.RunSQL(TRIGGER_SQL, REVERSE_TRIGGER_SQL),
+    ]
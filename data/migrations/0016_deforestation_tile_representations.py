@@ -0,0 +1,48 @@
+# Generated by Django 5.2.2 on 2026-10-17 09:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+# Toleransi harus sama dengan data.tiles.DEFORESTATION_SIMPLIFY_TOLERANCE (meter).
+# Kolom lama diisi dengan `python manage.py backfill_tile_geometries`.
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION data_deforestationalerts_set_geom_3857() RETURNS trigger AS $$
+BEGIN
+    NEW.geom_3857 := ST_Transform(NEW.geom::geometry, 3857);
+    NEW.geom_3857_simplified := ST_SimplifyPreserveTopology(NEW.geom_3857, 5.0);
+    NEW.centroid_3857 := ST_PointOnSurface(NEW.geom_3857);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+REVERSE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION data_deforestationalerts_set_geom_3857() RETURNS trigger AS $$
+BEGIN
+    NEW.geom_3857 := ST_Transform(NEW.geom::geometry, 3857);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0015_tiledataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deforestationalerts',
+            name='geom_3857_simplified',
+            field=django.contrib.gis.db.models.fields.GeometryField(blank=True, editable=False, null=True, srid=3857),
+        ),
+        migrations.AddField(
+            model_name='deforestationalerts',
+            name='centroid_3857',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, editable=False, null=True, srid=3857),
+        ),
+        migrations.RunSQL(TRIGGER_SQL, REVERSE_TRIGGER_SQL),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.2 on 2026-10-17 13:00
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0016_deforestation_tile_representations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SharedTileScope',
+            fields=[
+                ('scope', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('aoi_ids', django.contrib.postgres.fields.ArrayField(base_field=models.UUIDField(), size=None)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
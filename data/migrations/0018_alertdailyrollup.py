@@ -0,0 +1,171 @@
+# Generated by Django 5.2.2 on 2026-10-17 14:00
+
+from django.db import migrations, models
+
+
+# Trigger level statement: setiap batch alert di-agregasi per (AOI, hari, bucket, sumber) lalu
+# di-upsert sebagai delta. Rentang confidence deforestation harus sama dengan
+# data.analytics.DEFORESTATION_CONFIDENCE_RANGES.
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION data_hotspotalert_rollup() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO data_alertdailyrollup
+            (layer, area_of_interest_id, day, bucket, source, count, area_sum, confidence_sum, confidence_count)
+        SELECT 'hotspotalert', a.area_of_interest_id, a.alert_date, a.category, COALESCE(h.source, ''),
+               COUNT(*), 0, COALESCE(SUM(a.confidence), 0), COUNT(a.confidence)
+        FROM new_rows a
+        LEFT JOIN data_hotspots h ON h.id = a.hotspot_id
+        GROUP BY 2, 3, 4, 5
+        ON CONFLICT (layer, area_of_interest_id, day, bucket, source) DO UPDATE SET
+            count = data_alertdailyrollup.count + EXCLUDED.count,
+            confidence_sum = data_alertdailyrollup.confidence_sum + EXCLUDED.confidence_sum,
+            confidence_count = data_alertdailyrollup.confidence_count + EXCLUDED.confidence_count;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO data_alertdailyrollup
+            (layer, area_of_interest_id, day, bucket, source, count, area_sum, confidence_sum, confidence_count)
+        SELECT 'hotspotalert', a.area_of_interest_id, a.alert_date, a.category, COALESCE(h.source, ''),
+               -COUNT(*), 0, -COALESCE(SUM(a.confidence), 0), -COUNT(a.confidence)
+        FROM old_rows a
+        LEFT JOIN data_hotspots h ON h.id = a.hotspot_id
+        GROUP BY 2, 3, 4, 5
+        ON CONFLICT (layer, area_of_interest_id, day, bucket, source) DO UPDATE SET
+            count = data_alertdailyrollup.count + EXCLUDED.count,
+            confidence_sum = data_alertdailyrollup.confidence_sum + EXCLUDED.confidence_sum,
+            confidence_count = data_alertdailyrollup.confidence_count + EXCLUDED.confidence_count;
+        DELETE FROM data_alertdailyrollup r
+        USING (SELECT DISTINCT area_of_interest_id, alert_date FROM old_rows) o
+        WHERE r.layer = 'hotspotalert' AND r.area_of_interest_id = o.area_of_interest_id
+          AND r.day = o.alert_date AND r.count <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_hotspotalert_rollup_insert
+    AFTER INSERT ON data_hotspotalert REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_rollup();
+CREATE TRIGGER data_hotspotalert_rollup_update
+    AFTER UPDATE ON data_hotspotalert REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_rollup();
+CREATE TRIGGER data_hotspotalert_rollup_delete
+    AFTER DELETE ON data_hotspotalert REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_rollup();
+
+CREATE OR REPLACE FUNCTION data_deforestation_confidence_bucket(p_confidence integer) RETURNS text AS $$
+    SELECT CASE
+        WHEN p_confidence BETWEEN 0 AND 2 THEN 'low'
+        WHEN p_confidence BETWEEN 3 AND 4 THEN 'medium'
+        WHEN p_confidence BETWEEN 5 AND 100 THEN 'high'
+        ELSE 'other'
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION data_deforestationalerts_rollup() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO data_alertdailyrollup
+            (layer, area_of_interest_id, day, bucket, source, count, area_sum, confidence_sum, confidence_count)
+        SELECT 'deforestation', a.company_id, a.alert_date, data_deforestation_confidence_bucket(a.confidence), '',
+               COUNT(*), COALESCE(SUM(a.area), 0), COALESCE(SUM(a.confidence), 0), COUNT(a.confidence)
+        FROM new_rows a
+        GROUP BY 2, 3, 4
+        ON CONFLICT (layer, area_of_interest_id, day, bucket, source) DO UPDATE SET
+            count = data_alertdailyrollup.count + EXCLUDED.count,
+            area_sum = data_alertdailyrollup.area_sum + EXCLUDED.area_sum,
+            confidence_sum = data_alertdailyrollup.confidence_sum + EXCLUDED.confidence_sum,
+            confidence_count = data_alertdailyrollup.confidence_count + EXCLUDED.confidence_count;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO data_alertdailyrollup
+            (layer, area_of_interest_id, day, bucket, source, count, area_sum, confidence_sum, confidence_count)
+        SELECT 'deforestation', a.company_id, a.alert_date, data_deforestation_confidence_bucket(a.confidence), '',
+               -COUNT(*), -COALESCE(SUM(a.area), 0), -COALESCE(SUM(a.confidence), 0), -COUNT(a.confidence)
+        FROM old_rows a
+        GROUP BY 2, 3, 4
+        ON CONFLICT (layer, area_of_interest_id, day, bucket, source) DO UPDATE SET
+            count = data_alertdailyrollup.count + EXCLUDED.count,
+            area_sum = data_alertdailyrollup.area_sum + EXCLUDED.area_sum,
+            confidence_sum = data_alertdailyrollup.confidence_sum + EXCLUDED.confidence_sum,
+            confidence_count = data_alertdailyrollup.confidence_count + EXCLUDED.confidence_count;
+        DELETE FROM data_alertdailyrollup r
+        USING (SELECT DISTINCT company_id, alert_date FROM old_rows) o
+        WHERE r.layer = 'deforestation' AND r.area_of_interest_id = o.company_id
+          AND r.day = o.alert_date AND r.count <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_deforestationalerts_rollup_insert
+    AFTER INSERT ON data_deforestationalerts REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_deforestationalerts_rollup();
+CREATE TRIGGER data_deforestationalerts_rollup_update
+    AFTER UPDATE ON data_deforestationalerts REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_deforestationalerts_rollup();
+CREATE TRIGGER data_deforestationalerts_rollup_delete
+    AFTER DELETE ON data_deforestationalerts REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_deforestationalerts_rollup();
+"""
+
+REVERSE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS data_hotspotalert_rollup_insert ON data_hotspotalert;
+DROP TRIGGER IF EXISTS data_hotspotalert_rollup_update ON data_hotspotalert;
+DROP TRIGGER IF EXISTS data_hotspotalert_rollup_delete ON data_hotspotalert;
+DROP FUNCTION IF EXISTS data_hotspotalert_rollup();
+DROP TRIGGER IF EXISTS data_deforestationalerts_rollup_insert ON data_deforestationalerts;
+DROP TRIGGER IF EXISTS data_deforestationalerts_rollup_update ON data_deforestationalerts;
+DROP TRIGGER IF EXISTS data_deforestationalerts_rollup_delete ON data_deforestationalerts;
+DROP FUNCTION IF EXISTS data_deforestationalerts_rollup();
+DROP FUNCTION IF EXISTS data_deforestation_confidence_bucket(integer);
+"""
+
+# Isi awal dari alert yang sudah ada; sama dengan `python manage.py rebuild_alert_rollup`
+POPULATE_SQL = """
+INSERT INTO data_alertdailyrollup
+    (layer, area_of_interest_id, day, bucket, source, count, area_sum, confidence_sum, confidence_count)
+SELECT 'hotspotalert', a.area_of_interest_id, a.alert_date, a.category, COALESCE(h.source, ''),
+       COUNT(*), 0, COALESCE(SUM(a.confidence), 0), COUNT(a.confidence)
+FROM data_hotspotalert a
+LEFT JOIN data_hotspots h ON h.id = a.hotspot_id
+GROUP BY 2, 3, 4, 5;
+
+INSERT INTO data_alertdailyrollup
+    (layer, area_of_interest_id, day, bucket, source, count, area_sum, confidence_sum, confidence_count)
+SELECT 'deforestation', a.company_id, a.alert_date, data_deforestation_confidence_bucket(a.confidence), '',
+       COUNT(*), COALESCE(SUM(a.area), 0), COALESCE(SUM(a.confidence), 0), COUNT(a.confidence)
+FROM data_deforestationalerts a
+GROUP BY 2, 3, 4;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0017_sharedtilescope'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('layer', models.CharField(max_length=32)),
+                ('area_of_interest_id', models.UUIDField()),
+                ('day', models.DateField()),
+                ('bucket', models.CharField(max_length=16)),
+                ('source', models.CharField(blank=True, default='', max_length=255)),
+                ('count', models.BigIntegerField(default=0)),
+                ('area_sum', models.DecimalField(decimal_places=4, default=0, max_digits=20)),
+                ('confidence_sum', models.BigIntegerField(default=0)),
+                ('confidence_count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['layer', 'day'], name='data_alertrollup_layer_day')],
+                'unique_together': {('layer', 'area_of_interest_id', 'day', 'bucket', 'source')},
+            },
+        ),
+        migrations.RunSQL(TRIGGER_SQL, REVERSE_TRIGGER_SQL),
+        migrations.RunSQL(POPULATE_SQL, migrations.RunSQL.noop),
+    ]
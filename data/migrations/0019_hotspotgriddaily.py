@@ -0,0 +1,31 @@
+# Generated by Django 5.2.2 on 2026-10-17 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0018_alertdailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotspotGridDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shape', models.CharField(max_length=8)),
+                ('size', models.IntegerField()),
+                ('i', models.IntegerField()),
+                ('j', models.IntegerField()),
+                ('area_of_interest_id', models.UUIDField()),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('max_confidence', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['shape', 'size', 'day'], name='data_hotspotgrid_res_day')],
+                'unique_together': {('shape', 'size', 'area_of_interest_id', 'day', 'i', 'j')},
+            },
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.2 on 2026-10-17 16:00
+
+from django.db import migrations, models
+
+
+# Setiap statement yang mengubah HotspotAlert menaikkan versi (AOI, tanggal alert) lama dan baru,
+# termasuk perubahan kolom yang tidak masuk rollup (distance, hotspot_id, ...). Perubahan lokasi
+# hotspot menaikkan versi hari semua alert yang memakainya, begitu juga TileDataVersion layer
+# hotspotalert yang sebelumnya tidak ikut berubah.
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION data_bump_tile_day_version(p_layer text, p_aoi_ids uuid[], p_days date[]) RETURNS void AS $$
+    INSERT INTO data_tiledayversion (layer, area_of_interest_id, day, version)
+    SELECT DISTINCT p_layer, pairs.aoi_id, pairs.day, 1
+    FROM unnest(p_aoi_ids, p_days) AS pairs (aoi_id, day)
+    WHERE pairs.aoi_id IS NOT NULL AND pairs.day IS NOT NULL
+    ON CONFLICT (layer, area_of_interest_id, day)
+    DO UPDATE SET version = data_tiledayversion.version + 1;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION data_hotspotalert_bump_tile_day_version() RETURNS trigger AS $$
+DECLARE
+    aoi_ids uuid[];
+    days date[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(area_of_interest_id), array_agg(alert_date) INTO aoi_ids, days FROM new_rows;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(area_of_interest_id), array_agg(alert_date) INTO aoi_ids, days FROM (
+            SELECT area_of_interest_id, alert_date FROM new_rows
+            UNION SELECT area_of_interest_id, alert_date FROM old_rows
+        ) changed;
+    ELSE
+        SELECT array_agg(area_of_interest_id), array_agg(alert_date) INTO aoi_ids, days FROM old_rows;
+    END IF;
+    PERFORM data_bump_tile_day_version('hotspotalert', aoi_ids, days);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_hotspotalert_tile_day_version_insert
+    AFTER INSERT ON data_hotspotalert REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_bump_tile_day_version();
+CREATE TRIGGER data_hotspotalert_tile_day_version_update
+    AFTER UPDATE ON data_hotspotalert REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_bump_tile_day_version();
+CREATE TRIGGER data_hotspotalert_tile_day_version_delete
+    AFTER DELETE ON data_hotspotalert REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_bump_tile_day_version();
+
+CREATE OR REPLACE FUNCTION data_hotspots_bump_tile_versions() RETURNS trigger AS $$
+DECLARE
+    aoi_ids uuid[];
+    days date[];
+BEGIN
+    SELECT array_agg(moved.area_of_interest_id), array_agg(moved.alert_date) INTO aoi_ids, days FROM (
+        SELECT DISTINCT a.area_of_interest_id, a.alert_date
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        JOIN data_hotspotalert a ON a.hotspot_id = n.id
+        WHERE n.geom_3857 IS DISTINCT FROM o.geom_3857
+    ) moved;
+    IF aoi_ids IS NOT NULL THEN
+        PERFORM data_bump_tile_day_version('hotspotalert', aoi_ids, days);
+        PERFORM data_bump_tile_data_version('hotspotalert', aoi_ids);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_hotspots_tile_versions_update
+    AFTER UPDATE ON data_hotspots REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspots_bump_tile_versions();
+"""
+
+REVERSE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS data_hotspots_tile_versions_update ON data_hotspots;
+DROP FUNCTION IF EXISTS data_hotspots_bump_tile_versions();
+DROP TRIGGER IF EXISTS data_hotspotalert_tile_day_version_insert ON data_hotspotalert;
+DROP TRIGGER IF EXISTS data_hotspotalert_tile_day_version_update ON data_hotspotalert;
+DROP TRIGGER IF EXISTS data_hotspotalert_tile_day_version_delete ON data_hotspotalert;
+DROP FUNCTION IF EXISTS data_hotspotalert_bump_tile_day_version();
+DROP FUNCTION IF EXISTS data_bump_tile_day_version(text, uuid[], date[]);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0019_hotspotgriddaily'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TileDayVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('layer', models.CharField(max_length=32)),
+                ('area_of_interest_id', models.UUIDField()),
+                ('day', models.DateField()),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('layer', 'area_of_interest_id', 'day')},
+            },
+        ),
+        migrations.RunSQL(TRIGGER_SQL, REVERSE_TRIGGER_SQL),
+    ]
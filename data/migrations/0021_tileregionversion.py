@@ -0,0 +1,169 @@
+# Generated by Django 5.2.2 on 2026-10-17 17:00
+
+from django.db import migrations, models
+
+
+# Versi data per layer, AOI dan region tile (tile XYZ zoom 8, harus sama dengan
+# data.tile_cache.TILE_REGION_ZOOM). Kunci cache tile memakai jumlah versi region di sekitar
+# tile, sehingga perubahan alert hanya membuat tile di sekitarnya basi, termasuk ingest di luar ORM.
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION data_tile_region_index(p_offset double precision) RETURNS integer AS $$
+    SELECT LEAST(GREATEST(floor(p_offset / (40075016.68557849 / 256))::integer, 0), 255);
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION data_tile_regions(p_geom geometry) RETURNS TABLE (x integer, y integer) AS $$
+    SELECT gx, gy
+    FROM generate_series(
+        data_tile_region_index(ST_XMin(p_geom) + 20037508.342789244),
+        data_tile_region_index(ST_XMax(p_geom) + 20037508.342789244)
+    ) gx,
+    generate_series(
+        data_tile_region_index(20037508.342789244 - ST_YMax(p_geom)),
+        data_tile_region_index(20037508.342789244 - ST_YMin(p_geom))
+    ) gy;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION data_bump_tile_region_version(p_layer text, p_aoi_ids uuid[], p_geoms geometry[])
+RETURNS integer AS $$
+DECLARE
+    bumped integer;
+BEGIN
+    INSERT INTO data_tileregionversion (layer, area_of_interest_id, x, y, version)
+    SELECT DISTINCT p_layer, changed.aoi_id, region.x, region.y, 1
+    FROM unnest(p_aoi_ids, p_geoms) AS changed (aoi_id, geom)
+    CROSS JOIN LATERAL data_tile_regions(changed.geom) region
+    WHERE changed.aoi_id IS NOT NULL
+    ON CONFLICT (layer, area_of_interest_id, x, y)
+    DO UPDATE SET version = data_tileregionversion.version + 1;
+    GET DIAGNOSTICS bumped = ROW_COUNT;
+    RETURN bumped;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION data_hotspotalert_bump_tile_region_version() RETURNS trigger AS $$
+DECLARE
+    aoi_ids uuid[];
+    geoms geometry[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(a.area_of_interest_id), array_agg(h.geom_3857) INTO aoi_ids, geoms
+        FROM new_rows a JOIN data_hotspots h ON h.id = a.hotspot_id;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(a.area_of_interest_id), array_agg(h.geom_3857) INTO aoi_ids, geoms
+        FROM (
+            SELECT area_of_interest_id, hotspot_id FROM new_rows
+            UNION SELECT area_of_interest_id, hotspot_id FROM old_rows
+        ) a JOIN data_hotspots h ON h.id = a.hotspot_id;
+    ELSE
+        SELECT array_agg(a.area_of_interest_id), array_agg(h.geom_3857) INTO aoi_ids, geoms
+        FROM old_rows a JOIN data_hotspots h ON h.id = a.hotspot_id;
+    END IF;
+    PERFORM data_bump_tile_region_version('hotspotalert', aoi_ids, geoms);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_hotspotalert_tile_region_version_insert
+    AFTER INSERT ON data_hotspotalert REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_bump_tile_region_version();
+CREATE TRIGGER data_hotspotalert_tile_region_version_update
+    AFTER UPDATE ON data_hotspotalert REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_bump_tile_region_version();
+CREATE TRIGGER data_hotspotalert_tile_region_version_delete
+    AFTER DELETE ON data_hotspotalert REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspotalert_bump_tile_region_version();
+
+-- Hotspot yang dipindah: region lokasi lama dan baru semua alert yang memakainya
+CREATE OR REPLACE FUNCTION data_hotspots_bump_tile_region_version() RETURNS trigger AS $$
+DECLARE
+    aoi_ids uuid[];
+    geoms geometry[];
+BEGIN
+    SELECT array_agg(moved.area_of_interest_id), array_agg(moved.geom) INTO aoi_ids, geoms FROM (
+        SELECT a.area_of_interest_id, n.geom_3857 AS geom
+        FROM new_rows n JOIN old_rows o ON o.id = n.id JOIN data_hotspotalert a ON a.hotspot_id = n.id
+        WHERE n.geom_3857 IS DISTINCT FROM o.geom_3857
+        UNION ALL
+        SELECT a.area_of_interest_id, o.geom_3857
+        FROM new_rows n JOIN old_rows o ON o.id = n.id JOIN data_hotspotalert a ON a.hotspot_id = n.id
+        WHERE n.geom_3857 IS DISTINCT FROM o.geom_3857
+    ) moved;
+    PERFORM data_bump_tile_region_version('hotspotalert', aoi_ids, geoms);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_hotspots_tile_region_version_update
+    AFTER UPDATE ON data_hotspots REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_hotspots_bump_tile_region_version();
+
+CREATE OR REPLACE FUNCTION data_deforestationalerts_bump_tile_region_version() RETURNS trigger AS $$
+DECLARE
+    aoi_ids uuid[];
+    geoms geometry[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(company_id), array_agg(geom_3857) INTO aoi_ids, geoms FROM new_rows;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(changed.company_id), array_agg(changed.geom_3857) INTO aoi_ids, geoms FROM (
+            SELECT company_id, geom_3857 FROM new_rows UNION ALL SELECT company_id, geom_3857 FROM old_rows
+        ) changed;
+    ELSE
+        SELECT array_agg(company_id), array_agg(geom_3857) INTO aoi_ids, geoms FROM old_rows;
+    END IF;
+    PERFORM data_bump_tile_region_version('deforestation', aoi_ids, geoms);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER data_deforestationalerts_tile_region_version_insert
+    AFTER INSERT ON data_deforestationalerts REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_deforestationalerts_bump_tile_region_version();
+CREATE TRIGGER data_deforestationalerts_tile_region_version_update
+    AFTER UPDATE ON data_deforestationalerts REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_deforestationalerts_bump_tile_region_version();
+CREATE TRIGGER data_deforestationalerts_tile_region_version_delete
+    AFTER DELETE ON data_deforestationalerts REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION data_deforestationalerts_bump_tile_region_version();
+"""
+
+REVERSE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS data_deforestationalerts_tile_region_version_insert ON data_deforestationalerts;
+DROP TRIGGER IF EXISTS data_deforestationalerts_tile_region_version_update ON data_deforestationalerts;
+DROP TRIGGER IF EXISTS data_deforestationalerts_tile_region_version_delete ON data_deforestationalerts;
+DROP FUNCTION IF EXISTS data_deforestationalerts_bump_tile_region_version();
+DROP TRIGGER IF EXISTS data_hotspots_tile_region_version_update ON data_hotspots;
+DROP FUNCTION IF EXISTS data_hotspots_bump_tile_region_version();
+DROP TRIGGER IF EXISTS data_hotspotalert_tile_region_version_insert ON data_hotspotalert;
+DROP TRIGGER IF EXISTS data_hotspotalert_tile_region_version_update ON data_hotspotalert;
+DROP TRIGGER IF EXISTS data_hotspotalert_tile_region_version_delete ON data_hotspotalert;
+DROP FUNCTION IF EXISTS data_hotspotalert_bump_tile_region_version();
+DROP FUNCTION IF EXISTS data_bump_tile_region_version(text, uuid[], geometry[]);
+DROP FUNCTION IF EXISTS data_tile_regions(geometry);
+DROP FUNCTION IF EXISTS data_tile_region_index(double precision);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0020_tiledayversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TileRegionVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('layer', models.CharField(max_length=32)),
+                ('area_of_interest_id', models.UUIDField()),
+                ('x', models.IntegerField()),
+                ('y', models.IntegerField()),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('layer', 'area_of_interest_id', 'x', 'y')},
+            },
+        ),
+        migrations.RunSQL(TRIGGER_SQL, REVERSE_TRIGGER_SQL),
+    ]
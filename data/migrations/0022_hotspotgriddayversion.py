@@ -0,0 +1,27 @@
+# Generated by Django 5.2.2 on 2026-10-17 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0021_tileregionversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotspotGridDayVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shape', models.CharField(max_length=8)),
+                ('size', models.IntegerField()),
+                ('area_of_interest_id', models.UUIDField()),
+                ('day', models.DateField()),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('shape', 'size', 'area_of_interest_id', 'day')},
+            },
+        ),
+    ]
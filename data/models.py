@@ -1,5 +1,6 @@
 #data/models.py
 from django.contrib.gis.db import models
+from django.contrib.postgres.fields import ArrayField
 from django.utils import timezone
 import uuid
 from django.conf import settings
@@ -12,6 +13,9 @@ class AreaOfInterest(models.Model):
     geometry = models.GeometryField()
     srid = models.IntegerField(default=4326)
 
+    # Diisi otomatis oleh trigger database dari `geometry`, dipakai query tile MVT
+    geometry_3857 = models.GeometryField(srid=3857, null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -51,6 +55,143 @@ class AreaOfInterest(models.Model):
     def geometry_type(self):
         return self.geometry.geom_type if self.geometry else None
     
+class AreaOfInterestGeneralized(models.Model):
+    """Geometry AOI yang sudah disederhanakan per level zoom, dipakai tile AOI di zoom rendah"""
+    area_of_interest = models.ForeignKey(
+        AreaOfInterest, on_delete=models.CASCADE, related_name="generalized_geometries"
+    )
+    level = models.PositiveSmallIntegerField()
+    geom = models.GeometryField(srid=3857)
+
+    class Meta:
+        unique_together = ('area_of_interest', 'level')
+
+    def __str__(self):
+        return f"{self.area_of_interest_id} - level {self.level}"
+
+
+class TileDataVersion(models.Model):
+    """Counter versi data per layer tile dan AOI, dinaikkan oleh trigger database setiap ada perubahan"""
+    layer = models.CharField(max_length=32)
+    # Sengaja bukan ForeignKey: trigger tetap bisa mencatat perubahan saat AOI dihapus
+    area_of_interest_id = models.UUIDField()
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('layer', 'area_of_interest_id')
+
+    def __str__(self):
+        return f"{self.layer} - {self.area_of_interest_id} - v{self.version}"
+
+
+class TileRegionVersion(models.Model):
+    """Counter versi data per layer tile, AOI dan region (tile XYZ di TILE_REGION_ZOOM), dinaikkan
+    trigger database di lokasi alert yang berubah. Kunci cache tile memakai region di sekitar tile"""
+    layer = models.CharField(max_length=32)
+    # Sengaja bukan ForeignKey, sama seperti TileDataVersion
+    area_of_interest_id = models.UUIDField()
+    x = models.IntegerField()
+    y = models.IntegerField()
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('layer', 'area_of_interest_id', 'x', 'y')
+
+    def __str__(self):
+        return f"{self.layer} - {self.area_of_interest_id} - {self.x}/{self.y} - v{self.version}"
+
+
+class TileDayVersion(models.Model):
+    """Counter versi data per layer tile, AOI dan tanggal alert, dinaikkan trigger database.
+    Dipakai kunci fragmen tile harian: perubahan di satu hari tidak membuat hari lain basi"""
+    layer = models.CharField(max_length=32)
+    # Sengaja bukan ForeignKey, sama seperti TileDataVersion
+    area_of_interest_id = models.UUIDField()
+    day = models.DateField()
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('layer', 'area_of_interest_id', 'day')
+
+    def __str__(self):
+        return f"{self.layer} - {self.area_of_interest_id} - {self.day} - v{self.version}"
+
+
+class AlertDailyRollup(models.Model):
+    """Agregat harian alert per AOI, kategori/rentang confidence dan sumber, dipakai endpoint analytics.
+    Dijaga oleh trigger database, bisa dibangun ulang dengan `python manage.py rebuild_alert_rollup`"""
+    layer = models.CharField(max_length=32)
+    # Sengaja bukan ForeignKey, sama seperti TileDataVersion
+    area_of_interest_id = models.UUIDField()
+    day = models.DateField()
+    # Kategori HotspotAlert, atau rentang confidence deforestation (low/medium/high/other)
+    bucket = models.CharField(max_length=16)
+    # Sumber hotspot (LAPAN/SIPONGI), kosong untuk deforestation
+    source = models.CharField(max_length=255, blank=True, default='')
+    count = models.BigIntegerField(default=0)
+    area_sum = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+    confidence_sum = models.BigIntegerField(default=0)
+    confidence_count = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('layer', 'area_of_interest_id', 'day', 'bucket', 'source')
+        indexes = [
+            models.Index(fields=['layer', 'day'], name='data_alertrollup_layer_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.layer} - {self.area_of_interest_id} - {self.day} - {self.bucket}: {self.count}"
+
+
+class HotspotGridDaily(models.Model):
+    """Jumlah hotspot alert per sel grid kepadatan, AOI dan hari untuk resolusi yang sering dipakai
+    (lihat data/density.py). Diisi `python manage.py build_hotspot_grid`"""
+    shape = models.CharField(max_length=8)
+    # Ukuran sel dalam meter (EPSG:3857)
+    size = models.IntegerField()
+    i = models.IntegerField()
+    j = models.IntegerField()
+    area_of_interest_id = models.UUIDField()
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+    max_confidence = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('shape', 'size', 'area_of_interest_id', 'day', 'i', 'j')
+        indexes = [
+            models.Index(fields=['shape', 'size', 'day'], name='data_hotspotgrid_res_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.shape}/{self.size} ({self.i}, {self.j}) - {self.day}: {self.count}"
+
+
+class HotspotGridDayVersion(models.Model):
+    """Versi TileDayVersion hotspot alert per AOI dan hari saat HotspotGridDaily dibangun.
+    Hari yang versinya sudah berubah (alert terlambat, diganti atau hotspot dipindah) dihitung live"""
+    shape = models.CharField(max_length=8)
+    size = models.IntegerField()
+    area_of_interest_id = models.UUIDField()
+    day = models.DateField()
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('shape', 'size', 'area_of_interest_id', 'day')
+
+    def __str__(self):
+        return f"{self.shape}/{self.size} - {self.area_of_interest_id} - {self.day} - v{self.version}"
+
+
+class SharedTileScope(models.Model):
+    """Himpunan AOI di balik descriptor tile bersama (data/shared_tiles.py), dikunci dengan hash AOI"""
+    scope = models.CharField(max_length=40, primary_key=True)
+    aoi_ids = ArrayField(models.UUIDField())
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.scope} ({len(self.aoi_ids)} AOI)"
+
+
 sources = (("LAPAN", "LAPAN"),
            ("SIPONGI", "SIPONGI"))
 
@@ -69,6 +210,8 @@ class Hotspots(models.Model):
     conf = models.IntegerField()
     sat = models.CharField(max_length=255)
     geom = models.PointField(srid=4326, geography=True, null=True, blank=True, editable=True)
+    # Diisi otomatis oleh trigger database dari `geom`, dipakai query tile MVT
+    geom_3857 = models.PointField(srid=3857, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['-date']
@@ -136,6 +279,11 @@ class DeforestationAlerts(models.Model):
     confidence = models.IntegerField(blank=True, null=True, default=0)
     area = models.DecimalField(max_digits=15, decimal_places=4, blank=True, null=True)
     geom = models.PolygonField(srid=4326, geography=True, null=True, blank=True)
+    # Diisi otomatis oleh trigger database dari `geom`, dipakai query tile MVT
+    geom_3857 = models.PolygonField(srid=3857, null=True, blank=True, editable=False)
+    # Representasi tile zoom rendah/menengah, diisi trigger database bersama geom_3857
+    geom_3857_simplified = models.GeometryField(srid=3857, null=True, blank=True, editable=False)
+    centroid_3857 = models.PointField(srid=3857, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['-alert_date']
@@ -0,0 +1,171 @@
+# data/mvt.py
+"""Operasi minimal pada tile Mapbox Vector Tile (protobuf) tanpa dependency tambahan.
+
+Konkatenasi dua tile dengan layer bernama sama menghasilkan dua layer duplikat yang oleh
+sebagian besar client dianggap satu layer saja (layer terakhir menimpa). merge_tiles
+menggabungkan layer bernama sama menjadi satu layer dengan tabel key/value yang di-remap.
+"""
+
+# Nomor field di vector_tile.proto
+TILE_LAYERS_FIELD = 3
+LAYER_VERSION_FIELD = 15
+LAYER_NAME_FIELD = 1
+LAYER_FEATURES_FIELD = 2
+LAYER_KEYS_FIELD = 3
+LAYER_VALUES_FIELD = 4
+LAYER_EXTENT_FIELD = 5
+FEATURE_TAGS_FIELD = 2
+
+VARINT = 0
+FIXED64 = 1
+LENGTH_DELIMITED = 2
+FIXED32 = 5
+
+
+def _read_varint(buf, pos):
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _fields(buf):
+    """Iterasi (field, wire_type, value) dari pesan protobuf. value int untuk varint, bytes selain itu"""
+    pos, end = 0, len(buf)
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        field, wire = key >> 3, key & 7
+        if wire == VARINT:
+            value, pos = _read_varint(buf, pos)
+        elif wire == LENGTH_DELIMITED:
+            length, pos = _read_varint(buf, pos)
+            value = buf[pos:pos + length]
+            pos += length
+        elif wire == FIXED64:
+            value = buf[pos:pos + 8]
+            pos += 8
+        elif wire == FIXED32:
+            value = buf[pos:pos + 4]
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire}")
+        yield field, wire, value
+
+
+def _field(field, wire, value):
+    key = _varint(field << 3 | wire)
+    if wire == VARINT:
+        return key + _varint(value)
+    if wire == LENGTH_DELIMITED:
+        return key + _varint(len(value)) + value
+    return key + value
+
+
+def _unpack_varints(buf):
+    values, pos = [], 0
+    while pos < len(buf):
+        value, pos = _read_varint(buf, pos)
+        values.append(value)
+    return values
+
+
+class _LayerBuilder:
+    def __init__(self, name):
+        self.name = name
+        self.version = 2
+        self.extent = 4096
+        self.keys = {}
+        self.values = {}
+        self.features = []
+
+    def add(self, layer_fields):
+        keys, values, features = [], [], []
+        for field, wire, value in layer_fields:
+            if field == LAYER_KEYS_FIELD:
+                keys.append(value)
+            elif field == LAYER_VALUES_FIELD:
+                values.append(value)
+            elif field == LAYER_FEATURES_FIELD:
+                features.append(value)
+            elif field == LAYER_VERSION_FIELD:
+                self.version = value
+            elif field == LAYER_EXTENT_FIELD:
+                self.extent = value
+
+        # Value disimpan sebagai pesan protobuf mentah, identik = nilai sama
+        key_map = [self.keys.setdefault(key, len(self.keys)) for key in keys]
+        value_map = [self.values.setdefault(value, len(self.values)) for value in values]
+        for feature in features:
+            out = bytearray()
+            for field, wire, value in _fields(feature):
+                if field == FEATURE_TAGS_FIELD and wire == LENGTH_DELIMITED:
+                    tags = _unpack_varints(value)
+                    remapped = bytearray()
+                    for i in range(0, len(tags) - 1, 2):
+                        remapped += _varint(key_map[tags[i]]) + _varint(value_map[tags[i + 1]])
+                    value = bytes(remapped)
+                out += _field(field, wire, value)
+            self.features.append(bytes(out))
+
+    def encode(self):
+        out = bytearray(_field(LAYER_VERSION_FIELD, VARINT, self.version))
+        out += _field(LAYER_NAME_FIELD, LENGTH_DELIMITED, self.name)
+        for feature in self.features:
+            out += _field(LAYER_FEATURES_FIELD, LENGTH_DELIMITED, feature)
+        for key in sorted(self.keys, key=self.keys.get):
+            out += _field(LAYER_KEYS_FIELD, LENGTH_DELIMITED, key)
+        for value in sorted(self.values, key=self.values.get):
+            out += _field(LAYER_VALUES_FIELD, LENGTH_DELIMITED, value)
+        out += _field(LAYER_EXTENT_FIELD, VARINT, self.extent)
+        return bytes(out)
+
+
+def merge_tiles(tiles):
+    """Gabungkan beberapa tile MVT (bytes mentah) menjadi satu; layer dengan nama sama
+    digabung menjadi satu layer. Urutan layer mengikuti kemunculan pertama"""
+    layers = {}
+    for tile in tiles:
+        for field, wire, value in _fields(bytes(tile)):
+            if field != TILE_LAYERS_FIELD or wire != LENGTH_DELIMITED:
+                continue
+            layer_fields = list(_fields(value))
+            name = next((v for f, _w, v in layer_fields if f == LAYER_NAME_FIELD), b'')
+            if name not in layers:
+                layers[name] = _LayerBuilder(name)
+            layers[name].add(layer_fields)
+    return b''.join(
+        _field(TILE_LAYERS_FIELD, LENGTH_DELIMITED, builder.encode())
+        for builder in layers.values() if builder.features
+    )
+
+
+def layer_feature_counts(tile):
+    """dict nama layer -> jumlah feature, untuk debugging/benchmark"""
+    counts = {}
+    for field, wire, value in _fields(bytes(tile)):
+        if field == TILE_LAYERS_FIELD and wire == LENGTH_DELIMITED:
+            name, count = b'', 0
+            for f, _w, v in _fields(value):
+                if f == LAYER_NAME_FIELD:
+                    name = v
+                elif f == LAYER_FEATURES_FIELD:
+                    count += 1
+            key = name.decode('utf-8')
+            counts[key] = counts.get(key, 0) + count
+    return counts
@@ -5,7 +5,6 @@ from .models import AreaOfInterest, HotspotAlert, DeforestationAlerts
 from .models import DeforestationVerification, DeforestationAlerts
 from .models import AreaOfInterest, HotspotAlert, HotspotVerification
 from django.contrib.gis.geos import GEOSGeometry
-from django.contrib.gis.measure import Area
 
 
 class AreaOfInterestSerializer(serializers.ModelSerializer):
@@ -15,7 +14,7 @@ class AreaOfInterestSerializer(serializers.ModelSerializer):
     class Meta:
         model = AreaOfInterest
         geo_field = "geometry"
-        fields = '__all__'
+        exclude = ('geometry_3857',)
 
     def get_geometry_type(self, obj):
         return obj.geometry_type
@@ -63,7 +62,7 @@ class AreaOfInterestGeoSerializer(GeoFeatureModelSerializer):
     class Meta:
         model = AreaOfInterest
         geo_field = "geometry"
-        fields = '__all__'
+        exclude = ('geometry_3857',)
 
     def validate_geometry(self, value):
         """Validasi maksimum luas AOI untuk GeoSerializer"""
@@ -112,7 +111,7 @@ class DeforestationAlertsSerializer(GeoFeatureModelSerializer):
     class Meta:
         model = DeforestationAlerts
         geo_field = 'geom'
-        fields = '__all__'
+        exclude = ('geom_3857', 'geom_3857_simplified', 'centroid_3857')
     
 
 class DeforestationVerificationSerializer(serializers.ModelSerializer):
@@ -0,0 +1,75 @@
+# data/shared_tiles.py
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+
+from .lru import TTLLRUCache
+from .models import SharedTileScope
+from .tile_cache import tile_variant
+
+_signer = signing.Signer(salt='data.shared_tiles')
+# Isi scope tidak pernah berubah (kuncinya hash dari himpunan AOI), aman di-cache lama
+_scope_cache = TTLLRUCache(max_entries=10000, timeout=3600)
+
+
+class SharedTileError(Exception):
+    pass
+
+
+def get_shared_tile_settings():
+    params = getattr(settings, 'SHARED_TILES', None) or {}
+    return {
+        'TTL': int(params.get('TTL', 86400)),
+        'MAX_AGE': int(params.get('MAX_AGE', 3600)),
+    }
+
+
+def _remember_scope(scope, aoi_ids):
+    """Simpan himpunan AOI scope hanya jika belum dikenal. ignore_conflicts membuat request
+    bersamaan untuk scope baru tidak gagal karena unique constraint"""
+    if _scope_cache.get(scope) is not None:
+        return
+    if not SharedTileScope.objects.filter(scope=scope).exists():
+        SharedTileScope.objects.bulk_create(
+            [SharedTileScope(scope=scope, aoi_ids=list(aoi_ids))], ignore_conflicts=True
+        )
+    _scope_cache.set(scope, sorted(str(aoi_id) for aoi_id in aoi_ids))
+
+
+def create_shared_descriptor(aoi_ids, now=None):
+    """Descriptor '<scope>.<expires>.<signature>' untuk himpunan AOI.
+
+    Masa berlaku dibulatkan ke periode TTL sehingga semua user dengan scope AOI yang sama
+    mendapat descriptor (dan URL tile) yang identik selama satu periode. Berlaku minimal TTL detik.
+    """
+    ttl = get_shared_tile_settings()['TTL']
+    now = int(now if now is not None else time.time())
+    expires = (now // ttl + 2) * ttl
+    scope = tile_variant(aoi_ids)
+    _remember_scope(scope, aoi_ids)
+    value = f"{scope}.{expires}"
+    return f"{value}.{_signer.signature(value)}", expires
+
+
+def resolve_shared_descriptor(descriptor, now=None):
+    """(aoi_ids, expires) dari descriptor, raise SharedTileError jika tidak valid atau kedaluwarsa"""
+    try:
+        scope, expires, signature = descriptor.split('.', 2)
+        expires = int(expires)
+    except ValueError:
+        raise SharedTileError("Invalid shared tile descriptor")
+    if not constant_time_compare(signature, _signer.signature(f"{scope}.{expires}")):
+        raise SharedTileError("Invalid shared tile descriptor")
+    if expires < (now if now is not None else time.time()):
+        raise SharedTileError("Shared tile descriptor expired")
+
+    aoi_ids = _scope_cache.get(scope)
+    if aoi_ids is None:
+        shared = SharedTileScope.objects.filter(scope=scope).values_list('aoi_ids', flat=True).first()
+        if shared is None:
+            raise SharedTileError("Unknown shared tile scope")
+        aoi_ids = sorted(str(aoi_id) for aoi_id in shared)
+        _scope_cache.set(scope, aoi_ids)
+    return aoi_ids, expires
@@ -1,7 +1,14 @@
 # data/signals.py
-from django.db.models.signals import post_save
+import threading
+import weakref
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from .models import HotspotAlert, DeforestationAlerts
+from .models import HotspotAlert, DeforestationAlerts, AreaOfInterest, Hotspots
+from .tile_cache import invalidate_tiles, geometry_extent, TILE_LAYERS
+from .tiles import refresh_generalized_geometries
+from .tile_prewarm import schedule_prewarm
 from notifications.services import NotificationService
 
 @receiver(post_save, sender=HotspotAlert)
@@ -15,3 +22,106 @@ def send_deforestation_notification(sender, instance, created, **kwargs):
     """Trigger notifikasi ketika deforestation alert baru dibuat"""
     if created:
         NotificationService.send_deforestation_notification(instance)
+
+
+def _union_extent(*extents):
+    extents = [e for e in extents if e]
+    if not extents:
+        return None
+    return (
+        min(e[0] for e in extents), min(e[1] for e in extents),
+        max(e[2] for e in extents), max(e[3] for e in extents),
+    )
+
+
+def _invalidate_on_commit(bbox, layers):
+    if bbox:
+        transaction.on_commit(lambda: invalidate_tiles(bbox, layers))
+
+
+# Batch prewarm per thread, kuncinya (alias koneksi, savepoint aktif). Disimpan sebagai weakref:
+# Django melepas callback on_commit setelah commit atau rollback, sehingga batch lama ikut hilang
+_prewarm_batches = threading.local()
+
+
+class _PrewarmBatch:
+    """Perubahan alert dalam satu transaksi (atau savepoint), dijadwalkan sekali saat commit"""
+
+    def __init__(self):
+        self.changes = set()
+
+    def __call__(self):
+        schedule_prewarm(self.changes)
+
+
+def _prewarm_on_commit(layer, aoi_id, bbox):
+    """Render ulang tile yang baru dievict di background (settings.TILE_PREWARM['ENABLED']).
+
+    Satu callback on_commit per transaksi/savepoint: bulk save N alert menghasilkan satu jadwal
+    prewarm dengan bbox yang sudah dideduplikasi, bukan N job yang merender tile yang sama.
+    """
+    if not bbox:
+        return
+    change = (layer, str(aoi_id), tuple(bbox))
+    conn = transaction.get_connection()
+    if not conn.in_atomic_block:
+        schedule_prewarm({change})
+        return
+
+    refs = getattr(_prewarm_batches, 'refs', None)
+    if refs is None:
+        refs = _prewarm_batches.refs = {}
+    key = (conn.alias, tuple(conn.savepoint_ids))
+    batch = refs[key]() if key in refs else None
+    if batch is None:
+        for stale in [k for k, ref in refs.items() if ref() is None]:
+            del refs[stale]
+        batch = _PrewarmBatch()
+        transaction.on_commit(batch)
+        refs[key] = weakref.ref(batch)
+    batch.changes.add(change)
+
+
+@receiver([post_save, post_delete], sender=HotspotAlert)
+def invalidate_hotspot_alert_tiles(sender, instance, **kwargs):
+    """Evict tile hotspot alert di lokasi hotspot"""
+    try:
+        hotspot = instance.hotspot
+    except Hotspots.DoesNotExist:
+        return
+    if hotspot.long is not None and hotspot.lat is not None:
+        bbox = (hotspot.long, hotspot.lat, hotspot.long, hotspot.lat)
+        _invalidate_on_commit(bbox, ('hotspotalert',))
+        if kwargs.get('signal') is post_save:
+            _prewarm_on_commit('hotspotalert', instance.area_of_interest_id, bbox)
+
+
+@receiver([post_save, post_delete], sender=DeforestationAlerts)
+def invalidate_deforestation_tiles(sender, instance, **kwargs):
+    """Evict tile deforestation yang menutupi polygon alert"""
+    bbox = geometry_extent(instance.geom)
+    _invalidate_on_commit(bbox, ('deforestation',))
+    if kwargs.get('signal') is post_save:
+        _prewarm_on_commit('deforestation', instance.company_id, bbox)
+
+
+@receiver(pre_save, sender=AreaOfInterest)
+def remember_aoi_extent(sender, instance, **kwargs):
+    """Simpan extent geometry lama agar tile di lokasi lama ikut dihapus"""
+    instance._old_tile_extent = None
+    if not instance._state.adding:
+        old_geometry = AreaOfInterest.objects.filter(pk=instance.pk).values_list('geometry', flat=True).first()
+        instance._old_tile_extent = geometry_extent(old_geometry)
+
+
+@receiver([post_save, post_delete], sender=AreaOfInterest)
+def invalidate_aoi_tiles(sender, instance, **kwargs):
+    """Evict tile semua layer di area AOI (lama dan baru) karena atribut AOI ikut dirender"""
+    bbox = _union_extent(getattr(instance, '_old_tile_extent', None), geometry_extent(instance.geometry))
+    _invalidate_on_commit(bbox, TILE_LAYERS)
+
+
+@receiver(post_save, sender=AreaOfInterest)
+def refresh_aoi_generalized_geometries(sender, instance, **kwargs):
+    """Hitung ulang geometry sederhana untuk tile zoom rendah setiap AOI disimpan"""
+    refresh_generalized_geometries([instance.pk])
@@ -0,0 +1,50 @@
+# data/singleflight.py
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Pemanggilan bersamaan dengan key yang sama dalam satu proses hanya menjalankan fn sekali;
+    thread lain menunggu dan memakai hasil (atau exception) yang sama"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if isinstance(call.error, Exception):
+                raise call.error
+            if call.error is not None:
+                # KeyboardInterrupt/SystemExit milik thread leader tidak diteruskan apa adanya
+                raise RuntimeError(f"Single-flight call {key} was aborted") from call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            # Termasuk BaseException: follower tidak boleh bangun dengan hasil None
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
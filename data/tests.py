@@ -1,3 +1,1080 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import threading
+from datetime import date, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.gis.geos import Point, Polygon
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from accounts.models import Users
+
+from .analytics import (
+    analytics_cache_stats, clear_analytics_cache, dashboard_bundle, rebuild_rollup, decode_cursor, encode_cursor, hotspot_chart, hotspot_company_table,
+    hotspot_stats,
+)
+from .density import build_hotspot_grid, merge_cells, stale_grid_days
+from .models import AlertDailyRollup, AreaOfInterest, DeforestationAlerts, HotspotAlert, Hotspots, SharedTileScope, TileDataVersion
+from . import singleflight
+from .singleflight import SingleFlight
+from .shared_tiles import SharedTileError, _scope_cache, create_shared_descriptor, resolve_shared_descriptor
+from .mvt import (
+    LAYER_EXTENT_FIELD, LAYER_FEATURES_FIELD, LAYER_KEYS_FIELD, LAYER_NAME_FIELD, LAYER_VALUES_FIELD,
+    LAYER_VERSION_FIELD, LENGTH_DELIMITED, TILE_LAYERS_FIELD, VARINT, FEATURE_TAGS_FIELD,
+    _field, _fields, _unpack_varints, layer_feature_counts, merge_tiles,
+)
+from .tile_cache import MemoryTileCache, lonlat_to_tile, tile_region_range
+from .tile_compression import decompress_tile
+from .tiles import (
+    _render_and_cache, bump_tile_region_versions, day_fragment_variants, get_or_render_tiles, parse_tile_filters,
+    render_tiles,
+    tile_render_lock_id, tile_versions,
+)
+
+
+def create_aoi(name='PT Contoh', bbox=(109.0, -3.0, 111.0, -1.0)):
+    return AreaOfInterest.objects.create(name=name, geometry=Polygon.from_bbox(bbox))
+
+
+def create_hotspot(hotspot_id, lon=110.0, lat=-2.0, day=None):
+    return Hotspots.objects.create(
+        id=hotspot_id, key=hotspot_id, source='LAPAN', radius=375.0, long=lon, lat=lat,
+        provinsi='Kalimantan Barat', kabupaten='Ketapang', kecamatan='Kendawangan',
+        date=day or timezone.localdate(), times=time(6, 30), conf=80, sat='NOAA20',
+        geom=Point(lon, lat, srid=4326),
+    )
+
+
+def create_hotspot_alert(hotspot, aoi, day, **fields):
+    fields.setdefault('category', 'BAHAYA')
+    fields.setdefault('confidence', 80)
+    return HotspotAlert.objects.create(hotspot=hotspot, area_of_interest=aoi, alert_date=day, **fields)
+
+
+def create_deforestation_alert(alert_id, aoi, day, bbox=(110.0, -2.0, 110.01, -1.99), **fields):
+    fields.setdefault('confidence', 4)
+    fields.setdefault('area', 12.5)
+    return DeforestationAlerts.objects.create(
+        id=alert_id, company=aoi, event_id=alert_id, alert_date=day, geom=Polygon.from_bbox(bbox), **fields,
+    )
+
+
+def create_token(email, *aois):
+    """Token user yang memiliki AOI aois"""
+    user = Users.objects.create_user(email=email)
+    user.areas_of_interest.set(aois)
+    return Token.objects.create(user=user).key
+
+
+def _tile(name, features):
+    """Tile MVT satu layer; features: list dict properti string (tanpa geometry)"""
+    keys, values, encoded = [], [], []
+    for properties in features:
+        tags = []
+        for key, value in properties.items():
+            if key not in keys:
+                keys.append(key)
+            raw_value = _field(1, LENGTH_DELIMITED, value.encode('utf-8'))
+            if raw_value not in values:
+                values.append(raw_value)
+            tags += [keys.index(key), values.index(raw_value)]
+        encoded.append(_field(FEATURE_TAGS_FIELD, LENGTH_DELIMITED, bytes(tags)))
+    layer = _field(LAYER_VERSION_FIELD, VARINT, 2) + _field(LAYER_NAME_FIELD, LENGTH_DELIMITED, name.encode())
+    for feature in encoded:
+        layer += _field(LAYER_FEATURES_FIELD, LENGTH_DELIMITED, feature)
+    for key in keys:
+        layer += _field(LAYER_KEYS_FIELD, LENGTH_DELIMITED, key.encode('utf-8'))
+    for value in values:
+        layer += _field(LAYER_VALUES_FIELD, LENGTH_DELIMITED, value)
+    layer += _field(LAYER_EXTENT_FIELD, VARINT, 4096)
+    return _field(TILE_LAYERS_FIELD, LENGTH_DELIMITED, layer)
+
+
+def _feature_properties(tile):
+    """dict nama layer -> list dict properti, hasil decode tile untuk dibandingkan"""
+    result = {}
+    for _field_no, _wire, layer in _fields(tile):
+        fields = list(_fields(layer))
+        name = next(v for f, _w, v in fields if f == LAYER_NAME_FIELD).decode()
+        keys = [v.decode() for f, _w, v in fields if f == LAYER_KEYS_FIELD]
+        values = [next(_fields(v))[2].decode() for f, _w, v in fields if f == LAYER_VALUES_FIELD]
+        for f, _w, feature in fields:
+            if f != LAYER_FEATURES_FIELD:
+                continue
+            tags = _unpack_varints(next(v for ff, _ww, v in _fields(feature) if ff == FEATURE_TAGS_FIELD))
+            properties = {keys[tags[i]]: values[tags[i + 1]] for i in range(0, len(tags), 2)}
+            result.setdefault(name, []).append(properties)
+    return result
+
+
+class MergeTilesTest(SimpleTestCase):
+    def test_same_layer_is_merged_with_remapped_tags(self):
+        first = _tile('hotspot_alerts', [{'category': 'AMAN'}, {'category': 'BAHAYA'}])
+        second = _tile('hotspot_alerts', [{'id': '7', 'category': 'BAHAYA'}])
+        merged = merge_tiles([first, second])
+
+        self.assertEqual(layer_feature_counts(merged), {'hotspot_alerts': 3})
+        self.assertEqual(_feature_properties(merged)['hotspot_alerts'], [
+            {'category': 'AMAN'}, {'category': 'BAHAYA'}, {'id': '7', 'category': 'BAHAYA'},
+        ])
+
+    def test_different_layers_are_kept_in_order(self):
+        merged = merge_tiles([_tile('aoi', [{'name': 'A'}]), _tile('hotspot_alerts', [{'category': 'AMAN'}])])
+        self.assertEqual(list(layer_feature_counts(merged)), ['aoi', 'hotspot_alerts'])
+
+    def test_empty_tiles(self):
+        self.assertEqual(merge_tiles([]), b'')
+        self.assertEqual(merge_tiles([b'', _tile('aoi', [])]), b'')
+        single = _tile('aoi', [{'name': 'A'}])
+        self.assertEqual(_feature_properties(merge_tiles([b'', single])), {'aoi': [{'name': 'A'}]})
+
+
+class ParseTileFiltersTest(SimpleTestCase):
+    def test_no_params(self):
+        self.assertEqual(parse_tile_filters({}), {})
+
+    def test_normalized_filters(self):
+        aoi_id = '6f1c2b0e-8a4b-4c53-9b1e-2d7c5d1f0a11'
+        filters = parse_tile_filters({
+            'startdate': '2024-08-01', 'enddate': '2024-08-31',
+            'aoi_id': f" {aoi_id.upper()},{aoi_id}",
+            'category': 'bahaya, aman',
+            'min_confidence': '80',
+        })
+        self.assertEqual(filters, {
+            'start': date(2024, 8, 1),
+            'end': date(2024, 8, 31),
+            'aoi_ids': (aoi_id,),
+            'category': ('AMAN', 'BAHAYA'),
+            'min_confidence': 80,
+        })
+
+    def test_today(self):
+        filters = parse_tile_filters({'today': 'true', 'startdate': '2024-08-01', 'enddate': '2024-08-31'})
+        self.assertEqual(filters['start'], filters['end'])
+        self.assertEqual(filters['start'], timezone.localdate())
+
+    def test_invalid_params(self):
+        for params in (
+            {'startdate': 'kemarin', 'enddate': '2024-08-31'},
+            {'aoi_id': 'not-a-uuid'},
+            {'category': 'MERAH'},
+            {'category': ' , '},
+            {'min_confidence': 'tinggi'},
+            {'min_confidence': '101'},
+        ):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                parse_tile_filters(params)
+
+
+class CursorTest(SimpleTestCase):
+    @staticmethod
+    def _encode(payload):
+        raw = json.dumps(payload).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def test_round_trip(self):
+        cursor = encode_cursor(date(2024, 8, 17), 1234)
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor), (date(2024, 8, 17), 1234))
+        self.assertEqual(decode_cursor(cursor, HotspotAlert), (date(2024, 8, 17), 1234))
+
+        cursor = encode_cursor(date(2024, 8, 17), 'GLAD-123')
+        self.assertEqual(decode_cursor(cursor, DeforestationAlerts), (date(2024, 8, 17), 'GLAD-123'))
+
+    def test_pk_is_converted_to_model_pk_type(self):
+        self.assertEqual(decode_cursor(self._encode(['2024-08-17', '42']), HotspotAlert)[1], 42)
+        self.assertEqual(decode_cursor(self._encode(['2024-08-17', 42]), DeforestationAlerts)[1], '42')
+
+    def test_malformed_cursors(self):
+        for cursor in (
+            'not base64!',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            self._encode({'date': '2024-08-17', 'pk': 1}),
+            self._encode(['2024-08-17']),
+            self._encode(['2024-08-17', 1, 2]),
+            self._encode(['17/08/2024', 1]),
+            self._encode([20240817, 1]),
+            self._encode(['2024-08-17', [1]]),
+            self._encode(['2024-08-17', {'id': 1}]),
+            self._encode(['2024-08-17', None]),
+            self._encode(['2024-08-17', True]),
+        ):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_pk_of_wrong_type_for_model(self):
+        with self.assertRaisesMessage(ValueError, 'Invalid cursor'):
+            decode_cursor(self._encode(['2024-08-17', 'abc']), HotspotAlert)
+
+
+class MergeCellsTest(SimpleTestCase):
+    def test_precomputed_and_live_cells_are_combined(self):
+        precomputed = [(1, 2, 3, 40), (0, 5, 1, 90)]
+        live = [(1, 2, 2, 70), (-3, 0, 4, 10)]
+        self.assertEqual(merge_cells(precomputed + live, 'hex', 5000), {
+            'shape': 'hex',
+            'size': 5000,
+            'srid': 3857,
+            'i': [-3, 0, 1],
+            'j': [0, 5, 2],
+            'count': [4, 1, 5],
+            'max_confidence': [10, 90, 70],
+        })
+
+    def test_no_rows(self):
+        cells = merge_cells([], 'square', 1000)
+        self.assertEqual((cells['i'], cells['count']), ([], []))
+
+
+class HotspotDayFragmentVersionTest(TestCase):
+    """Fragmen hari yang sudah tutup harus berganti kunci untuk setiap perubahan di hari itu saja"""
+
+    def setUp(self):
+        self.aoi = create_aoi()
+        self.aoi_ids = [str(self.aoi.pk)]
+        self.closed_day = timezone.localdate() - timedelta(days=10)
+        self.other_day = self.closed_day - timedelta(days=1)
+        self.hotspot = create_hotspot('H-1')
+        self.alert = create_hotspot_alert(self.hotspot, self.aoi, self.closed_day, distance=120.0)
+        create_hotspot_alert(create_hotspot('H-2', lon=110.2), self.aoi, self.other_day)
+
+    def _variants(self):
+        return day_fragment_variants(self.aoi_ids, {}, [self.other_day, self.closed_day], None)
+
+    def test_replacing_alert_changes_only_that_day(self):
+        before = self._variants()
+        self.alert.delete()
+        # Alert pengganti identik untuk rollup (AOI, kategori, sumber, confidence, hari sama)
+        create_hotspot_alert(create_hotspot('H-3', lon=110.5), self.aoi, self.closed_day, distance=120.0)
+        after = self._variants()
+
+        self.assertNotEqual(after[self.closed_day], before[self.closed_day])
+        self.assertEqual(after[self.other_day], before[self.other_day])
+
+    def test_editing_alert_outside_rollup_columns(self):
+        before = self._variants()
+        HotspotAlert.objects.filter(pk=self.alert.pk).update(distance=999.0)
+        self.assertNotEqual(self._variants()[self.closed_day], before[self.closed_day])
+
+    def test_moving_hotspot(self):
+        before = self._variants()
+        self.hotspot.geom = Point(110.01, -2.01, srid=4326)
+        self.hotspot.save()
+        after = self._variants()
+
+        self.assertNotEqual(after[self.closed_day], before[self.closed_day])
+        self.assertEqual(after[self.other_day], before[self.other_day])
+
+    def test_unrelated_hotspot_update_keeps_versions(self):
+        before = self._variants()
+        Hotspots.objects.filter(pk=self.hotspot.pk).update(conf=10)
+        self.assertEqual(self._variants(), before)
+
+
+class TileRegionRangeTest(SimpleTestCase):
+    def test_region_zoom_includes_buffer_neighbours(self):
+        self.assertEqual(tile_region_range(8, 200, 130), (199, 129, 201, 131))
+
+    def test_high_zoom_tile_stays_in_its_region(self):
+        self.assertEqual(tile_region_range(12, 3201, 2081), (200, 130, 200, 130))
+
+    def test_low_zoom_tile_covers_all_regions(self):
+        self.assertEqual(tile_region_range(0, 0, 0), (0, 0, 255, 255))
+
+
+class TileRegionVersionTest(TestCase):
+    """Perubahan alert hanya mengubah versi tile di sekitarnya"""
+
+    def setUp(self):
+        self.aoi = create_aoi(bbox=(109.0, -3.0, 121.0, -1.0))
+        self.aoi_ids = [str(self.aoi.pk)]
+        self.day = timezone.localdate() - timedelta(days=3)
+        self.near = (12, *lonlat_to_tile(110.0, -2.0, 12))
+        self.far = (12, *lonlat_to_tile(120.0, -2.0, 12))
+        create_hotspot_alert(create_hotspot('H-1'), self.aoi, self.day)
+        create_hotspot_alert(create_hotspot('H-2', lon=120.0), self.aoi, self.day)
+
+    def _versions(self, tile, layer='hotspotalert'):
+        return tile_versions([layer], *tile, self.aoi_ids)[layer]
+
+    def test_new_alert_changes_only_nearby_tiles(self):
+        near, far = self._versions(self.near), self._versions(self.far)
+        create_hotspot_alert(create_hotspot('H-3', lon=110.001), self.aoi, self.day)
+
+        self.assertNotEqual(self._versions(self.near), near)
+        self.assertEqual(self._versions(self.far), far)
+
+    def test_deleting_alert(self):
+        far = self._versions(self.far)
+        HotspotAlert.objects.filter(hotspot_id='H-2').delete()
+        self.assertNotEqual(self._versions(self.far), far)
+
+    def test_manual_bbox_invalidation(self):
+        near, far = self._versions(self.near), self._versions(self.far)
+        self.assertGreater(bump_tile_region_versions((109.9, -2.1, 110.1, -1.9), ['hotspotalert']), 0)
+
+        self.assertNotEqual(self._versions(self.near), near)
+        self.assertEqual(self._versions(self.far), far)
+
+    def test_aoi_change_changes_all_tiles(self):
+        near, far = self._versions(self.near), self._versions(self.far)
+        self.aoi.name = 'PT Contoh Baru'
+        self.aoi.save()
+
+        self.assertNotEqual(self._versions(self.near), near)
+        self.assertNotEqual(self._versions(self.far), far)
+
+
+class SyncTileRenderTest(TestCase):
+    """Jalur sync memakai psycopg 3 (sama dengan jalur async); parameter array dan filter tetap berjalan"""
+
+    def test_sync_connection_uses_psycopg3(self):
+        self.assertTrue(is_psycopg3)
+
+    def test_render_with_filters(self):
+        aoi = create_aoi()
+        day = timezone.localdate()
+        create_hotspot_alert(create_hotspot('H-1'), aoi, day, category='BAHAYA')
+        create_hotspot_alert(create_hotspot('H-2', lon=110.0001), aoi, day, category='AMAN')
+        z, (x, y) = 14, lonlat_to_tile(110.0, -2.0, 14)
+        filters = parse_tile_filters({'category': 'bahaya', 'startdate': day.isoformat(), 'enddate': day.isoformat()})
+
+        tiles = render_tiles(['hotspotalert'], z, x, y, [str(aoi.pk)], filters)
+        self.assertEqual(layer_feature_counts(tiles['hotspotalert']), {'hotspot_alerts': 1})
+
+
+class StaleGridDaysTest(TestCase):
+    """Hari HotspotGridDaily dianggap basi jika ada perubahan alert setelah grid dibangun"""
+
+    def setUp(self):
+        self.aoi = create_aoi()
+        self.aoi_ids = [str(self.aoi.pk)]
+        self.day = timezone.localdate() - timedelta(days=10)
+        self.other_day = self.day - timedelta(days=1)
+        create_hotspot_alert(create_hotspot('H-1'), self.aoi, self.day)
+        create_hotspot_alert(create_hotspot('H-2'), self.aoi, self.other_day)
+
+    def _stale(self):
+        return stale_grid_days('hex', 5000, self.other_day, self.day, self.aoi_ids)
+
+    def test_fresh_grid(self):
+        build_hotspot_grid('hex', 5000, self.other_day, self.day, self.aoi_ids)
+        self.assertEqual(self._stale(), [])
+
+    def test_late_alert_marks_only_its_day(self):
+        build_hotspot_grid('hex', 5000, self.other_day, self.day, self.aoi_ids)
+        create_hotspot_alert(create_hotspot('H-3', lon=110.3), self.aoi, self.day)
+        self.assertEqual(self._stale(), [self.day])
+
+        build_hotspot_grid('hex', 5000, self.day, self.day, self.aoi_ids)
+        self.assertEqual(self._stale(), [])
+
+    def test_alert_without_geometry_is_not_stale_forever(self):
+        hotspot = create_hotspot('H-3')
+        Hotspots.objects.filter(pk=hotspot.pk).update(geom=None)
+        create_hotspot_alert(hotspot, self.aoi, self.day)
+        build_hotspot_grid('hex', 5000, self.other_day, self.day, self.aoi_ids)
+        self.assertEqual(self._stale(), [])
+
+    def test_replaced_alert_with_same_count(self):
+        build_hotspot_grid('hex', 5000, self.other_day, self.day, self.aoi_ids)
+        HotspotAlert.objects.filter(hotspot_id='H-1').delete()
+        create_hotspot_alert(create_hotspot('H-3', lon=111.0), self.aoi, self.day)
+        self.assertEqual(self._stale(), [self.day])
+
+
+class DashboardBundleTest(TestCase):
+    """Panel dari satu query rollup harus sama dengan endpoint per panel"""
+
+    def setUp(self):
+        clear_analytics_cache()
+        self.first = create_aoi('PT Satu')
+        self.second = create_aoi('PT Dua')
+        self.aoi_ids = [str(self.first.pk), str(self.second.pk)]
+        self.end = timezone.localdate()
+        self.start = self.end - timedelta(days=20)
+        create_hotspot_alert(create_hotspot('H-1'), self.first, self.end - timedelta(days=15), category='BAHAYA')
+        create_hotspot_alert(create_hotspot('H-2'), self.first, self.end - timedelta(days=2), category='AMAN')
+        create_hotspot_alert(create_hotspot('H-3'), self.second, self.end, category='WASPADA')
+
+    def test_bundle_matches_single_panels(self):
+        bundle = dashboard_bundle('hotspotalert', self.aoi_ids, {
+            'panels': 'stats,chart,company_table', 'start_date': self.start.isoformat(),
+            'end_date': self.end.isoformat(), 'granularity': 'week', 'sort': 'name', 'limit': '1', 'offset': '1',
+        })
+        rows, total = hotspot_company_table(self.aoi_ids, self.start, self.end, 'name', 'asc', 1, 1)
+
+        self.assertEqual(list(bundle), ['stats', 'chart', 'company_table'])
+        self.assertEqual(bundle['stats'], hotspot_stats(self.aoi_ids, self.start, self.end))
+        self.assertEqual(bundle['chart'], hotspot_chart(self.aoi_ids, self.start, self.end, 'week'))
+        self.assertEqual(bundle['company_table'], {'data': rows, 'total_count': total})
+        self.assertEqual([row['name'] for row in rows], ['PT Satu'])
+        self.assertEqual(total, 2)
+
+    def test_bundle_sees_new_alerts(self):
+        params = {'panels': 'stats', 'start_date': self.start.isoformat(), 'end_date': self.end.isoformat()}
+        self.assertEqual(dashboard_bundle('hotspotalert', self.aoi_ids, params)['stats']['total_events'], 3)
+        create_hotspot_alert(create_hotspot('H-4'), self.second, self.end)
+        self.assertEqual(dashboard_bundle('hotspotalert', self.aoi_ids, params)['stats']['total_events'], 4)
+
+
+class SharedDescriptorTest(TestCase):
+    def setUp(self):
+        _scope_cache.clear()
+        self.aoi_ids = [str(create_aoi('PT Satu').pk), str(create_aoi('PT Dua').pk)]
+
+    def test_round_trip_and_scope_written_once(self):
+        descriptor, expires = create_shared_descriptor(self.aoi_ids, now=1000)
+        self.assertEqual(create_shared_descriptor(list(reversed(self.aoi_ids)), now=1000), (descriptor, expires))
+        self.assertEqual(SharedTileScope.objects.count(), 1)
+
+        _scope_cache.clear()
+        self.assertEqual(resolve_shared_descriptor(descriptor, now=1000), (sorted(self.aoi_ids), expires))
+
+    def test_known_scope_does_not_query(self):
+        create_shared_descriptor(self.aoi_ids)
+        with self.assertNumQueries(0):
+            create_shared_descriptor(self.aoi_ids)
+
+    def test_scope_written_by_other_worker(self):
+        create_shared_descriptor(self.aoi_ids)
+        _scope_cache.clear()
+        create_shared_descriptor(self.aoi_ids)
+        self.assertEqual(SharedTileScope.objects.count(), 1)
+
+    def test_tampered_and_expired_descriptors(self):
+        descriptor, expires = create_shared_descriptor(self.aoi_ids, now=1000)
+        scope, _expires, signature = descriptor.split('.')
+        with self.assertRaises(SharedTileError):
+            resolve_shared_descriptor(f"{scope}.{expires + 86400}.{signature}", now=1000)
+        with self.assertRaises(SharedTileError):
+            resolve_shared_descriptor(descriptor, now=expires + 1)
+
+
+class PrewarmBatchTest(TestCase):
+    """Perubahan alert dalam satu transaksi dijadwalkan prewarm sekali saat commit"""
+
+    def setUp(self):
+        self.aoi = create_aoi()
+        self.day = timezone.localdate()
+
+    def test_one_schedule_per_transaction(self):
+        with mock.patch('data.signals.schedule_prewarm') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                create_hotspot_alert(create_hotspot('H-1'), self.aoi, self.day)
+                create_hotspot_alert(create_hotspot('H-2', lon=110.5), self.aoi, self.day)
+        schedule.assert_called_once()
+        self.assertEqual(len(schedule.call_args.args[0]), 2)
+
+    def test_rolled_back_savepoint_does_not_swallow_later_changes(self):
+        with mock.patch('data.signals.schedule_prewarm') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    create_hotspot_alert(create_hotspot('H-1'), self.aoi, self.day)
+                    raise RuntimeError
+                create_hotspot_alert(create_hotspot('H-2', lon=110.5), self.aoi, self.day)
+        schedule.assert_called_once()
+        self.assertEqual([change[2][0] for change in schedule.call_args.args[0]], [110.5])
+
+
+class TileEtagTest(TestCase):
+    """Tile yang datanya belum berubah dijawab 304 tanpa render ulang"""
+
+    def setUp(self):
+        self.aoi = create_aoi()
+        self.token = create_token('user@example.com', self.aoi)
+        self.day = timezone.localdate()
+        create_hotspot_alert(create_hotspot('H-1'), self.aoi, self.day)
+        z, (x, y) = 12, lonlat_to_tile(110.0, -2.0, 12)
+        self.url = reverse('hotspotalert-tile', args=[z, x, y])
+
+    def _get(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(self.url, {'token': self.token}, **headers)
+
+    def test_token_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, {'token': 'salah'}).status_code, 403)
+
+    def test_unchanged_tile_is_not_modified(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with mock.patch('data.views.get_or_render_tiles') as render:
+            response = self._get(etag)
+        render.assert_not_called()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_new_alert_changes_etag(self):
+        etag = self._get()['ETag']
+        create_hotspot_alert(create_hotspot('H-2', lon=110.001), self.aoi, self.day)
+        response = self._get(etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_filters_change_etag(self):
+        etag = self._get()['ETag']
+        response = self.client.get(self.url, {'token': self.token, 'category': 'aman'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class TileDataVersionTest(TestCase):
+    """Trigger database menaikkan versi data layer per AOI"""
+
+    def setUp(self):
+        self.aoi = create_aoi()
+
+    def _version(self, layer):
+        row = TileDataVersion.objects.filter(layer=layer, area_of_interest_id=self.aoi.pk).first()
+        return row.version if row else 0
+
+    def test_alert_changes_bump_layer_version(self):
+        before = self._version('hotspotalert')
+        alert = create_hotspot_alert(create_hotspot('H-1'), self.aoi, timezone.localdate())
+        created = self._version('hotspotalert')
+        self.assertGreater(created, before)
+
+        alert.delete()
+        self.assertGreater(self._version('hotspotalert'), created)
+
+    def test_aoi_change_bumps_aoi_version(self):
+        before = self._version('aoi')
+        self.aoi.name = 'PT Contoh Baru'
+        self.aoi.save()
+        self.assertGreater(self._version('aoi'), before)
+
+
+class Geometry3857TriggerTest(TestCase):
+    """Kolom EPSG:3857 diisi dan diperbarui trigger database, termasuk untuk update di luar save()"""
+
+    def assertSameGeometry(self, geom, expected):
+        self.assertEqual(geom.srid, 3857)
+        self.assertTrue(geom.equals_exact(expected.transform(3857, clone=True), tolerance=0.01))
+
+    def test_aoi_geometry(self):
+        aoi = create_aoi()
+        aoi.refresh_from_db()
+        self.assertSameGeometry(aoi.geometry_3857, aoi.geometry)
+
+        moved = Polygon.from_bbox((100.0, 0.0, 101.0, 1.0))
+        AreaOfInterest.objects.filter(pk=aoi.pk).update(geometry=moved)
+        aoi.refresh_from_db()
+        self.assertSameGeometry(aoi.geometry_3857, moved)
+
+    def test_hotspot_geometry(self):
+        hotspot = create_hotspot('H-1')
+        hotspot.refresh_from_db()
+        self.assertSameGeometry(hotspot.geom_3857, Point(110.0, -2.0, srid=4326))
+
+    def test_deforestation_geometries(self):
+        alert = create_deforestation_alert('D-1', create_aoi(), timezone.localdate())
+        alert.refresh_from_db()
+        self.assertSameGeometry(alert.geom_3857, Polygon.from_bbox((110.0, -2.0, 110.01, -1.99)))
+        self.assertIsNotNone(alert.geom_3857_simplified)
+        self.assertTrue(alert.geom_3857.contains(alert.centroid_3857))
+
+
+class AlertDailyRollupTest(TestCase):
+    """Trigger rollup harus selalu sama dengan hasil rebuild dari tabel alert"""
+
+    def setUp(self):
+        self.aoi = create_aoi()
+        self.day = timezone.localdate() - timedelta(days=2)
+        self.alert = create_hotspot_alert(create_hotspot('H-1'), self.aoi, self.day, category='BAHAYA', confidence=80)
+        create_hotspot_alert(create_hotspot('H-2'), self.aoi, self.day, category='BAHAYA', confidence=60)
+        create_deforestation_alert('D-1', self.aoi, self.day, confidence=1, area=2.5)
+        create_deforestation_alert('D-2', self.aoi, self.day, confidence=7, area=4.0)
+
+    @staticmethod
+    def _rows(layer):
+        return sorted(AlertDailyRollup.objects.filter(layer=layer, count__gt=0).values_list(
+            'area_of_interest_id', 'day', 'bucket', 'source', 'count', 'area_sum', 'confidence_sum', 'confidence_count',
+        ))
+
+    def assertMatchesRebuild(self, layer):
+        rows = self._rows(layer)
+        rebuild_rollup(layer, self.day - timedelta(days=1), self.day + timedelta(days=1))
+        self.assertEqual(rows, self._rows(layer))
+
+    def test_insert(self):
+        self.assertEqual(self._rows('hotspotalert'), [(self.aoi.pk, self.day, 'BAHAYA', 'LAPAN', 2, 0, 140, 2)])
+        self.assertEqual([row[2:6] for row in self._rows('deforestation')], [('high', '', 1, 4), ('low', '', 1, 2.5)])
+        self.assertMatchesRebuild('hotspotalert')
+        self.assertMatchesRebuild('deforestation')
+
+    def test_update_moves_alert_to_other_bucket(self):
+        HotspotAlert.objects.filter(pk=self.alert.pk).update(category='AMAN', alert_date=self.day + timedelta(days=1))
+        self.assertEqual([(row[1], row[2], row[4]) for row in self._rows('hotspotalert')], [
+            (self.day, 'BAHAYA', 1), (self.day + timedelta(days=1), 'AMAN', 1),
+        ])
+        self.assertMatchesRebuild('hotspotalert')
+
+    def test_delete_removes_empty_rows(self):
+        HotspotAlert.objects.all().delete()
+        DeforestationAlerts.objects.filter(pk='D-1').delete()
+        self.assertFalse(AlertDailyRollup.objects.filter(layer='hotspotalert').exists())
+        self.assertEqual([row[2] for row in self._rows('deforestation')], ['high'])
+        self.assertMatchesRebuild('deforestation')
+
+
+class SingleFlightTest(SimpleTestCase):
+    """Render bersamaan dengan key sama dalam satu proses hanya berjalan sekali"""
+
+    def _run_concurrently(self, fn, followers=4):
+        flight, results = SingleFlight(), []
+        entered, waiting = threading.Event(), threading.Semaphore(0)
+
+        class CountingEvent(threading.Event):
+            def wait(self, timeout=None):
+                waiting.release()
+                return super().wait(timeout)
+
+        class CountingCall(singleflight._Call):
+            def __init__(self):
+                super().__init__()
+                self.event = CountingEvent()
+
+        def leader_fn():
+            # Tahan leader sampai semua follower menunggu hasil key yang sama
+            entered.set()
+            for _ in range(followers):
+                waiting.acquire(timeout=5)
+            return fn()
+
+        def call(f):
+            try:
+                results.append(flight.do('tile', f))
+            except BaseException as e:
+                results.append(e)
+
+        with mock.patch.object(singleflight, '_Call', CountingCall):
+            threads = [threading.Thread(target=call, args=(leader_fn,))]
+            threads[0].start()
+            entered.wait(5)
+            threads += [threading.Thread(target=call, args=(fn,)) for _ in range(followers)]
+            for thread in threads[1:]:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+        self.assertEqual(len(flight), 0)
+        return results
+
+    def test_identical_calls_run_once(self):
+        calls = []
+        results = self._run_concurrently(lambda: calls.append(1) or {'hotspotalert': ('gzip', b'tile')})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'hotspotalert': ('gzip', b'tile')}] * 5)
+
+    def test_error_is_shared_with_followers(self):
+        results = self._run_concurrently(mock.Mock(side_effect=ValueError('render gagal')))
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_aborted_leader_does_not_return_none(self):
+        results = self._run_concurrently(mock.Mock(side_effect=KeyboardInterrupt))
+        self.assertEqual(sum(isinstance(result, KeyboardInterrupt) for result in results), 1)
+        self.assertEqual(sum(isinstance(result, RuntimeError) for result in results), 4)
+
+    def test_sequential_calls_are_not_cached(self):
+        flight, fn = SingleFlight(), mock.Mock(return_value=1)
+        flight.do('tile', fn)
+        flight.do('tile', fn)
+        self.assertEqual(fn.call_count, 2)
+
+
+class _SharedTileCache:
+    """Cache tile bersama (seperti FileSystemTileCache) yang isinya bisa diisi worker lain"""
+    shared = True
+
+    def __init__(self, lock_timeout):
+        self.lock_timeout = lock_timeout
+        self.tiles = {}
+
+    def get(self, layer, z, x, y, variant):
+        return self.tiles.get(layer)
+
+    def set(self, layer, z, x, y, variant, encoding, data):
+        self.tiles[layer] = (encoding, data)
+
+
+class TileRenderLockTest(TestCase):
+    """Worker yang menunggu advisory lock render memakai tile yang dirender worker lain"""
+
+    key = 'hotspotalert/12/3300/2070/test'
+    tile = ('gzip', b'tile')
+
+    def _hold_lock(self, cache, release, fill):
+        """Tahan lock render di koneksi lain (worker lain) sampai release. Jika fill, tile diisi
+        ke cache lalu lock dilepas begitu ada worker yang menunggu lock"""
+        other = connections.create_connection('default')
+        try:
+            with other.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_lock(%s)", [tile_render_lock_id(self.key)])
+                self.locked.set()
+                while not release.wait(0.01):
+                    if not fill:
+                        continue
+                    cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND NOT granted)")
+                    if cursor.fetchone()[0]:
+                        cache.tiles['hotspotalert'] = self.tile
+                        break
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [tile_render_lock_id(self.key)])
+        finally:
+            other.close()
+
+    def _render(self, cache, fill=True):
+        self.locked, release = threading.Event(), threading.Event()
+        holder = threading.Thread(target=self._hold_lock, args=(cache, release, fill))
+        holder.start()
+        self.locked.wait(5)
+        try:
+            with mock.patch('data.tiles._render_compressed', return_value={'hotspotalert': ('gzip', b'baru')}) as render:
+                tiles = _render_and_cache(self.key, ['hotspotalert'], 12, 3300, 2070, [], {}, {'hotspotalert': 'v'}, cache)
+        finally:
+            release.set()
+            holder.join(5)
+        return tiles, render
+
+    def test_waiting_worker_uses_tile_from_lock_holder(self):
+        tiles, render = self._render(_SharedTileCache(lock_timeout=5))
+        render.assert_not_called()
+        self.assertEqual(tiles, {'hotspotalert': self.tile})
+
+    def test_lock_timeout_renders_anyway(self):
+        with self.assertLogs('data.tiles', 'WARNING'):
+            tiles, render = self._render(_SharedTileCache(lock_timeout=0.1), fill=False)
+        render.assert_called_once()
+        self.assertEqual(tiles, {'hotspotalert': ('gzip', b'baru')})
+
+
+class AnalyticsAPITestCase(APITestCase):
+    """User dengan dua AOI (PT Satu, PT Dua) dan satu AOI milik user lain, alert Juli-Agustus 2024"""
+
+    def setUp(self):
+        clear_analytics_cache()
+        self.first = create_aoi('PT Satu')
+        self.second = create_aoi('PT Dua')
+        other = create_aoi('PT Lain')
+        self.user = Users.objects.create_user(email='user@example.com')
+        self.user.areas_of_interest.set([self.first, self.second])
+        self.client.force_authenticate(self.user)
+
+        create_hotspot_alert(create_hotspot('H-1'), self.first, date(2024, 7, 30), category='BAHAYA')
+        create_hotspot_alert(create_hotspot('H-2'), self.first, date(2024, 8, 5), category='AMAN')
+        create_hotspot_alert(create_hotspot('H-3'), self.second, date(2024, 8, 20), category='BAHAYA')
+        create_hotspot_alert(create_hotspot('H-4'), other, date(2024, 8, 20), category='WASPADA')
+        create_deforestation_alert('D-1', self.first, date(2024, 7, 30), confidence=1, area=2.5)
+        create_deforestation_alert('D-2', self.second, date(2024, 8, 5), confidence=7, area=4.0)
+        create_deforestation_alert('D-3', other, date(2024, 8, 5), confidence=3, area=9.0)
+
+    def _get(self, name, *args, **params):
+        params.setdefault('start_date', '2024-07-01')
+        params.setdefault('end_date', '2024-08-31')
+        return self.client.get(reverse(name, args=args), params)
+
+
+class ChartAPITest(AnalyticsAPITestCase):
+    def test_hotspot_chart_by_month(self):
+        response = self._get('hotspot-chart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {
+            'granularity': 'month',
+            'monthly_data': [
+                {'name': 'Jul 2024', 'value': 1, 'amt': 100},
+                {'name': 'Aug 2024', 'value': 2, 'amt': 200},
+            ],
+            'pie_data': [
+                {'name': 'AMAN', 'value': 1}, {'name': 'PERHATIAN', 'value': 0},
+                {'name': 'WASPADA', 'value': 0}, {'name': 'BAHAYA', 'value': 2},
+            ],
+        })
+
+    def test_hotspot_chart_by_week(self):
+        response = self._get('hotspot-chart', start_date='2024-07-29', end_date='2024-08-11', granularity='week')
+        self.assertEqual(response.data['monthly_data'], [
+            {'name': '2024-07-29', 'value': 1, 'amt': 100},
+            {'name': '2024-08-05', 'value': 1, 'amt': 100},
+        ])
+
+    def test_deforestation_chart(self):
+        response = self._get('deforestation-chart', granularity='day', start_date='2024-07-30', end_date='2024-07-31')
+        self.assertEqual(response.data['monthly_data'], [
+            {'name': '2024-07-30', 'value': 1, 'amt': 100},
+            {'name': '2024-07-31', 'value': 0, 'amt': 0},
+        ])
+        self.assertEqual([item['value'] for item in response.data['pie_data']], [1, 0, 0])
+
+    def test_invalid_params(self):
+        self.assertEqual(self._get('hotspot-chart', granularity='year').status_code, 400)
+        self.assertEqual(self._get('deforestation-chart', start_date='01-07-2024').status_code, 400)
+
+    def test_authentication_required(self):
+        self.client.force_authenticate(None)
+        self.assertIn(self._get('hotspot-chart').status_code, (401, 403))
+
+
+class CompanyTableAPITest(AnalyticsAPITestCase):
+    def test_hotspot_table(self):
+        response = self._get('company-table')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Total-Count'], '2')
+        self.assertEqual(response.data, [
+            {'name': 'PT Satu', 'total_events': 2, 'aman': 1, 'perhatian': 0, 'waspada': 0, 'bahaya': 1},
+            {'name': 'PT Dua', 'total_events': 1, 'aman': 0, 'perhatian': 0, 'waspada': 0, 'bahaya': 1},
+        ])
+
+    def test_sort_and_pagination(self):
+        response = self._get('company-table', sort='name', limit=1, offset=1)
+        self.assertEqual([row['name'] for row in response.data], ['PT Satu'])
+        self.assertEqual(response['X-Total-Count'], '2')
+
+        response = self._get('company-table', sort='aman', order='asc')
+        self.assertEqual([row['name'] for row in response.data], ['PT Dua', 'PT Satu'])
+
+    def test_page_after_last_row_keeps_total(self):
+        response = self._get('company-table', offset=5)
+        self.assertEqual(response.data, [])
+        self.assertEqual(response['X-Total-Count'], '2')
+
+    def test_deforestation_table(self):
+        response = self._get('deforestation-company-table', sort='total_area')
+        self.assertEqual(response.data, [
+            {'name': 'PT Dua', 'total_events': 1, 'total_area': 4.0, 'avg_confidence': 7.0},
+            {'name': 'PT Satu', 'total_events': 1, 'total_area': 2.5, 'avg_confidence': 1.0},
+        ])
+
+    def test_invalid_params(self):
+        for params in ({'sort': 'id'}, {'order': 'up'}, {'limit': '0'}, {'limit': 'semua'}, {'offset': '-1'}):
+            with self.subTest(params=params):
+                self.assertEqual(self._get('company-table', **params).status_code, 400)
+
+
+class DashboardAPITest(AnalyticsAPITestCase):
+    def test_bundle_matches_panel_endpoints(self):
+        for dashboard, endpoints in (
+            ('hotspot-dashboard', ('hotspot-stats', 'hotspot-chart', 'company-table', 'event-list')),
+            ('deforestation-dashboard', (
+                'deforestation-stats', 'deforestation-chart', 'deforestation-company-table',
+                'deforestation-event-list',
+            )),
+        ):
+            with self.subTest(dashboard=dashboard):
+                params = {'granularity': 'week', 'sort': 'name', 'limit': 1, 'page_size': 2}
+                bundle = self._get(dashboard, **params).json()
+                stats, chart, company_table, event_list = (self._get(name, **params) for name in endpoints)
+
+                self.assertEqual(list(bundle), ['stats', 'chart', 'company_table', 'event_list'])
+                self.assertEqual(bundle['stats'], stats.json())
+                self.assertEqual(bundle['chart'], chart.json())
+                self.assertEqual(bundle['company_table'], {
+                    'data': company_table.json(), 'total_count': int(company_table['X-Total-Count']),
+                })
+                self.assertEqual(bundle['event_list'], event_list.json())
+
+    def test_selected_panels(self):
+        response = self._get('hotspot-dashboard', panels='event_list, stats', cursor='')
+        self.assertEqual(list(response.data), ['stats', 'event_list'])
+        self.assertEqual(len(response.data['event_list']['data']), 3)
+
+    def test_invalid_params(self):
+        for params in ({'panels': 'map'}, {'panels': 'chart', 'granularity': 'year'}, {'page_size': '0'}):
+            with self.subTest(params=params):
+                self.assertEqual(self._get('hotspot-dashboard', **params).status_code, 400)
+
+
+class AnalyticsCacheAPITest(AnalyticsAPITestCase):
+    """Hasil analytics di-cache per scope AOI dan rentang tanggal sampai data scope berubah"""
+
+    def _total(self):
+        return self._get('hotspot-stats').data['total_events']
+
+    def test_repeated_request_is_cached(self):
+        self.assertEqual(self._total(), 3)
+        self.assertEqual(self._total(), 3)
+        self.assertEqual((analytics_cache_stats()['hits'], analytics_cache_stats()['misses']), (1, 1))
+
+        self._get('hotspot-stats', start_date='2024-08-01')
+        self.assertEqual(analytics_cache_stats()['misses'], 2)
+
+    def test_new_alert_in_scope_is_visible(self):
+        self.assertEqual(self._total(), 3)
+        create_hotspot_alert(create_hotspot('H-5'), self.second, date(2024, 8, 21))
+        self.assertEqual(self._total(), 4)
+
+    def test_alert_outside_scope_keeps_cache(self):
+        self._total()
+        other = AreaOfInterest.objects.get(name='PT Lain')
+        create_hotspot_alert(create_hotspot('H-5'), other, date(2024, 8, 21))
+        self._total()
+        self.assertEqual(analytics_cache_stats()['hits'], 1)
+
+    def test_scope_is_part_of_key(self):
+        self.assertEqual(self._total(), 3)
+        user = Users.objects.create_user(email='satu@example.com')
+        user.areas_of_interest.set([self.first])
+        self.client.force_authenticate(user)
+        self.assertEqual(self._total(), 2)
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.assertEqual(self.client.get(reverse('analytics-cache-stats')).status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('analytics-cache-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['enabled'])
+
+
+class EventListAPITest(AnalyticsAPITestCase):
+    def test_cursor_pages_cover_all_events(self):
+        events, cursor = [], ''
+        while cursor is not None:
+            response = self._get('event-list', cursor=cursor, page_size=2, count='exact')
+            self.assertEqual(response.status_code, 200)
+            events += response.data['data']
+            cursor = response.data['pagination']['next_cursor']
+        self.assertEqual([event['hotspot_id'] for event in events], ['H-3', 'H-2', 'H-1'])
+        self.assertEqual(response.data['pagination']['total_count'], 3)
+
+    def test_page_mode(self):
+        response = self._get('deforestation-event-list', page=2, page_size=1)
+        self.assertEqual([event['event_id'] for event in response.data['data']], ['D-1'])
+        self.assertEqual(response.data['pagination']['total_count'], 2)
+        self.assertFalse(response.data['pagination']['has_next'])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self._get('event-list', cursor='rusak!').status_code, 400)
+
+
+class ExportAPITest(AnalyticsAPITestCase):
+    @staticmethod
+    def _content(response):
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv(self):
+        response = self._get('hotspot-alert-export', 'csv')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            response['Content-Disposition'], 'attachment; filename="hotspot-alerts-2024-07-01-2024-08-31.csv"',
+        )
+        rows = list(csv.DictReader(self._content(response).splitlines()))
+        self.assertEqual([row['hotspot_id'] for row in rows], ['H-3', 'H-2', 'H-1'])
+        self.assertEqual(rows[0]['aoi_name'], 'PT Dua')
+        self.assertNotIn('geometry', rows[0])
+
+    def test_ndjson_with_geometry(self):
+        response = self._get('hotspot-alert-export', 'ndjson', geom='true')
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['geometry'], {'type': 'Point', 'coordinates': [110, -2]})
+        self.assertEqual(rows[0]['alert_date'], '2024-08-20')
+
+    def test_geojson(self):
+        response = self._get('deforestation-alert-export', 'geojson')
+        collection = json.loads(self._content(response))
+        self.assertEqual(collection['type'], 'FeatureCollection')
+        self.assertEqual([feature['properties']['event_id'] for feature in collection['features']], ['D-2', 'D-1'])
+        self.assertEqual(collection['features'][0]['geometry']['type'], 'Polygon')
+
+    def test_aoi_filter_cannot_widen_scope(self):
+        other = AreaOfInterest.objects.get(name='PT Lain')
+        response = self._get('hotspot-alert-export', 'ndjson', aoi_id=f"{self.first.pk},{other.pk}")
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual([row['hotspot_id'] for row in rows], ['H-2', 'H-1'])
+
+    def test_invalid_params(self):
+        self.assertEqual(self._get('hotspot-alert-export', 'xlsx').status_code, 404)
+        self.assertEqual(self._get('hotspot-alert-export', 'csv', aoi_id='bukan-uuid').status_code, 400)
+
+
+class MemoryTileCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = MemoryTileCache({'MAX_ENTRIES': 3, 'MAX_ZOOM': 14})
+        self.tile = ('gzip', b'tile')
+
+    def test_delete_tile_removes_all_variants(self):
+        self.cache.set('hotspotalert', 12, 3300, 2070, 'a', *self.tile)
+        self.cache.set('hotspotalert', 12, 3300, 2070, 'b', *self.tile)
+        self.cache.delete_tile('hotspotalert', 12, 3300, 2070)
+        self.assertIsNone(self.cache.get('hotspotalert', 12, 3300, 2070, 'a'))
+        self.assertIsNone(self.cache.get('hotspotalert', 12, 3300, 2070, 'b'))
+
+    def test_invalidate_bbox(self):
+        z, (x, y) = 12, lonlat_to_tile(110.0, -2.0, 12)
+        far_x, far_y = lonlat_to_tile(120.0, -2.0, 12)
+        self.cache.set('hotspotalert', z, x, y, 'a', *self.tile)
+        self.cache.set('aoi', z, x, y, 'a', *self.tile)
+        self.cache.set('hotspotalert', z, far_x, far_y, 'a', *self.tile)
+
+        self.assertEqual(self.cache.invalidate_bbox((109.99, -2.01, 110.01, -1.99), ['hotspotalert']), 1)
+        self.assertIsNone(self.cache.get('hotspotalert', z, x, y, 'a'))
+        self.assertEqual(self.cache.get('aoi', z, x, y, 'a'), self.tile)
+        self.assertEqual(self.cache.get('hotspotalert', z, far_x, far_y, 'a'), self.tile)
+
+    def test_evicted_entries_leave_index(self):
+        for x in range(5):
+            self.cache.set('hotspotalert', 12, x, 0, 'a', *self.tile)
+        self.assertEqual(len(self.cache._index), 3)
+        self.assertIsNone(self.cache.get('hotspotalert', 12, 0, 0, 'a'))
+
+
+class TileCacheVersionTest(TestCase):
+    """Tile di cache tidak dipakai lagi setelah ingest di sekitarnya, tanpa invalidasi manual"""
+
+    def setUp(self):
+        self.aoi = create_aoi()
+        self.aoi_ids = [str(self.aoi.pk)]
+        self.day = timezone.localdate()
+        self.tile = (12, *lonlat_to_tile(110.0, -2.0, 12))
+        create_hotspot_alert(create_hotspot('H-1'), self.aoi, self.day)
+        self.cache = MemoryTileCache({})
+        patcher = mock.patch('data.tiles.get_tile_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _features(self):
+        versions = tile_versions(['hotspotalert'], *self.tile, self.aoi_ids)
+        with mock.patch('data.tiles.render_tiles', wraps=render_tiles) as render:
+            tile = get_or_render_tiles(['hotspotalert'], *self.tile, self.aoi_ids, {}, versions)['hotspotalert']
+        return layer_feature_counts(decompress_tile(*tile)).get('hotspot_alerts', 0), render.call_count
+
+    def test_cached_until_nearby_ingest(self):
+        self.assertEqual(self._features(), (1, 1))
+        self.assertEqual(self._features(), (1, 0))
+
+        create_hotspot_alert(create_hotspot('H-2', lon=110.001), self.aoi, self.day)
+        self.assertEqual(self._features(), (2, 1))
+
+
+@override_settings(HOTSPOT_CLUSTER={'MAX_ZOOM': 8, 'GRID': 'square', 'CELLS_PER_TILE': 2})
+class HotspotClusterCellTest(TestCase):
+    """Sel cluster square dihitung dari origin tile: dengan 2 sel per sisi, sel = kuadran tile"""
+
+    def setUp(self):
+        self.aoi = create_aoi()
+        self.day = timezone.localdate()
+        # Tile z8 ini mencakup bujur 109.6875 - 111.09375, tengahnya 110.390625
+        self.tile = (8, *lonlat_to_tile(110.0, -2.0, 8))
+
+    def _cluster_count(self, *lons):
+        for i, lon in enumerate(lons):
+            create_hotspot_alert(create_hotspot(f'H-{i}', lon=lon), self.aoi, self.day)
+        tile = render_tiles(['hotspotalert'], *self.tile, [str(self.aoi.pk)], {})['hotspotalert']
+        return layer_feature_counts(tile)['hotspot_alerts']
+
+    def test_points_on_both_sides_of_tile_center_are_separate_cells(self):
+        self.assertEqual(self._cluster_count(110.38, 110.40), 2)
+
+    def test_points_in_one_quadrant_are_merged(self):
+        self.assertEqual(self._cluster_count(109.8, 110.3), 1)
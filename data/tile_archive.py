@@ -0,0 +1,111 @@
+# data/tile_archive.py
+import logging
+import os
+import sqlite3
+
+from django.conf import settings
+
+from .tile_compression import GZIP, IDENTITY, compress_tile
+
+logger = logging.getLogger(__name__)
+
+# Skema mengikuti MBTiles (metadata + tiles, tile_row dalam skema TMS) dengan
+# tambahan kolom `layer` supaya tiga layer tile tersimpan dalam satu file per scope AOI.
+# Seperti MBTiles vektor pada umumnya, tile_data disimpan terkompresi gzip.
+# Kolom `version` menyimpan versi data tile (tiles.tile_versions) saat dirender.
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tiles (
+    layer TEXT NOT NULL,
+    zoom_level INTEGER NOT NULL,
+    tile_column INTEGER NOT NULL,
+    tile_row INTEGER NOT NULL,
+    tile_data BLOB NOT NULL,
+    version TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (layer, zoom_level, tile_column, tile_row)
+);
+"""
+
+
+def _tms_row(z, y):
+    return (2 ** z - 1) - y
+
+
+def get_archive_settings():
+    params = getattr(settings, 'TILE_ARCHIVE', None) or {}
+    return {
+        'LOCATION': params.get('LOCATION') or '',
+        'MIN_ZOOM': int(params.get('MIN_ZOOM', 4)),
+        'MAX_ZOOM': int(params.get('MAX_ZOOM', 12)),
+    }
+
+
+def archive_path(scope):
+    location = get_archive_settings()['LOCATION']
+    return os.path.join(location, f"{scope}.mbtiles") if location else None
+
+
+class TileArchiveWriter:
+    """Menulis arsip tile ke file sementara lalu mengganti file lama secara atomik saat close()"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self.conn = sqlite3.connect(self.tmp_path)
+        self.conn.executescript(SCHEMA_SQL)
+        self.set_metadata(compression=GZIP)
+
+    def set_metadata(self, **values):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)",
+            [(k, str(v)) for k, v in values.items()],
+        )
+
+    def write_tiles(self, rows):
+        """rows: iterable (layer, z, x, y, data, version) dengan data MVT mentah. Tile kosong disimpan sebagai blob kosong"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO tiles (layer, zoom_level, tile_column, tile_row, tile_data, version) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(layer, z, x, _tms_row(z, y), sqlite3.Binary(compress_tile(data, GZIP)[1]), str(version))
+             for layer, z, x, y, data, version in rows],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.close()
+        os.replace(self.tmp_path, self.path)
+
+
+def read_archived_tile(scope, layer, z, x, y, version=None):
+    """Tile (encoding, data) dari arsip scope, None jika arsip/tile tidak ada (harus dirender live).
+
+    Jika `version` diberikan, tile arsip hanya dipakai bila versi datanya saat dirender sama;
+    tile di sekitar ingest (termasuk di luar ORM) dirender live sampai arsip dibuat ulang.
+    """
+    params = get_archive_settings()
+    if not params['LOCATION'] or not params['MIN_ZOOM'] <= z <= params['MAX_ZOOM']:
+        return None
+    path = archive_path(scope)
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = conn.execute(
+                "SELECT tile_data, version FROM tiles WHERE layer = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (layer, z, x, _tms_row(z, y)),
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to read tile archive {path}: {str(e)}")
+        return None
+    if row is None or (version is not None and row[1] != str(version)):
+        return None
+    return (GZIP, bytes(row[0])) if row[0] else (IDENTITY, b'')
+
@@ -0,0 +1,318 @@
+# data/tile_cache.py
+import hashlib
+import logging
+import math
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .lru import TTLLRUCache
+from .tile_compression import IDENTITY, get_tile_encoding
+
+logger = logging.getLogger(__name__)
+
+TILE_LAYERS = ('aoi', 'hotspotalert', 'deforestation')
+
+# Zoom grid region untuk versi data per lokasi (TileRegionVersion). Harus sama dengan
+# fungsi data_tile_region_index di migrasi 0021
+TILE_REGION_ZOOM = 8
+# Buffer ST_AsMVTGeom (64 dari extent 4096) dalam satuan tile
+TILE_BUFFER = 64 / 4096
+
+# Ekstensi file cache per content-encoding tile
+TILE_FILE_EXTENSIONS = {IDENTITY: '.mvt', 'gzip': '.mvt.gz', 'br': '.mvt.br'}
+
+_tile_cache = None
+_tile_cache_loaded = False
+
+
+def lonlat_to_tile(lon, lat, z):
+    """Konversi koordinat WGS84 ke indeks tile XYZ pada zoom z"""
+    lat = max(min(lat, 85.0511287798), -85.0511287798)
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def bbox_tile_ranges(bbox, min_zoom, max_zoom):
+    """Rentang indeks tile {z: (x0, y0, x1, y1)} yang menutupi bbox (minx, miny, maxx, maxy) dalam derajat"""
+    minx, miny, maxx, maxy = bbox
+    return {
+        z: lonlat_to_tile(minx, maxy, z) + lonlat_to_tile(maxx, miny, z)
+        for z in range(min_zoom, max_zoom + 1)
+    }
+
+
+def tile_region_range(z, x, y):
+    """Rentang region (x0, y0, x1, y1) pada TILE_REGION_ZOOM yang menutupi tile z/x/y beserta buffernya"""
+    n = 2 ** TILE_REGION_ZOOM
+    scale = 2.0 ** (TILE_REGION_ZOOM - z)
+
+    def clamp(value):
+        return min(max(int(math.floor(value)), 0), n - 1)
+
+    return (
+        clamp((x - TILE_BUFFER) * scale), clamp((y - TILE_BUFFER) * scale),
+        clamp((x + 1 + TILE_BUFFER) * scale), clamp((y + 1 + TILE_BUFFER) * scale),
+    )
+
+
+def tiles_for_bbox(bbox, min_zoom, max_zoom):
+    """Semua tile (z, x, y) yang menutupi bbox (minx, miny, maxx, maxy) dalam derajat"""
+    for z, (x0, y0, x1, y1) in bbox_tile_ranges(bbox, min_zoom, max_zoom).items():
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield z, x, y
+
+
+def geometry_extent(geom):
+    """Extent geometry dalam EPSG:4326, atau None jika geometry kosong"""
+    if geom is None or geom.empty:
+        return None
+    if geom.srid and geom.srid != 4326:
+        geom = geom.transform(4326, clone=True)
+    return geom.extent
+
+
+def tile_variant(aoi_ids, filters=None):
+    """Kunci varian tile: hash dari himpunan AOI user dan filter yang sudah dinormalisasi"""
+    raw = ','.join(sorted(str(aoi_id) for aoi_id in aoi_ids))
+    if filters:
+        raw += '|' + '&'.join(f"{k}={filters[k]}" for k in sorted(filters) if filters[k] is not None)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+
+class BaseTileCache:
+    """Interface cache tile MVT. Entry dikelompokkan per (layer, z, x, y) agar bisa dihapus per bbox.
+
+    Tile disimpan dan dikembalikan sebagai (encoding, data) yang sudah dikompresi.
+    """
+    # True jika isi cache terlihat oleh semua worker process
+    shared = False
+
+    def __init__(self, params):
+        self.timeout = int(params.get('TIMEOUT', 86400))
+        self.max_zoom = int(params.get('MAX_ZOOM', 16))
+        # Detik menunggu worker lain yang sedang merender tile yang sama (0 = tidak menunggu)
+        self.lock_timeout = float(params.get('LOCK_TIMEOUT', 10))
+
+    def is_cacheable(self, z):
+        return z <= self.max_zoom
+
+    def get(self, layer, z, x, y, variant):
+        raise NotImplementedError
+
+    def set(self, layer, z, x, y, variant, encoding, data):
+        raise NotImplementedError
+
+    def delete_tile(self, layer, z, x, y):
+        """Hapus semua varian dari satu tile"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def purge(self, max_age=None, max_size=None):
+        """Buang entry kedaluwarsa/terlama; hanya perlu untuk backend tanpa batas ukuran sendiri"""
+        return 0
+
+    def invalidate_bbox(self, bbox, layers=TILE_LAYERS):
+        """Hapus tile yang menutupi bbox untuk layer tertentu, mulai zoom 0 sampai MAX_ZOOM.
+
+        Dipanggil di on_commit pada thread request; backend sebaiknya meng-override ini
+        agar biayanya tidak sebanding dengan jumlah tile di bbox.
+        """
+        if bbox is None:
+            return 0
+        count = 0
+        for z, x, y in tiles_for_bbox(bbox, 0, self.max_zoom):
+            for layer in layers:
+                self.delete_tile(layer, z, x, y)
+            count += 1
+        return count
+
+
+class FileSystemTileCache(BaseTileCache):
+    """Tile disimpan di LOCATION/<layer>/<z>/<x>/<y>/<variant>.mvt[.gz|.br], bisa dipakai bersama antar worker"""
+    shared = True
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.location = params['LOCATION']
+
+    def _tile_dir(self, layer, z, x, y):
+        return os.path.join(self.location, layer, str(z), str(x), str(y))
+
+    def get(self, layer, z, x, y, variant):
+        tile_dir = self._tile_dir(layer, z, x, y)
+        # Tile kosong selalu disimpan tanpa kompresi
+        for encoding in dict.fromkeys((get_tile_encoding(), IDENTITY)):
+            path = os.path.join(tile_dir, f"{variant}{TILE_FILE_EXTENSIONS[encoding]}")
+            try:
+                if self.timeout and os.path.getmtime(path) + self.timeout < time.time():
+                    self._unlink(path)
+                    return None
+                with open(path, 'rb') as f:
+                    return encoding, f.read()
+            except OSError:
+                continue
+        return None
+
+    def set(self, layer, z, x, y, variant, encoding, data):
+        tile_dir = self._tile_dir(layer, z, x, y)
+        try:
+            os.makedirs(tile_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=tile_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(tile_dir, f"{variant}{TILE_FILE_EXTENSIONS[encoding]}"))
+        except OSError as e:
+            logger.warning(f"Failed to write tile cache {layer}/{z}/{x}/{y}: {str(e)}")
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def delete_tile(self, layer, z, x, y):
+        shutil.rmtree(self._tile_dir(layer, z, x, y), ignore_errors=True)
+
+    def clear(self):
+        for layer in TILE_LAYERS:
+            shutil.rmtree(os.path.join(self.location, layer), ignore_errors=True)
+
+    def invalidate_bbox(self, bbox, layers=TILE_LAYERS):
+        """Tidak menelusuri tile per tile: kunci varian memuat versi region di sekitar tile
+        (lihat tiles.tile_versions), jadi hanya tile di sekitar perubahan yang tidak terbaca lagi.
+        File lama dibuang oleh purge()"""
+        return 0
+
+    def purge(self, max_age=None, max_size=None):
+        """Hapus file yang lebih tua dari `max_age` detik (termasuk varian versi lama dan file .tmp
+        yang tertinggal), lalu file terlama sampai total ukuran <= `max_size` byte.
+
+        Varian dengan versi data lama tidak pernah dibaca lagi setelah ingest, jadi hanya
+        terhapus lewat purge ini. Mengembalikan jumlah file yang dihapus.
+        """
+        now = time.time()
+        removed = 0
+        files = []
+        for layer in TILE_LAYERS:
+            layer_dir = os.path.join(self.location, layer)
+            for root, _dirs, names in os.walk(layer_dir, topdown=False):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    if max_age is not None and stat.st_mtime + max_age < now:
+                        removed += self._unlink(path)
+                    else:
+                        files.append((stat.st_mtime, stat.st_size, path))
+                if root != layer_dir:
+                    # Direktori tile yang sudah kosong ikut dihapus
+                    try:
+                        os.rmdir(root)
+                    except OSError:
+                        pass
+
+        if max_size is not None:
+            total = sum(size for _mtime, size, _path in files)
+            for _mtime, size, path in sorted(files):
+                if total <= max_size:
+                    break
+                removed += self._unlink(path)
+                total -= size
+        return removed
+
+
+class MemoryTileCache(BaseTileCache):
+    """LRU in-memory per proses. Cocok untuk single worker atau sebagai cache level pertama"""
+
+    def __init__(self, params):
+        super().__init__(params)
+        self._index = {}
+        self._cache = TTLLRUCache(
+            max_entries=int(params.get('MAX_ENTRIES', 10000)),
+            timeout=self.timeout,
+            on_evict=self._forget,
+        )
+
+    def _forget(self, key):
+        # Dipanggil TTLLRUCache saat lock sudah dipegang
+        variants = self._index.get(key[:4])
+        if variants is not None:
+            variants.discard(key[4])
+            if not variants:
+                self._index.pop(key[:4], None)
+
+    def get(self, layer, z, x, y, variant):
+        return self._cache.get((layer, z, x, y, variant))
+
+    def set(self, layer, z, x, y, variant, encoding, data):
+        with self._cache.lock:
+            self._index.setdefault((layer, z, x, y), set()).add(variant)
+            self._cache.set((layer, z, x, y, variant), (encoding, data))
+
+    def delete_tile(self, layer, z, x, y):
+        with self._cache.lock:
+            for variant in list(self._index.get((layer, z, x, y), ())):
+                self._cache.delete((layer, z, x, y, variant))
+
+    def clear(self):
+        with self._cache.lock:
+            self._cache.clear()
+            self._index.clear()
+
+    def invalidate_bbox(self, bbox, layers=TILE_LAYERS):
+        """Periksa tile yang ada di index saja, sehingga biayanya dibatasi MAX_ENTRIES
+        berapa pun luas bbox-nya"""
+        if bbox is None:
+            return 0
+        ranges = bbox_tile_ranges(bbox, 0, self.max_zoom)
+        stale = set()
+        with self._cache.lock:
+            for layer, z, x, y in list(self._index):
+                bounds = ranges.get(z)
+                if layer in layers and bounds and bounds[0] <= x <= bounds[2] and bounds[1] <= y <= bounds[3]:
+                    stale.add((layer, z, x, y))
+            for key in stale:
+                self.delete_tile(*key)
+        return len({key[1:] for key in stale})
+
+
+def get_tile_cache():
+    """Instance cache tile sesuai settings.TILE_CACHE, None jika cache dimatikan"""
+    global _tile_cache, _tile_cache_loaded
+    if not _tile_cache_loaded:
+        params = getattr(settings, 'TILE_CACHE', None) or {}
+        backend = params.get('BACKEND')
+        _tile_cache = import_string(backend)(params) if backend else None
+        _tile_cache_loaded = True
+    return _tile_cache
+
+
+def invalidate_tiles(bbox, layers=TILE_LAYERS):
+    """Evict tile yang terdampak perubahan data di dalam bbox dari cache in-memory.
+
+    Cache bersama dan arsip pre-render tidak perlu dievict: versi region di kunci/arsip sudah
+    berubah lewat trigger (atau tiles.bump_tile_region_versions untuk invalidasi manual).
+    """
+    if bbox is None:
+        return 0
+    cache = get_tile_cache()
+    if cache is None:
+        return 0
+    count = cache.invalidate_bbox(bbox, layers)
+    logger.debug(f"Invalidated {count} tiles for {layers} in bbox {bbox}")
+    return count
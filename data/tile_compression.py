@@ -0,0 +1,91 @@
+# data/tile_compression.py
+import gzip
+import logging
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # brotli opsional, fallback ke gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+IDENTITY = 'identity'
+GZIP = 'gzip'
+BROTLI = 'br'
+
+
+def get_tile_encoding():
+    """Encoding untuk menyimpan tile di cache, sesuai settings.TILE_COMPRESSION"""
+    encoding = getattr(settings, 'TILE_COMPRESSION', GZIP) or IDENTITY
+    if encoding == BROTLI and brotli is None:
+        logger.warning("TILE_COMPRESSION='br' but the brotli package is not installed, using gzip")
+        return GZIP
+    return encoding
+
+
+def compress_tile(data, encoding=None):
+    """Kompres tile sekali saat ditulis ke cache/arsip. Tile kosong tetap b'' (identity)"""
+    if not data:
+        return IDENTITY, b''
+    encoding = encoding or get_tile_encoding()
+    if encoding == GZIP:
+        return GZIP, gzip.compress(data, compresslevel=6, mtime=0)
+    if encoding == BROTLI:
+        return BROTLI, brotli.compress(data)
+    return IDENTITY, data
+
+
+def decompress_tile(encoding, data):
+    if not data or encoding == IDENTITY:
+        return data
+    if encoding == GZIP:
+        return gzip.decompress(data)
+    if encoding == BROTLI:
+        return brotli.decompress(data)
+    raise ValueError(f"Unknown tile encoding: {encoding}")
+
+
+def combine_tiles(parts):
+    """Gabungkan tile beberapa layer (list (encoding, data)) menjadi satu tile"""
+    parts = [(encoding, data) for encoding, data in parts if data]
+    if not parts:
+        return IDENTITY, b''
+    if len(parts) == 1:
+        return parts[0]
+    if all(encoding == IDENTITY for encoding, _data in parts):
+        return IDENTITY, b''.join(data for _encoding, data in parts)
+    # Layer MVT dengan nama berbeda bisa digabung dengan konkatenasi setelah didekompresi
+    return compress_tile(b''.join(decompress_tile(encoding, data) for encoding, data in parts))
+
+
+def accepted_encodings(header):
+    """Encoding yang diterima client dari header Accept-Encoding (q=0 diabaikan)"""
+    accepted = set()
+    for item in (header or '').split(','):
+        name, _sep, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _sep, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(name)
+    return accepted
+
+
+def encode_for_client(encoding, data, accept_encoding):
+    """Kirim tile apa adanya jika client menerima encoding-nya, selain itu didekompresi"""
+    if encoding == IDENTITY or not data:
+        return IDENTITY, data
+    accepted = accepted_encodings(accept_encoding)
+    if encoding in accepted or '*' in accepted:
+        return encoding, data
+    return IDENTITY, decompress_tile(encoding, data)
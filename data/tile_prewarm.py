@@ -0,0 +1,152 @@
+# data/tile_prewarm.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+from .tile_cache import get_tile_cache, tiles_for_bbox, tile_variant
+from .tiles import get_or_render_tiles, tile_versions, user_aoi_ids
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Perubahan yang menunggu dijadwalkan; digabung sampai job penjadwal berikutnya berjalan
+_pending_changes = set()
+_pending_scheduled = False
+_pending_lock = threading.Lock()
+
+
+def get_prewarm_settings():
+    params = getattr(settings, 'TILE_PREWARM', None) or {}
+    return {
+        'ENABLED': bool(params.get('ENABLED', False)),
+        'MIN_ZOOM': int(params.get('MIN_ZOOM', 5)),
+        'MAX_ZOOM': int(params.get('MAX_ZOOM', 12)),
+        'WORKERS': int(params.get('WORKERS', 2)),
+        'MAX_TILES': int(params.get('MAX_TILES', 5000)),
+        'CHUNK_SIZE': int(params.get('CHUNK_SIZE', 32)),
+        'WATERMARK_FILE': params.get('WATERMARK_FILE') or '',
+    }
+
+
+def dirty_tiles(changes, min_zoom, max_zoom):
+    """Tile yang perlu dirender ulang per scope AOI user.
+
+    changes: iterable (layer, aoi_id, bbox) dari alert baru. Hasil dict scope -> (aoi_ids, set (layer, z, x, y)).
+    """
+    from accounts.models import Users
+
+    by_aoi = {}
+    for layer, aoi_id, bbox in changes:
+        if bbox:
+            by_aoi.setdefault(str(aoi_id), []).append((layer, bbox))
+    if not by_aoi:
+        return {}
+
+    scopes = {}
+    users = Users.objects.filter(is_active=True, areas_of_interest__in=list(by_aoi)).distinct()
+    for user in users:
+        aoi_ids = user_aoi_ids(user)
+        scope = tile_variant(aoi_ids)
+        if scope in scopes:
+            continue
+        tiles = set()
+        for aoi_id in aoi_ids:
+            for layer, bbox in by_aoi.get(aoi_id, ()):
+                for z, x, y in tiles_for_bbox(bbox, min_zoom, max_zoom):
+                    tiles.add((layer, z, x, y))
+        scopes[scope] = (aoi_ids, tiles)
+    return scopes
+
+
+def _prewarm_jobs(changes, params):
+    """Pecah tile kotor menjadi job (aoi_ids, tiles) berukuran CHUNK_SIZE, zoom rendah lebih dulu.
+    Tile di atas MAX_TILES per scope dilewati agar ingest besar tidak membanjiri database."""
+    jobs = []
+    for aoi_ids, tiles in dirty_tiles(changes, params['MIN_ZOOM'], params['MAX_ZOOM']).values():
+        tiles = sorted(tiles, key=lambda t: (t[1], t[0], t[2], t[3]))
+        if len(tiles) > params['MAX_TILES']:
+            logger.info(f"Prewarm limited to {params['MAX_TILES']} of {len(tiles)} dirty tiles")
+            tiles = tiles[:params['MAX_TILES']]
+        size = params['CHUNK_SIZE']
+        jobs += [(aoi_ids, tiles[i:i + size]) for i in range(0, len(tiles), size)]
+    return jobs
+
+
+def _warm_chunk(job):
+    """Render satu chunk tile ke cache. Dijalankan di thread pool dengan koneksi database sendiri"""
+    aoi_ids, tiles = job
+    try:
+        for layer, z, x, y in tiles:
+            versions = tile_versions([layer], z, x, y, aoi_ids)
+            get_or_render_tiles([layer], z, x, y, aoi_ids, None, versions)
+        return len(tiles)
+    except Exception:
+        logger.exception("Failed to prewarm tiles")
+        return 0
+    finally:
+        connection.close()
+
+
+def prewarm_tiles(changes, workers=None, min_zoom=None, max_zoom=None):
+    """Render ulang tile yang terdampak alert baru ke tile cache memakai thread pool terbatas.
+    Mengembalikan jumlah tile yang diproses"""
+    params = get_prewarm_settings()
+    if min_zoom is not None:
+        params['MIN_ZOOM'] = min_zoom
+    if max_zoom is not None:
+        params['MAX_ZOOM'] = max_zoom
+    if get_tile_cache() is None:
+        return 0
+    jobs = _prewarm_jobs(changes, params)
+    if not jobs:
+        return 0
+    with ThreadPoolExecutor(max_workers=workers or params['WORKERS']) as pool:
+        return sum(pool.map(_warm_chunk, jobs))
+
+
+def _get_executor(workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tile-prewarm')
+        return _executor
+
+
+def schedule_prewarm(changes):
+    """Prewarm di background thread proses ini, dipanggil setelah transaksi commit.
+
+    changes: iterable (layer, aoi_id, bbox). Perubahan dari commit yang masuk sebelum job
+    penjadwal berjalan digabung dalam satu job, sehingga tile yang sama hanya dirender sekali
+    walaupun ingest menyimpan alert satu per satu.
+    """
+    global _pending_scheduled
+    params = get_prewarm_settings()
+    if not params['ENABLED'] or get_tile_cache() is None:
+        return
+    executor = _get_executor(params['WORKERS'])
+    with _pending_lock:
+        _pending_changes.update(changes)
+        if _pending_scheduled:
+            return
+        _pending_scheduled = True
+
+    def submit_jobs():
+        global _pending_scheduled
+        with _pending_lock:
+            changes = list(_pending_changes)
+            _pending_changes.clear()
+            _pending_scheduled = False
+        try:
+            for job in _prewarm_jobs(changes, params):
+                executor.submit(_warm_chunk, job)
+        except Exception:
+            logger.exception("Failed to schedule tile prewarm")
+        finally:
+            connection.close()
+
+    executor.submit(submit_jobs)
@@ -0,0 +1,797 @@
+# data/tiles.py
+import hashlib
+import logging
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from dateutil.parser import parse as dateparse
+
+from django.conf import settings
+from django.db import connection, transaction, OperationalError
+from django.utils import timezone
+
+from .lru import TTLLRUCache
+from .singleflight import SingleFlight
+from .tile_cache import get_tile_cache, tile_region_range, tile_variant, TILE_LAYERS
+from .tile_archive import read_archived_tile
+from .tile_compression import compress_tile, decompress_tile
+from .mvt import merge_tiles
+
+logger = logging.getLogger(__name__)
+
+# Render tile identik yang berjalan bersamaan di proses ini digabung menjadi satu
+_render_flight = SingleFlight()
+# Versi per hari fragmen hotspot, kuncinya memuat tile dan versinya sehingga tidak pernah basi
+_day_versions_cache = TTLLRUCache(max_entries=1000, timeout=3600)
+
+
+# Level generalisasi geometry AOI: (zoom maksimum, toleransi ST_SimplifyPreserveTopology dalam meter).
+# Toleransi kira-kira satu unit grid MVT (extent 4096) pada zoom maksimum level tersebut.
+# Di atas zoom level terakhir tile memakai geometry penuh.
+AOI_GENERALIZATION_LEVELS = (
+    (6, 150.0),
+    (9, 20.0),
+    (11, 5.0),
+)
+
+
+def aoi_generalization_level(z):
+    """Index level generalisasi untuk zoom z, None jika harus memakai geometry penuh"""
+    for level, (max_zoom, _tolerance) in enumerate(AOI_GENERALIZATION_LEVELS):
+        if z <= max_zoom:
+            return level
+    return None
+
+
+def refresh_generalized_geometries(aoi_ids):
+    """Hitung ulang semua level geometry sederhana untuk AOI tertentu"""
+    aoi_ids = [str(aoi_id) for aoi_id in aoi_ids]
+    if not aoi_ids:
+        return
+    levels_sql = ', '.join(['(%s, %s)'] * len(AOI_GENERALIZATION_LEVELS))
+    levels_params = []
+    for level, (_max_zoom, tolerance) in enumerate(AOI_GENERALIZATION_LEVELS):
+        levels_params += [level, tolerance]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM data_areaofinterestgeneralized WHERE area_of_interest_id = ANY(%s::uuid[])",
+            [aoi_ids],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO data_areaofinterestgeneralized (area_of_interest_id, level, geom)
+            SELECT aoi.id, lv.level, ST_SimplifyPreserveTopology(aoi.geometry_3857, lv.tolerance)
+            FROM data_areaofinterest aoi
+            CROSS JOIN (VALUES {levels_sql}) AS lv(level, tolerance)
+            WHERE aoi.id = ANY(%s::uuid[])
+            AND aoi.geometry_3857 IS NOT NULL
+            AND ST_IsValid(aoi.geometry_3857)
+            """,
+            levels_params + [aoi_ids],
+        )
+
+
+def user_aoi_ids(user):
+    """Daftar id AOI milik user (string, terurut) sebagai scope tile"""
+    return sorted(str(aoi_id) for aoi_id in user.areas_of_interest.values_list('id', flat=True))
+
+
+def _aoi_tile_sql(z, x, y, aoi_ids, filters):
+    level = aoi_generalization_level(z)
+    if level is None:
+        source_sql = "aoi.geometry_3857"
+        valid_sql = "ST_IsValid(aoi.geometry_3857)"
+        join_sql = ""
+        join_params = []
+    else:
+        # Geometry sederhana hanya dibuat dari geometry yang valid. Fallback ke
+        # geometry penuh jika level generalisasi belum dihitung.
+        source_sql = "COALESCE(g.geom, aoi.geometry_3857)"
+        valid_sql = "(g.geom IS NOT NULL OR ST_IsValid(aoi.geometry_3857))"
+        join_sql = "LEFT JOIN data_areaofinterestgeneralized g ON g.area_of_interest_id = aoi.id AND g.level = %s"
+        join_params = [level]
+
+    sql = f"""
+        WITH
+        tile_bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        ),
+        mvtgeom AS (
+            SELECT
+                aoi.id,
+                aoi.name,
+                aoi.description,
+                aoi.fill_color,
+                aoi.stroke_color,
+                aoi.stroke_width,
+                ST_AsMVTGeom(
+                    {source_sql},
+                    tile_bounds.geom,
+                    4096,
+                    64,
+                    true
+                ) AS geom
+            FROM data_areaofinterest aoi
+            {join_sql}
+            CROSS JOIN tile_bounds
+            WHERE aoi.id = ANY(%s::uuid[])
+            AND ST_Intersects({source_sql}, tile_bounds.geom)
+            AND {valid_sql}
+        )
+        SELECT ST_AsMVT(mvtgeom.*, 'layer', 4096, 'geom') FROM mvtgeom
+        """
+    return sql, [z, x, y] + join_params + [aoi_ids]
+
+
+# Panjang sisi tile EPSG:3857 pada zoom 0 (meter)
+WEB_MERCATOR_WORLD_SIZE = 40075016.685578488
+
+HOTSPOT_CATEGORY_RANKS = ('AMAN', 'PERHATIAN', 'WASPADA', 'BAHAYA')
+
+
+def get_hotspot_cluster_settings():
+    params = getattr(settings, 'HOTSPOT_CLUSTER', None) or {}
+    return {
+        'MAX_ZOOM': int(params.get('MAX_ZOOM', 8)),
+        'GRID': params.get('GRID', 'square'),
+        'CELLS_PER_TILE': int(params.get('CELLS_PER_TILE', 32)),
+    }
+
+
+def _hotspotalert_cluster_sql(z, x, y, aoi_ids, filters, filter_sql, filter_params):
+    """Agregasi alert per sel grid (square/hex) untuk zoom rendah, satu fitur titik per sel"""
+    params = get_hotspot_cluster_settings()
+    cell_size = WEB_MERCATOR_WORLD_SIZE / (2 ** z) / params['CELLS_PER_TILE']
+    rank_sql = "CASE alerts.category " + " ".join(
+        f"WHEN '{category}' THEN {rank}" for rank, category in enumerate(HOTSPOT_CATEGORY_RANKS)
+    ) + " ELSE 0 END"
+    categories_sql = "ARRAY[" + ", ".join(f"'{category}'" for category in HOTSPOT_CATEGORY_RANKS) + "]"
+
+    if params['GRID'] == 'hex':
+        # Sel heksagon global (origin 0,0) sehingga konsisten antar tile. Grid dibangun di sekitar
+        # titik saja dan ORDER BY ... LIMIT 1 memastikan titik di tepi/sudut heksagon selalu masuk
+        # sel yang sama, seperti density._cell_sql
+        cell_sql = """CROSS JOIN LATERAL (
+                SELECT hex.i, hex.j FROM ST_HexagonGrid(%s, h.geom_3857) AS hex
+                WHERE ST_Intersects(hex.geom, h.geom_3857) ORDER BY hex.i, hex.j LIMIT 1
+            ) cell"""
+        cell_key_sql = "cell.i, cell.j"
+        cell_params = [cell_size]
+        key_params = []
+    else:
+        # Indeks sel dihitung dari origin tile (floor), jadi sel selalu berada di dalam tile dan
+        # tidak terpotong tepi tile. Titik tepat di tepi kanan/bawah tile masuk sel terakhir
+        cells = params['CELLS_PER_TILE']
+        cell_sql = ""
+        cell_key_sql = (
+            "LEAST(FLOOR((ST_X(h.geom_3857) - ST_XMin(tile_bounds.geom)) / %s), %s), "
+            "LEAST(FLOOR((ST_YMax(tile_bounds.geom) - ST_Y(h.geom_3857)) / %s), %s)"
+        )
+        cell_params = []
+        key_params = [cell_size, cells - 1, cell_size, cells - 1]
+
+    sql = f"""
+        WITH tile_bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        ),
+        clusters AS (
+            SELECT
+                COUNT(*) AS count,
+                MAX({rank_sql}) AS max_rank,
+                MAX(COALESCE(alerts.confidence, 0)) AS max_confidence,
+                ST_Centroid(ST_Collect(h.geom_3857)) AS center
+            FROM data_hotspotalert alerts
+            JOIN data_hotspots h ON alerts.hotspot_id = h.id
+            CROSS JOIN tile_bounds
+            {cell_sql}
+            WHERE alerts.area_of_interest_id = ANY(%s::uuid[])
+            AND ST_Intersects(h.geom_3857, tile_bounds.geom)
+            {filter_sql}
+            GROUP BY {cell_key_sql}
+        ),
+        mvtgeom AS (
+            SELECT
+                clusters.count,
+                ({categories_sql})[clusters.max_rank + 1] AS max_category,
+                clusters.max_confidence,
+                ST_AsMVTGeom(
+                    clusters.center,
+                    tile_bounds.geom,
+                    4096,
+                    64,
+                    true
+                ) AS geom
+            FROM clusters
+            CROSS JOIN tile_bounds
+        )
+        SELECT ST_AsMVT(mvtgeom.*, 'hotspot_alerts', 4096, 'geom') FROM mvtgeom
+        """
+    return sql, [z, x, y] + cell_params + [aoi_ids] + filter_params + key_params
+
+
+def _hotspotalert_points_sql(filter_sql):
+    """CTE tile_bounds + mvtgeom berisi titik hotspot alert individual di dalam tile"""
+    return f"""
+        WITH tile_bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        ),
+        mvtgeom AS (
+            SELECT
+                alerts.id,
+                alerts.alert_date,
+                alerts.category,
+                COALESCE(alerts.confidence, 0) AS confidence,
+                alerts.distance,
+                alerts.hotspot_id,
+                aois.name AS area_of_interest_name,
+                ST_AsMVTGeom(
+                    h.geom_3857,
+                    tile_bounds.geom,
+                    4096,
+                    64,
+                    true
+                ) AS geom
+            FROM data_hotspotalert alerts
+            JOIN data_hotspots h ON alerts.hotspot_id = h.id
+            JOIN data_areaofinterest aois ON alerts.area_of_interest_id = aois.id
+            CROSS JOIN tile_bounds
+            WHERE alerts.area_of_interest_id = ANY(%s::uuid[])
+            AND ST_Intersects(h.geom_3857, tile_bounds.geom)
+            {filter_sql}
+        )
+        """
+
+
+def _alert_filter_sql(filters):
+    """Klausa WHERE tambahan untuk filter alert (tanggal, kategori, confidence minimum)"""
+    clauses = []
+    params = []
+    if filters.get('start') and filters.get('end'):
+        clauses.append("AND alerts.alert_date BETWEEN %s AND %s")
+        params += [filters['start'], filters['end']]
+    if filters.get('category'):
+        clauses.append("AND alerts.category = ANY(%s)")
+        params.append(list(filters['category']))
+    if filters.get('min_confidence') is not None:
+        clauses.append("AND COALESCE(alerts.confidence, 0) >= %s")
+        params.append(filters['min_confidence'])
+    return "\n            ".join(clauses), params
+
+
+def _hotspotalert_tile_sql(z, x, y, aoi_ids, filters):
+    filter_sql, filter_params = _alert_filter_sql(filters)
+
+    if z <= get_hotspot_cluster_settings()['MAX_ZOOM']:
+        return _hotspotalert_cluster_sql(z, x, y, aoi_ids, filters, filter_sql, filter_params)
+
+    sql = _hotspotalert_points_sql(filter_sql) + """
+        SELECT ST_AsMVT(mvtgeom.*, 'hotspot_alerts', 4096, 'geom') FROM mvtgeom
+        """
+    return sql, [z, x, y, aoi_ids] + filter_params
+
+
+def _hotspotalert_day_fragments_sql(z, x, y, aoi_ids, filters, days):
+    """Satu fragmen tile per tanggal alert dalam satu query (GROUP BY alert_date)"""
+    filter_sql, filter_params = _alert_filter_sql(filters)
+    sql = _hotspotalert_points_sql("AND alerts.alert_date = ANY(%s::date[])\n            " + filter_sql) + """
+        SELECT mvtgeom.alert_date, ST_AsMVT(mvtgeom.*, 'hotspot_alerts', 4096, 'geom')
+        FROM mvtgeom
+        GROUP BY mvtgeom.alert_date
+        """
+    return sql, [z, x, y, aoi_ids, list(days)] + filter_params
+
+
+# Toleransi (meter) geometry deforestation yang disederhanakan trigger database (migrasi 0016)
+DEFORESTATION_SIMPLIFY_TOLERANCE = 5.0
+
+
+def get_deforestation_tile_settings():
+    params = getattr(settings, 'DEFORESTATION_TILES', None) or {}
+    return {
+        'CENTROID_MAX_ZOOM': int(params.get('CENTROID_MAX_ZOOM', 9)),
+        'SIMPLIFIED_MAX_ZOOM': int(params.get('SIMPLIFIED_MAX_ZOOM', 12)),
+    }
+
+
+def _deforestation_tile_sql(z, x, y, aoi_ids, filters):
+    """Titik (ST_PointOnSurface) di zoom rendah, polygon disederhanakan di zoom menengah,
+    polygon penuh di zoom tinggi. Atribut sama di semua zoom"""
+    params = get_deforestation_tile_settings()
+    if z <= params['CENTROID_MAX_ZOOM']:
+        geom_sql = "alerts.centroid_3857"
+        valid_sql = ""
+    elif z <= params['SIMPLIFIED_MAX_ZOOM']:
+        geom_sql = "COALESCE(alerts.geom_3857_simplified, alerts.geom_3857)"
+        valid_sql = "AND ST_IsValid(alerts.geom_3857)"
+    else:
+        geom_sql = "alerts.geom_3857"
+        valid_sql = "AND ST_IsValid(alerts.geom_3857)"
+
+    filter_sql, filter_params = _alert_filter_sql(filters)
+    # Index spasial dipakai lewat kolom asli; centroid selalu di dalam polygon
+    intersects_column = "alerts.centroid_3857" if geom_sql == "alerts.centroid_3857" else "alerts.geom_3857"
+    sql = f"""
+        WITH tile_bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        ),
+        mvtgeom AS (
+            SELECT
+                alerts.id,
+                alerts.event_id,
+                alerts.alert_date,
+                alerts.confidence,
+                alerts.area,
+                alerts.company_id,
+                ST_AsMVTGeom(
+                    {geom_sql},
+                    tile_bounds.geom,
+                    4096,
+                    64,
+                    true
+                ) AS geom
+            FROM data_deforestationalerts alerts
+            CROSS JOIN tile_bounds
+            WHERE alerts.company_id = ANY(%s::uuid[])
+            AND ST_Intersects({intersects_column}, tile_bounds.geom)
+            {valid_sql}
+            {filter_sql}
+        )
+        SELECT ST_AsMVT(mvtgeom.*, 'deforestation_alerts', 4096, 'geom') FROM mvtgeom
+        """
+    return sql, [z, x, y, aoi_ids] + filter_params
+
+
+TILE_QUERIES = {
+    'aoi': _aoi_tile_sql,
+    'hotspotalert': _hotspotalert_tile_sql,
+    'deforestation': _deforestation_tile_sql,
+}
+
+# Filter yang dipakai tiap layer. Filter lain diabaikan agar tidak memecah kunci cache.
+LAYER_FILTER_KEYS = {
+    'aoi': (),
+    'hotspotalert': ('start', 'end', 'category', 'min_confidence'),
+    'deforestation': ('start', 'end', 'min_confidence'),
+}
+
+
+def layer_filters(layer, filters):
+    """Ambil hanya filter yang relevan untuk layer"""
+    filters = filters or {}
+    return {k: filters[k] for k in LAYER_FILTER_KEYS[layer] if filters.get(k) is not None}
+
+
+def get_hotspot_day_fragment_settings():
+    params = getattr(settings, 'HOTSPOT_DAY_FRAGMENTS', None) or {}
+    return {
+        'ENABLED': bool(params.get('ENABLED', True)),
+        'MAX_DAYS': int(params.get('MAX_DAYS', 92)),
+    }
+
+
+def _uses_day_fragments(layer, z, filters):
+    """Tile hotspot alert dengan rentang tanggal disusun dari fragmen harian yang di-cache,
+    kecuali di zoom cluster (jumlah per sel tidak bisa digabung dari tile per hari)"""
+    if layer != 'hotspotalert':
+        return False
+    filters = layer_filters(layer, filters)
+    if not filters.get('start') or not filters.get('end'):
+        return False
+    params = get_hotspot_day_fragment_settings()
+    days = (filters['end'] - filters['start']).days + 1
+    return (
+        params['ENABLED'] and 0 < days <= params['MAX_DAYS']
+        and z > get_hotspot_cluster_settings()['MAX_ZOOM']
+    )
+
+
+HOTSPOT_DAY_VERSIONS_SQL = """
+    SELECT day, SUM(version) FROM data_tiledayversion
+    WHERE layer = 'hotspotalert' AND area_of_interest_id = ANY(%s::uuid[]) AND day = ANY(%s::date[])
+    GROUP BY day
+"""
+
+
+def hotspot_day_versions(aoi_ids, days, memo_key=None):
+    """Versi data hotspot alert per hari untuk scope AOI dari TileDayVersion (dijaga trigger,
+    termasuk perubahan lokasi hotspot), ditambah versi layer AOI karena nama AOI ikut dirender.
+
+    Ingest untuk hari ini tidak mengubah versi hari lain, sehingga fragmen hari yang sudah
+    lewat tetap terpakai. `memo_key` (tile dan versinya) hanya dipakai sebagai kunci memo.
+    """
+    key = (tile_variant(aoi_ids), memo_key, tuple(days))
+    cached = _day_versions_cache.get(key) if memo_key is not None else None
+    if cached is not None:
+        return cached
+    with connection.cursor() as cursor:
+        cursor.execute(TILE_DATA_VERSIONS_SQL, tile_data_versions_params(['aoi'], aoi_ids))
+        aoi_version = tile_data_versions_from_rows(['aoi'], cursor.fetchall())['aoi']
+        cursor.execute(HOTSPOT_DAY_VERSIONS_SQL, [list(aoi_ids), list(days)])
+        day_versions = dict(cursor.fetchall())
+    day_versions = {day: f"{aoi_version}.{day_versions.get(day, 0)}" for day in days}
+    if memo_key is not None:
+        _day_versions_cache.set(key, day_versions)
+    return day_versions
+
+
+def render_hotspot_day_fragments(z, x, y, aoi_ids, filters, days):
+    """Render tile hotspot alert per hari, hasilnya dict tanggal -> bytes MVT (hari tanpa alert tidak ada)"""
+    if not aoi_ids or not days:
+        return {}
+    sql, params = _hotspotalert_day_fragments_sql(z, x, y, list(aoi_ids), filters, days)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {day: bytes(tile) if tile else b'' for day, tile in cursor.fetchall()}
+
+
+def parse_tile_filters(params):
+    """Filter tile yang sudah dinormalisasi dari query string, raise ValueError jika parameter tidak valid.
+
+    - startdate/enddate atau today=true: rentang tanggal alert (hotspot dan deforestation)
+    - aoi_id: satu atau beberapa id AOI (dipisah koma) untuk mempersempit scope AOI user
+    - category: kategori hotspot alert (dipisah koma), mis. BAHAYA,WASPADA
+    - min_confidence: confidence minimum 0-100 (hotspot dan deforestation)
+    """
+    filters = {}
+
+    # Ambil parameter waktu, dinormalisasi ke rentang tanggal agar bisa di-cache
+    startdate = params.get("startdate")
+    enddate = params.get("enddate")
+    today = params.get("today") == "true"
+    if today:
+        filters['start'] = filters['end'] = timezone.localdate()
+    elif startdate and enddate:
+        try:
+            filters['start'], filters['end'] = dateparse(startdate).date(), dateparse(enddate).date()
+        except Exception:
+            raise ValueError("Invalid startdate or enddate format. Use YYYY-MM-DD")
+
+    aoi_param = params.get("aoi_id")
+    if aoi_param:
+        try:
+            filters['aoi_ids'] = tuple(sorted({str(uuid.UUID(v.strip())) for v in aoi_param.split(',') if v.strip()}))
+        except ValueError:
+            raise ValueError("Invalid aoi_id. Use one or more comma separated AOI ids")
+
+    category_param = params.get("category")
+    if category_param:
+        categories = {v.strip().upper() for v in category_param.split(',') if v.strip()}
+        invalid = categories - set(HOTSPOT_CATEGORY_RANKS)
+        if invalid or not categories:
+            raise ValueError(f"Invalid category. Choose from: {', '.join(HOTSPOT_CATEGORY_RANKS)}")
+        # Urutan tetap agar kunci cache tidak bergantung urutan parameter
+        filters['category'] = tuple(c for c in HOTSPOT_CATEGORY_RANKS if c in categories)
+
+    min_confidence = params.get("min_confidence")
+    if min_confidence not in (None, ''):
+        try:
+            filters['min_confidence'] = int(min_confidence)
+        except ValueError:
+            filters['min_confidence'] = -1
+        if not 0 <= filters['min_confidence'] <= 100:
+            raise ValueError("Invalid min_confidence. Use an integer between 0 and 100")
+    return filters
+
+
+def scope_aoi_ids(aoi_ids, filters):
+    """Scope AOI tile setelah filter aoi_id; hanya AOI milik user yang bisa dipilih"""
+    selected = (filters or {}).get('aoi_ids')
+    if not selected:
+        return aoi_ids
+    return [aoi_id for aoi_id in aoi_ids if aoi_id in selected]
+
+
+# Segmen URL tile -> layer default, dipakai data/urls.py, jalur async dan tile bersama
+TILE_ROUTES = {
+    'user-aois': ('aoi',),
+    'hotspotalert': ('hotspotalert',),
+    'deforestation': ('deforestation',),
+    'combined': TILE_LAYERS,
+}
+
+
+def parse_tile_layers(param, default=TILE_LAYERS):
+    """Daftar layer dari parameter ?layers=, dalam urutan TILE_LAYERS"""
+    if not param:
+        return list(default)
+    layers = [layer.strip() for layer in param.split(',') if layer.strip()]
+    invalid = [layer for layer in layers if layer not in TILE_LAYERS]
+    if invalid or not layers:
+        raise ValueError(f"Invalid layers. Choose from: {', '.join(TILE_LAYERS)}")
+    # Urutan tetap agar ETag dan cache tidak bergantung urutan parameter
+    return [layer for layer in TILE_LAYERS if layer in layers]
+
+
+def route_tile_layers(route, param=None):
+    """Layer untuk segmen URL tile; hanya route 'combined' yang menerima ?layers="""
+    if route == 'combined':
+        return parse_tile_layers(param, TILE_ROUTES[route])
+    return list(TILE_ROUTES[route])
+
+
+def tile_render_sql(layers, z, x, y, aoi_ids, filters=None):
+    """Satu query yang merender semua layer sebagai kolom terpisah, hasilnya (sql, params)"""
+    subqueries = []
+    params = []
+    for layer in layers:
+        sql, layer_params = TILE_QUERIES[layer](z, x, y, list(aoi_ids), layer_filters(layer, filters))
+        subqueries.append(f"({sql})")
+        params += layer_params
+    return "SELECT " + ", ".join(subqueries), params
+
+
+def render_tiles(layers, z, x, y, aoi_ids, filters=None):
+    """Render beberapa layer dalam satu round trip, hasilnya dict layer -> bytes MVT"""
+    if not aoi_ids or not layers:
+        return {layer: b'' for layer in layers}
+
+    sql, params = tile_render_sql(layers, z, x, y, aoi_ids, filters)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return {layer: bytes(tile) if tile else b'' for layer, tile in zip(layers, row)}
+
+
+def render_tile(layer, z, x, y, aoi_ids, filters=None):
+    """Jalankan query ST_AsMVT untuk satu layer, hasilnya bytes (kosong jika tidak ada fitur)"""
+    return render_tiles([layer], z, x, y, aoi_ids, filters)[layer]
+
+
+TILE_DATA_VERSIONS_SQL = """
+    SELECT layer, COALESCE(SUM(version), 0) FROM data_tiledataversion
+    WHERE layer = ANY(%s) AND area_of_interest_id = ANY(%s::uuid[])
+    GROUP BY layer
+"""
+
+
+def tile_data_versions_params(layers, aoi_ids):
+    return [sorted(set(layers) | {'aoi'}), list(aoi_ids)]
+
+
+def tile_data_versions_from_rows(layers, rows):
+    versions = dict(rows)
+    return {
+        layer: '.'.join(str(versions.get(name, 0)) for name in sorted({layer, 'aoi'}))
+        for layer in layers
+    }
+
+
+def tile_data_versions(layers, aoi_ids):
+    """Versi data (dari trigger TileDataVersion) per layer untuk scope AOI.
+
+    Layer alert ikut bergantung pada versi layer AOI karena atribut AOI ikut dirender.
+    """
+    if not aoi_ids:
+        return {layer: '0' for layer in layers}
+    with connection.cursor() as cursor:
+        cursor.execute(TILE_DATA_VERSIONS_SQL, tile_data_versions_params(layers, aoi_ids))
+        rows = cursor.fetchall()
+    return tile_data_versions_from_rows(layers, rows)
+
+
+def tile_data_version(layer, aoi_ids):
+    return tile_data_versions([layer], aoi_ids)[layer]
+
+
+TILE_VERSIONS_SQL = """
+    SELECT layer, COALESCE(SUM(version), 0) FROM data_tiledataversion
+    WHERE layer = 'aoi' AND area_of_interest_id = ANY(%(aoi_ids)s::uuid[])
+    GROUP BY layer
+    UNION ALL
+    SELECT layer, COALESCE(SUM(version), 0) FROM data_tileregionversion
+    WHERE layer = ANY(%(layers)s::text[]) AND area_of_interest_id = ANY(%(aoi_ids)s::uuid[])
+    AND x BETWEEN %(x0)s AND %(x1)s AND y BETWEEN %(y0)s AND %(y1)s
+    GROUP BY layer
+"""
+
+
+def tile_versions_params(layers, z, x, y, aoi_ids):
+    x0, y0, x1, y1 = tile_region_range(z, x, y)
+    return {
+        'layers': sorted(set(layers) - {'aoi'}), 'aoi_ids': list(aoi_ids),
+        'x0': x0, 'y0': y0, 'x1': x1, 'y1': y1,
+    }
+
+
+def tile_versions(layers, z, x, y, aoi_ids):
+    """Versi data per layer untuk satu tile: versi region (TileRegionVersion, dijaga trigger)
+    yang menutupi tile, ditambah versi layer AOI untuk scope karena atribut AOI ikut dirender.
+
+    Perubahan alert hanya mengubah versi tile di sekitarnya; layer AOI tetap memakai versi scope.
+    """
+    if not aoi_ids:
+        return {layer: '0' for layer in layers}
+    with connection.cursor() as cursor:
+        cursor.execute(TILE_VERSIONS_SQL, tile_versions_params(layers, z, x, y, aoi_ids))
+        rows = cursor.fetchall()
+    return tile_data_versions_from_rows(layers, rows)
+
+
+BUMP_BBOX_REGION_VERSIONS_SQL = """
+    SELECT data_bump_tile_region_version(
+        %s,
+        array_agg(aoi.id),
+        array_agg(ST_Transform(ST_MakeEnvelope(%s, %s, %s, %s, 4326), 3857))
+    )
+    FROM data_areaofinterest aoi
+"""
+
+
+def bump_tile_region_versions(bbox, layers=TILE_LAYERS):
+    """Naikkan versi region di dalam bbox (EPSG:4326) untuk semua AOI, sehingga tile di
+    sekitarnya dirender ulang di semua cache dan arsip. Mengembalikan jumlah region yang diubah"""
+    if bbox is None:
+        return 0
+    count = 0
+    with connection.cursor() as cursor:
+        for layer in layers:
+            if layer == 'aoi':
+                continue
+            cursor.execute(BUMP_BBOX_REGION_VERSIONS_SQL, [layer, *bbox])
+            count += cursor.fetchone()[0] or 0
+    return count
+
+
+def _layer_variant(layer, aoi_ids, filters, versions):
+    return tile_variant(aoi_ids, dict(layer_filters(layer, filters), version=(versions or {}).get(layer)))
+
+
+def tile_etag(layers, z, x, y, aoi_ids, filters=None, versions=None):
+    """ETag tile dari layer, z/x/y, scope AOI, filter dan versi data.
+
+    Weak ETag karena isi yang sama bisa dikirim dengan content-encoding berbeda.
+    """
+    raw = '|'.join(f"{layer}/{z}/{x}/{y}/{_layer_variant(layer, aoi_ids, filters, versions)}" for layer in layers)
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def get_or_render_tiles(layers, z, x, y, aoi_ids, filters=None, versions=None):
+    """Ambil tile per layer dari arsip pre-render atau cache; layer yang belum ada
+    dirender bersama dalam satu query lalu disimpan ke cache per layer.
+
+    `versions` (lihat tile_versions) masuk ke kunci cache sehingga entry lama tidak
+    terpakai lagi setelah ada ingest di sekitar tile, termasuk ingest di luar ORM.
+
+    Arsip pre-render hanya dipakai jika versinya sama dengan `versions`.
+
+    Mengembalikan dict layer -> (encoding, data). Tile dikompresi sekali saat dirender
+    dan disimpan terkompresi, lihat tile_compression.
+    """
+    tiles = {}
+    for layer in layers:
+        if not layer_filters(layer, filters):
+            # Arsip hanya berisi tile tanpa filter
+            tile = read_archived_tile(tile_variant(aoi_ids), layer, z, x, y, (versions or {}).get(layer))
+            if tile is not None:
+                tiles[layer] = tile
+
+    cache = get_tile_cache()
+    use_cache = cache is not None and cache.is_cacheable(z)
+    variants = {layer: _layer_variant(layer, aoi_ids, filters, versions) for layer in layers}
+    if use_cache:
+        for layer in layers:
+            if layer not in tiles:
+                tile = cache.get(layer, z, x, y, variants[layer])
+                if tile is not None:
+                    tiles[layer] = tile
+
+    missing = [layer for layer in layers if layer not in tiles]
+    if use_cache:
+        for layer in [layer for layer in missing if _uses_day_fragments(layer, z, filters)]:
+            key = f"{layer}/{z}/{x}/{y}/{variants[layer]}"
+            tiles[layer] = _render_flight.do(
+                key, lambda: _assemble_day_fragments(layer, z, x, y, aoi_ids, filters, versions, variants[layer], cache)
+            )
+        missing = [layer for layer in missing if layer not in tiles]
+    if missing:
+        key = '|'.join(f"{layer}/{z}/{x}/{y}/{variants[layer]}" for layer in missing)
+        tiles.update(_render_flight.do(
+            key, lambda: _render_and_cache(key, missing, z, x, y, aoi_ids, filters, variants,
+                                           cache if use_cache else None)
+        ))
+    return tiles
+
+
+def tile_render_lock_id(key):
+    """Id advisory lock untuk render tile `key`, dipakai jalur sync dan async"""
+    return int.from_bytes(hashlib.sha1(key.encode('utf-8')).digest()[:8], 'big', signed=True)
+
+
+@contextmanager
+def _tile_render_lock(key, timeout):
+    """Advisory lock PostgreSQL untuk render tile dengan kunci `key` di semua worker.
+
+    Yield True jika lock baru didapat setelah menunggu worker lain, artinya tile mungkin
+    sudah ada di cache. Jika menunggu lebih dari `timeout` detik tile dirender sendiri.
+    """
+    lock_id = tile_render_lock_id(key)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [lock_id])
+            if cursor.fetchone()[0]:
+                yield False
+                return
+            try:
+                with transaction.atomic():
+                    cursor.execute("SELECT set_config('lock_timeout', %s, true)", [f"{int(timeout * 1000)}ms"])
+                    cursor.execute("SELECT pg_advisory_xact_lock(%s)", [lock_id])
+                    cursor.execute("SELECT set_config('lock_timeout', '0', true)")
+            except OperationalError:
+                logger.warning(f"Timed out waiting for concurrent render of {key}, rendering anyway")
+        yield True
+
+
+def _render_and_cache(key, layers, z, x, y, aoi_ids, filters, variants, cache):
+    """Render layer yang belum ada di cache lalu simpan, dengan koordinasi antar worker
+    jika cache dipakai bersama (FileSystemTileCache)"""
+    if cache is None or not cache.shared or not cache.lock_timeout:
+        return _render_compressed(layers, z, x, y, aoi_ids, filters, variants, cache)
+
+    with _tile_render_lock(key, cache.lock_timeout) as waited:
+        if waited:
+            cached = {layer: cache.get(layer, z, x, y, variants[layer]) for layer in layers}
+            if all(tile is not None for tile in cached.values()):
+                return cached
+        return _render_compressed(layers, z, x, y, aoi_ids, filters, variants, cache)
+
+
+def day_fragment_variants(aoi_ids, filters, days, version, tile=None):
+    """Kunci varian fragmen per hari. Hari yang sudah lewat memakai versi per hari
+    (hotspot_day_versions), hari ini memakai versi layer tile"""
+    today = timezone.localdate()
+    closed_days = [day for day in days if day < today]
+    memo_key = (tile, version) if tile is not None and version is not None else None
+    day_versions = hotspot_day_versions(aoi_ids, closed_days, memo_key) if closed_days else {}
+    return {
+        day: tile_variant(aoi_ids, dict(filters, day=day.isoformat(), version=day_versions.get(day, version)))
+        for day in days
+    }
+
+
+def _assemble_day_fragments(layer, z, x, y, aoi_ids, filters, versions, variant, cache):
+    """Susun tile rentang tanggal dari fragmen per hari. Fragmen yang belum ada di cache
+    dirender sekaligus dalam satu query, lalu semua fragmen digabung dengan mvt.merge_tiles.
+
+    Hari yang sudah lewat memakai versi per hari (hotspot_day_versions), bukan versi tile,
+    agar ingest hari ini tidak membuat semua fragmen lama miss. Hari ini memakai versi tile.
+    """
+    filters = layer_filters(layer, filters)
+    base_filters = {k: v for k, v in filters.items() if k not in ('start', 'end')}
+    version = (versions or {}).get(layer)
+    days = [filters['start'] + timedelta(days=i) for i in range((filters['end'] - filters['start']).days + 1)]
+    day_variants = day_fragment_variants(aoi_ids, base_filters, days, version, (z, x, y))
+
+    fragments = {}
+    for day in days:
+        fragment = cache.get(layer, z, x, y, day_variants[day])
+        if fragment is not None:
+            fragments[day] = fragment
+
+    missing = [day for day in days if day not in fragments]
+    if missing:
+        rendered = render_hotspot_day_fragments(z, x, y, aoi_ids, base_filters, missing)
+        for day in missing:
+            # Hari tanpa alert juga di-cache (tile kosong) agar tidak di-query ulang
+            fragments[day] = compress_tile(rendered.get(day, b''))
+            cache.set(layer, z, x, y, day_variants[day], *fragments[day])
+
+    encoding, data = compress_tile(merge_tiles(decompress_tile(*fragments[day]) for day in days))
+    cache.set(layer, z, x, y, variant, encoding, data)
+    return encoding, data
+
+
+def _render_compressed(layers, z, x, y, aoi_ids, filters, variants, cache):
+    tiles = {}
+    for layer, data in render_tiles(layers, z, x, y, aoi_ids, filters).items():
+        encoding, data = compress_tile(data)
+        if cache is not None:
+            cache.set(layer, z, x, y, variants[layer], encoding, data)
+        tiles[layer] = (encoding, data)
+    return tiles
+
+
+def get_or_render_tile(layer, z, x, y, aoi_ids, filters=None, version=None):
+    return get_or_render_tiles([layer], z, x, y, aoi_ids, filters, {layer: version})[layer]
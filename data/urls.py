@@ -2,10 +2,11 @@
 from django.urls import path
 from .views import (
     UserAOIListView, UserAreaOfInterestTileView, UserDeforestationTileView, 
-    UserHotspotAlertTileView, HotspotAlertAPIView, DeforestationAlertDetailView,
+    UserHotspotAlertTileView, UserCombinedTileView, SharedTileScopeView, SharedTileView, HotspotAlertAPIView, DeforestationAlertDetailView,
     hotspot_chart_data, company_table_data, event_list_data, hotspot_stats_data,
     deforestation_chart_data, deforestation_company_table_data, 
-    deforestation_event_list_data, deforestation_stats_data,
+    deforestation_event_list_data, deforestation_stats_data, hotspot_dashboard_data, deforestation_dashboard_data,
+    analytics_cache_stats_data, hotspot_alert_export, deforestation_alert_export, hotspot_density_data,
     DeforestationVerificationAPIView, HotspotVerificationAPIView
 )
 
@@ -20,6 +21,9 @@ urlpatterns = [
     path('tiles/user-aois/<int:z>/<int:x>/<int:y>/', UserAreaOfInterestTileView.as_view(), name='user-aois-tile'),
     path('tiles/deforestation/<int:z>/<int:x>/<int:y>/', UserDeforestationTileView.as_view(), name='deforestation-tile'),
     path('tiles/hotspotalert/<int:z>/<int:x>/<int:y>/', UserHotspotAlertTileView.as_view(), name='hotspotalert-tile'),
+    path('tiles/combined/<int:z>/<int:x>/<int:y>/', UserCombinedTileView.as_view(), name='combined-tile'),
+    path('tiles/shared/', SharedTileScopeView.as_view(), name='shared-tile-scope'),
+    path('tiles/shared/<str:descriptor>/<str:route>/<int:z>/<int:x>/<int:y>/', SharedTileView.as_view(), name='shared-tile'),
 
     # Chart dan Stats APIs
     path('hotspot-chart/', hotspot_chart_data, name='hotspot-chart'),
@@ -32,6 +36,16 @@ urlpatterns = [
     path('deforestation-event-list/', deforestation_event_list_data, name='deforestation-event-list'),
     path('deforestation-stats/', deforestation_stats_data, name='deforestation-stats'),
 
+    # Semua panel dashboard dalam satu request (?panels=stats,chart,company_table,event_list)
+    path('hotspot-dashboard/', hotspot_dashboard_data, name='hotspot-dashboard'),
+    path('deforestation-dashboard/', deforestation_dashboard_data, name='deforestation-dashboard'),
+    path('analytics-cache-stats/', analytics_cache_stats_data, name='analytics-cache-stats'),
+    path('hotspot-density/', hotspot_density_data, name='hotspot-density'),
+
+    # Ekspor streaming (csv|ndjson|geojson)
+    path('exports/hotspot-alerts/<str:export_format>/', hotspot_alert_export, name='hotspot-alert-export'),
+    path('exports/deforestation-alerts/<str:export_format>/', deforestation_alert_export, name='deforestation-alert-export'),
+
     path('deforestation-verifications/', DeforestationVerificationAPIView.as_view(), name='deforestation-verification-list'),
     path('deforestation-verifications/<int:pk>/', DeforestationVerificationAPIView.as_view(), name='deforestation-verification-detail'),
 
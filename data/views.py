@@ -6,27 +6,40 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from .models import AreaOfInterest
 from .serializer import AreaOfInterestSerializer, AreaOfInterestGeoSerializer
-from django.http import HttpResponse, HttpResponseForbidden
-from rest_framework.authtoken.models import Token
-from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from rest_framework import status, permissions
 from django.shortcuts import get_object_or_404
 from .models import HotspotAlert, AreaOfInterest, DeforestationAlerts
 from .serializer import HotspotAlertSerializer, HotspotAlertGeoSerializer, DeforestationAlertsSerializer
 from .models import HotspotAlert, AreaOfInterest, DeforestationAlerts, DeforestationVerification
 from .serializer import HotspotAlertSerializer, HotspotAlertGeoSerializer, DeforestationVerificationSerializer, DeforestationVerificationListSerializer
-from datetime import date, datetime, timedelta
-from dateutil.parser import parse as dateparse
+from datetime import datetime, timezone as dt_timezone
 import json
+import time
 import logging
 logger = logging.getLogger(__name__)
-from django.db.models import Count, Q, Sum, Avg
-from django.utils import timezone
 from rest_framework import generics
 
 from django.shortcuts import get_object_or_404
 from .models import HotspotVerification, Hotspots
 from .serializer import HotspotVerificationSerializer, HotspotVerificationListSerializer
+from .tiles import (
+    TILE_ROUTES, get_or_render_tiles, tile_versions, tile_etag, parse_tile_filters, parse_tile_layers,
+    route_tile_layers, scope_aoi_ids,
+)
+from .analytics import (
+    HOTSPOT_COMPANY_SORTS, DEFORESTATION_COMPANY_SORTS, parse_date_range, parse_granularity, parse_table_params,
+    hotspot_chart, deforestation_chart, hotspot_stats, deforestation_stats, hotspot_company_table,
+    deforestation_company_table, event_list_page, dashboard_bundle, analytics_cache_stats,
+)
+from .density import hotspot_density, parse_grid_params
+from .exports import EXPORT_FORMATS, parse_export_params, stream_export
+from .shared_tiles import SharedTileError, create_shared_descriptor, get_shared_tile_settings, resolve_shared_descriptor
+from .tile_compression import IDENTITY, combine_tiles, encode_for_client
+from .tile_cache import TILE_LAYERS
+from accounts.authentication import resolve_token, get_user_aoi_ids
+from django.utils.http import parse_etags
+from django.urls import reverse
 
 
 class UserAOIListView(APIView):
@@ -225,680 +238,304 @@ class HotspotAlertAPIView(APIView):
 
 
 
-class UserAreaOfInterestTileView(APIView):
+class BaseUserTileView(APIView):
+    """Dasar view tile MVT per user dengan autentikasi token lewat query string"""
     # permission_classes = [IsAuthenticated]
+    layers = ()
 
-    def get(self, request, z, x, y):
+    def get_layers(self, request):
+        return list(self.layers)
+
+    def get_filters(self, request):
+        """Filter tile yang sudah dinormalisasi, raise ValueError jika parameter tidak valid"""
+        return parse_tile_filters(request.query_params)
+
+    def get_scope(self, request):
+        """(aoi_ids, None) untuk AOI yang boleh dilihat request ini, atau (None, response error)"""
         token_key = request.query_params.get('token')
         if not token_key:
-            return HttpResponseForbidden("Token required")
+            return None, HttpResponseForbidden("Token required")
+
+        token_obj = resolve_token(token_key)
+        if token_obj is None:
+            return None, HttpResponseForbidden("Invalid token")
+        return get_user_aoi_ids(token_obj.user), None
+
+    def get_cache_control(self):
+        return 'private, no-cache'
+
+    def get(self, request, z, x, y, **kwargs):
+        aoi_ids, error = self.get_scope(request)
+        if error is not None:
+            return error
 
         try:
-            token_obj = Token.objects.select_related('user').get(key=token_key)
-        except Token.DoesNotExist:
-            return HttpResponseForbidden("Invalid token")
-
-        user = token_obj.user
-        user_id = user.id  # pakai user id untuk query
-
-        sql = """
-            WITH
-            tile_bounds AS (
-                SELECT ST_TileEnvelope(%s, %s, %s) AS geom
-            ),
-            mvtgeom AS (
-                SELECT
-                    aoi.id,
-                    aoi.name,
-                    aoi.description,
-                    aoi.fill_color,
-                    aoi.stroke_color,
-                    aoi.stroke_width,
-                    ST_AsMVTGeom(
-                        ST_Transform(aoi.geometry, 3857),
-                        tile_bounds.geom,
-                        4096,
-                        64,
-                        true
-                    ) AS geom
-                FROM data_areaofinterest aoi
-                JOIN accounts_users_areas_of_interest u ON aoi.id = u.areaofinterest_id
-                CROSS JOIN tile_bounds
-                WHERE u.users_id = %s
-                AND ST_Intersects(ST_Transform(aoi.geometry, 3857), tile_bounds.geom)
-                AND ST_IsValid(aoi.geometry)
-            )
-            SELECT ST_AsMVT(mvtgeom.*, 'layer', 4096, 'geom') FROM mvtgeom;
-            """
+            layers = self.get_layers(request)
+            filters = self.get_filters(request)
+        except ValueError as e:
+            return HttpResponse(str(e), status=400)
+
+        # aoi_id mempersempit scope, sehingga kunci cache dan versi data ikut scope tersebut
+        aoi_ids = scope_aoi_ids(aoi_ids, filters)
+
+        # Jawab 304 tanpa menjalankan ST_AsMVT jika data tile belum berubah
+        versions = tile_versions(layers, z, x, y, aoi_ids)
+        etag = tile_etag(layers, z, x, y, aoi_ids, filters, versions)
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponse(status=304)
+        else:
+            tiles = get_or_render_tiles(layers, z, x, y, aoi_ids, filters, versions)
+            encoding, tile = combine_tiles([tiles[layer] for layer in layers])
+            if tile:
+                # Tile tersimpan terkompresi; hanya didekompresi untuk client yang tidak menerimanya
+                encoding, tile = encode_for_client(encoding, tile, request.headers.get('Accept-Encoding', ''))
+                response = HttpResponse(tile, content_type="application/x-protobuf")
+                if encoding != IDENTITY:
+                    response['Content-Encoding'] = encoding
+            else:
+                response = HttpResponse(status=204)
 
+        response['ETag'] = etag
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = self.get_cache_control()
+        return response
 
-        with connection.cursor() as cursor:
-            cursor.execute(sql, [z, x, y, str(user_id)])
-            tile = cursor.fetchone()[0]
 
-        if tile:
-            return HttpResponse(tile, content_type="application/x-protobuf")
-        return HttpResponse(status=204)
-    
+class UserAreaOfInterestTileView(BaseUserTileView):
+    layers = ('aoi',)
 
 
-class UserHotspotAlertTileView(APIView):
-    # authentication_classes = [TokenAuthentication]
-    # permission_classes = [IsAuthenticated]
+class UserHotspotAlertTileView(BaseUserTileView):
+    layers = ('hotspotalert',)
 
-    def get(self, request, z, x, y):
-        token_key = request.query_params.get("token")
-        if not token_key:
-            return HttpResponseForbidden("Token required")
 
-        try:
-            token_obj = Token.objects.select_related("user").get(key=token_key)
-        except Token.DoesNotExist:
-            return HttpResponseForbidden("Invalid token")
+class UserDeforestationTileView(BaseUserTileView):
+    layers = ('deforestation',)
 
-        user_id = token_obj.user.id
 
-        # Ambil parameter waktu
-        startdate = request.query_params.get("startdate")
-        enddate = request.query_params.get("enddate")
-        today = request.query_params.get("today") == "true"
+class UserCombinedTileView(BaseUserTileView):
+    """Satu tile MVT berisi beberapa layer (layer, hotspot_alerts, deforestation_alerts).
+    Pilih layer dengan ?layers=aoi,hotspotalert,deforestation"""
+    layers = TILE_LAYERS
 
-        # Filter waktu SQL tambahan
-        time_filter_sql = ""
-        time_filter_params = []
+    def get_layers(self, request):
+        return parse_tile_layers(request.query_params.get('layers'), self.layers)
 
-        if today:
-            time_filter_sql = "AND alerts.alert_date = %s"
-            time_filter_params = [date.today()]
-        elif startdate and enddate:
-            try:
-                start = dateparse(startdate).date()
-                end = dateparse(enddate).date()
-                time_filter_sql = "AND alerts.alert_date BETWEEN %s AND %s"
-                time_filter_params = [start, end]
-            except Exception:
-                return HttpResponse("Invalid startdate or enddate format. Use YYYY-MM-DD", status=400)
-
-        # SQL utama
-        sql =  f"""
-                    WITH tile_bounds AS (
-                        SELECT ST_TileEnvelope(%s, %s, %s) AS geom
-                    ),
-                    user_aoi AS (
-                        SELECT areaofinterest_id
-                        FROM accounts_users_areas_of_interest
-                        WHERE users_id = %s
-                    ),
-                    mvtgeom AS (
-                        SELECT
-                            alerts.id,
-                            alerts.alert_date,
-                            alerts.category,
-                            COALESCE(alerts.confidence, 0) AS confidence,
-                            alerts.distance,
-                            alerts.hotspot_id,
-                            aois.name AS area_of_interest_name,
-                            ST_AsMVTGeom(
-                                ST_Transform(h.geom::geometry, 3857),
-                                tile_bounds.geom,
-                                4096,
-                                64,
-                                true
-                            ) AS geom
-                        FROM data_hotspotalert alerts
-                        JOIN user_aoi ON alerts.area_of_interest_id = user_aoi.areaofinterest_id
-                        JOIN data_hotspots h ON alerts.hotspot_id = h.id
-                        JOIN data_areaofinterest aois ON alerts.area_of_interest_id = aois.id
-                        CROSS JOIN tile_bounds
-                        WHERE h.geom IS NOT NULL
-                        AND ST_Intersects(ST_Transform(h.geom::geometry, 3857), tile_bounds.geom)
-                        AND ST_IsValid(h.geom::geometry)
-                        {time_filter_sql}
-                    )
-                    SELECT ST_AsMVT(mvtgeom.*, 'hotspot_alerts', 4096, 'geom') FROM mvtgeom;
-                """
-
-
-        with connection.cursor() as cursor:
-            cursor.execute(sql, [z, x, y, str(user_id)] + time_filter_params)
-            tile = cursor.fetchone()[0]
-
-        if tile:
-            return HttpResponse(tile, content_type="application/x-protobuf")
-        return HttpResponse(status=204)
 
-    
+class SharedTileScopeView(APIView):
+    """Descriptor tile bersama untuk scope AOI user, beserta template URL tile per layer.
 
+    URL tidak memuat token dan sama untuk semua user dengan himpunan AOI yang sama,
+    sehingga tile bisa di-cache browser, proxy dan CDN sampai descriptor kedaluwarsa.
+    """
+    permission_classes = [IsAuthenticated]
 
-class UserDeforestationTileView(APIView):
-    # permission_classes = [IsAuthenticated]
+    def get(self, request):
+        descriptor, expires = create_shared_descriptor(get_user_aoi_ids(request.user))
+        tiles = {}
+        for route in TILE_ROUTES:
+            url = reverse('shared-tile', kwargs={'descriptor': descriptor, 'route': route, 'z': 0, 'x': 0, 'y': 0})
+            tiles[route] = request.build_absolute_uri(url[:-len('0/0/0/')]) + '{z}/{x}/{y}/'
+        return Response({
+            'descriptor': descriptor,
+            'expires': datetime.fromtimestamp(expires, tz=dt_timezone.utc).isoformat(),
+            'tiles': tiles,
+        })
 
-    def get(self, request, z, x, y):
-        token_key = request.query_params.get('token')
-        if not token_key:
-            return HttpResponseForbidden("Token required")
 
+class SharedTileView(BaseUserTileView):
+    """Tile MVT lewat descriptor bersama (lihat SharedTileScopeView), tanpa token di URL"""
+
+    def get_layers(self, request):
+        return route_tile_layers(self.kwargs['route'], request.query_params.get('layers'))
+
+    def get_scope(self, request):
+        if self.kwargs['route'] not in TILE_ROUTES:
+            return None, HttpResponse("Not found", status=404)
         try:
-            token_obj = Token.objects.select_related('user').get(key=token_key)
-        except Token.DoesNotExist:
-            return HttpResponseForbidden("Invalid token")
-
-        user = token_obj.user
-        user_id = user.id
-
-        sql = """
-            WITH tile_bounds AS (
-                SELECT ST_TileEnvelope(%s, %s, %s) AS geom
-            ),
-            user_aoi AS (
-                SELECT areaofinterest_id
-                FROM accounts_users_areas_of_interest
-                WHERE users_id = %s
-            ),
-            mvtgeom AS (
-                SELECT
-                    alerts.id,
-                    alerts.event_id,
-                    alerts.alert_date,
-                    alerts.confidence,
-                    alerts.area,
-                    alerts.company_id,
-                    ST_AsMVTGeom(
-                        ST_Transform(alerts.geom::geometry, 3857),
-                        tile_bounds.geom,
-                        4096,
-                        64,
-                        true
-                    ) AS geom
-                FROM data_deforestationalerts alerts
-                JOIN user_aoi ON alerts.company_id = user_aoi.areaofinterest_id
-                CROSS JOIN tile_bounds
-                WHERE alerts.geom IS NOT NULL
-                AND ST_Intersects(ST_Transform(alerts.geom::geometry, 3857), tile_bounds.geom)
-                AND ST_IsValid(alerts.geom::geometry)
-            )
-            SELECT ST_AsMVT(mvtgeom.*, 'deforestation_alerts', 4096, 'geom') FROM mvtgeom;
-        """
+            aoi_ids, self.expires = resolve_shared_descriptor(self.kwargs['descriptor'])
+        except SharedTileError as e:
+            return None, HttpResponseForbidden(str(e))
+        return aoi_ids, None
 
-        with connection.cursor() as cursor:
-            cursor.execute(sql, [z, x, y, str(user_id)])
-            tile = cursor.fetchone()[0]
+    def get_cache_control(self):
+        # Jangan di-cache melewati masa berlaku descriptor
+        max_age = max(0, min(get_shared_tile_settings()['MAX_AGE'], int(self.expires - time.time())))
+        return f'public, max-age={max_age}'
 
-        if tile:
-            return HttpResponse(tile, content_type="application/x-protobuf")
-        return HttpResponse(status=204)
-    
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def hotspot_chart_data(request):
-    """API untuk ChartHotspot.tsx - data chart bulanan"""
-    user = request.user
-    
-    # Ambil parameter tanggal dari request
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    # Set default jika tidak ada parameter
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=365)
-    else:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
-
-    # Query hotspot alerts per bulan untuk user dengan filter tanggal
-    monthly_data = []
-    current_date = start_date
-    while current_date <= end_date:
-        month_start = current_date.replace(day=1)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        if month_end > end_date:
-            month_end = end_date
-            
-        count = HotspotAlert.objects.filter(
-            area_of_interest__users_aoi=user,
-            alert_date__range=[month_start, month_end]
-        ).count()
-        
-        monthly_data.append({
-            'name': month_start.strftime('%b %Y'),
-            'value': count,
-            'amt': count * 100
-        })
-        
-        # Move to next month
-        if month_start.month == 12:
-            current_date = month_start.replace(year=month_start.year + 1, month=1)
-        else:
-            current_date = month_start.replace(month=month_start.month + 1)
-
-    # Data pie chart berdasarkan kategori dengan filter tanggal
-    pie_data = []
-    categories = ['AMAN', 'PERHATIAN', 'WASPADA', 'BAHAYA']
-    for category in categories:
-        count = HotspotAlert.objects.filter(
-            area_of_interest__users_aoi=user,
-            category=category,
-            alert_date__range=[start_date, end_date]
-        ).count()
-        pie_data.append({
-            'name': category,
-            'value': count
-        })
+    """API untuk ChartHotspot.tsx - data chart per periode (?granularity=day|week|month, default month)"""
+    try:
+        start_date, end_date = parse_date_range(request.query_params)
+        granularity = parse_granularity(request.query_params.get('granularity'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
 
-    return Response({
-        'monthly_data': monthly_data,
-        'pie_data': pie_data
-    })
+    return Response(hotspot_chart(get_user_aoi_ids(request.user), start_date, end_date, granularity))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def company_table_data(request):
-    """API untuk CompanyTable.tsx - data tabel perusahaan dengan detail kategori"""
-    user = request.user
-    
-    # Ambil parameter tanggal
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=365)
-    else:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
-
-    # Agregasi jumlah events per AOI/company dengan detail kategori
-    companies = AreaOfInterest.objects.filter(users_aoi=user)
-    
-    company_data = []
-    for company in companies:
-        # Hitung total events dalam rentang tanggal
-        total_events = HotspotAlert.objects.filter(
-            area_of_interest=company,
-            alert_date__range=[start_date, end_date]
-        ).count()
-        
-        if total_events > 0:  # Hanya tampilkan yang ada events
-            # Hitung per kategori
-            aman = HotspotAlert.objects.filter(
-                area_of_interest=company,
-                category='AMAN',
-                alert_date__range=[start_date, end_date]
-            ).count()
-            
-            perhatian = HotspotAlert.objects.filter(
-                area_of_interest=company,
-                category='PERHATIAN',
-                alert_date__range=[start_date, end_date]
-            ).count()
-            
-            waspada = HotspotAlert.objects.filter(
-                area_of_interest=company,
-                category='WASPADA',
-                alert_date__range=[start_date, end_date]
-            ).count()
-            
-            bahaya = HotspotAlert.objects.filter(
-                area_of_interest=company,
-                category='BAHAYA',
-                alert_date__range=[start_date, end_date]
-            ).count()
-            
-            company_data.append({
-                'name': company.name,
-                'total_events': total_events,
-                'aman': aman,
-                'perhatian': perhatian,
-                'waspada': waspada,
-                'bahaya': bahaya
-            })
-    
-    # Sort by total events
-    company_data.sort(key=lambda x: x['total_events'], reverse=True)
-    
-    return Response(company_data[:10])  # top 10
+    """API untuk CompanyTable.tsx - data tabel perusahaan dengan detail kategori.
+    ?sort=&order=asc|desc&limit=&offset=, jumlah seluruh baris di header X-Total-Count"""
+    try:
+        start_date, end_date = parse_date_range(request.query_params)
+        sort, order, limit, offset = parse_table_params(request.query_params, HOTSPOT_COMPANY_SORTS)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    rows, total = hotspot_company_table(
+        get_user_aoi_ids(request.user), start_date, end_date, sort, order, limit, offset
+    )
+    response = Response(rows)
+    response['X-Total-Count'] = total
+    return response
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def event_list_data(request):
-    """API untuk EventList.tsx - daftar alert terbaru dengan pagination"""
-    user = request.user
-    
-    # Ambil parameter tanggal dan pagination
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    page = int(request.query_params.get('page', 1))
-    page_size = int(request.query_params.get('page_size', 10))
-    
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)  # Default 30 hari terakhir
-    else:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
-
-    # Query dengan filter tanggal
-    queryset = HotspotAlert.objects.filter(
-        area_of_interest__users_aoi=user,
-        alert_date__range=[start_date, end_date]
-    ).select_related('area_of_interest', 'hotspot').order_by('-alert_date', '-id')
-    
-    # Hitung total dan pagination
-    total_count = queryset.count()
-    start_index = (page - 1) * page_size
-    end_index = start_index + page_size
-    
-    recent_alerts = queryset[start_index:end_index]
-    
-    events_data = []
-    for alert in recent_alerts:
-        events_data.append({
-            'company': alert.area_of_interest.name,
-            'date': alert.alert_date.strftime('%Y-%m-%d'),
-            'time': alert.hotspot.times.strftime('%H:%M') if alert.hotspot.times else '00:00',
-            'distance': f"{alert.distance:.2f}" if alert.distance else "0.00",
-            'satellite': alert.hotspot.sat if alert.hotspot.sat else 'Unknown',
-            'category': alert.get_category_display(),
-            'hotspot_id': alert.hotspot.id,
-            'aoi_id': alert.area_of_interest.id
-        })
-
-    return Response({
-        'data': events_data,
-        'pagination': {
-            'current_page': page,
-            'page_size': page_size,
-            'total_count': total_count,
-            'total_pages': (total_count + page_size - 1) // page_size,
-            'has_next': end_index < total_count,
-            'has_previous': page > 1
-        }
-    })
+    """API untuk EventList.tsx - daftar alert terbaru dengan pagination.
+    Mode cursor: ?cursor= (kosong untuk halaman pertama, lalu next_cursor) dan ?count=exact|estimated|none"""
+    try:
+        return Response(event_list_page('hotspotalert', get_user_aoi_ids(request.user), request.query_params))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def hotspot_stats_data(request):
     """API untuk HotspotStats.tsx - statistik hotspot dengan filter tanggal"""
-    user = request.user
-    
-    # Ambil parameter tanggal
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=365)
-    else:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
-
-    # Total kejadian dengan filter tanggal
-    total_events = HotspotAlert.objects.filter(
-        area_of_interest__users_aoi=user,
-        alert_date__range=[start_date, end_date]
-    ).count()
-
-    # Total area (jumlah AOI unik yang punya alert dalam rentang tanggal)
-    total_areas = AreaOfInterest.objects.filter(
-        users_aoi=user,
-        hotspot_alerts__alert_date__range=[start_date, end_date]
-    ).distinct().count()
-
-    # Jumlah PT/AOI yang terlibat
-    total_companies = AreaOfInterest.objects.filter(
-        users_aoi=user
-    ).count()
-
-    return Response({
-        'total_events': total_events,
-        'total_areas': total_areas,
-        'total_companies': total_companies
-    })
+    try:
+        start_date, end_date = parse_date_range(request.query_params)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    return Response(hotspot_stats(get_user_aoi_ids(request.user), start_date, end_date))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def deforestation_chart_data(request):
-    """API untuk ChartDeforestation.tsx - data chart bulanan deforestation"""
-    user = request.user
-    
-    # Ambil parameter tanggal dari request
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    # Set default jika tidak ada parameter
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=365)
-    else:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
-    
-    # Query deforestation alerts per bulan untuk user dengan filter tanggal
-    monthly_data = []
-    current_date = start_date
-    
-    while current_date <= end_date:
-        month_start = current_date.replace(day=1)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        
-        if month_end > end_date:
-            month_end = end_date
-        
-        count = DeforestationAlerts.objects.filter(
-            company__users_aoi=user,
-            alert_date__range=[month_start, month_end]
-        ).count()
-        
-        monthly_data.append({
-            'name': month_start.strftime('%b %Y'),
-            'value': count,
-            'amt': count * 100
-        })
-        
-        # Move to next month
-        if month_start.month == 12:
-            current_date = month_start.replace(year=month_start.year + 1, month=1)
-        else:
-            current_date = month_start.replace(month=month_start.month + 1)
-    
-    # Data pie chart berdasarkan confidence level
-    pie_data = []
-    confidence_ranges = [
-        {'name': 'Low (0-2)', 'min': 0, 'max': 2},
-        {'name': 'Medium (3-4)', 'min': 3, 'max': 4},
-        {'name': 'High (5+)', 'min': 5, 'max': 100}
-    ]
-    
-    for range_data in confidence_ranges:
-        count = DeforestationAlerts.objects.filter(
-            company__users_aoi=user,
-            confidence__range=[range_data['min'], range_data['max']],
-            alert_date__range=[start_date, end_date]
-        ).count()
-        
-        pie_data.append({
-            'name': range_data['name'],
-            'value': count
-        })
-    
-    return Response({
-        'monthly_data': monthly_data,
-        'pie_data': pie_data
-    })
+    """API untuk ChartDeforestation.tsx - data chart deforestation per periode (?granularity=day|week|month)"""
+    try:
+        start_date, end_date = parse_date_range(request.query_params)
+        granularity = parse_granularity(request.query_params.get('granularity'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    return Response(deforestation_chart(get_user_aoi_ids(request.user), start_date, end_date, granularity))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def deforestation_company_table_data(request):
-    """API untuk CompanyTable.tsx - data tabel perusahaan dengan detail deforestation"""
-    user = request.user
-    
-    # Ambil parameter tanggal
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=365)
-    else:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
-    
-    # Agregasi jumlah events per AOI/company
-    companies = AreaOfInterest.objects.filter(users_aoi=user)
-    company_data = []
-    
-    for company in companies:
-        # Hitung total events dalam rentang tanggal
-        total_events = DeforestationAlerts.objects.filter(
-            company=company,
-            alert_date__range=[start_date, end_date]
-        ).count()
-        
-        if total_events > 0:  # Hanya tampilkan yang ada events
-            # Hitung total area yang terdeforestasi
-            total_area = DeforestationAlerts.objects.filter(
-                company=company,
-                alert_date__range=[start_date, end_date]
-            ).aggregate(total=Sum('area'))['total'] or 0
-            
-            # Hitung rata-rata confidence
-            avg_confidence = DeforestationAlerts.objects.filter(
-                company=company,
-                alert_date__range=[start_date, end_date]
-            ).aggregate(avg=Avg('confidence'))['avg'] or 0
-            
-            company_data.append({
-                'name': company.name,
-                'total_events': total_events,
-                'total_area': float(total_area),
-                'avg_confidence': round(float(avg_confidence), 2)
-            })
-    
-    # Sort by total events
-    company_data.sort(key=lambda x: x['total_events'], reverse=True)
-    
-    return Response(company_data[:10])  # top 10
+    """API untuk CompanyTable.tsx - data tabel perusahaan dengan detail deforestation.
+    ?sort=&order=asc|desc&limit=&offset=, jumlah seluruh baris di header X-Total-Count"""
+    try:
+        start_date, end_date = parse_date_range(request.query_params)
+        sort, order, limit, offset = parse_table_params(request.query_params, DEFORESTATION_COMPANY_SORTS)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    rows, total = deforestation_company_table(
+        get_user_aoi_ids(request.user), start_date, end_date, sort, order, limit, offset
+    )
+    response = Response(rows)
+    response['X-Total-Count'] = total
+    return response
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def deforestation_event_list_data(request):
-    """API untuk EventList.tsx - daftar deforestation alerts terbaru dengan pagination"""
-    user = request.user
-    
-    # Ambil parameter tanggal dan pagination
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    page = int(request.query_params.get('page', 1))
-    page_size = int(request.query_params.get('page_size', 10))
-    
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=30)  # Default 30 hari terakhir
-    else:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
-    
-    # Query dengan filter tanggal
-    queryset = DeforestationAlerts.objects.filter(
-        company__users_aoi=user,
-        alert_date__range=[start_date, end_date]
-    ).select_related('company').order_by('-alert_date', '-id')
-    
-    # Hitung total dan pagination
-    total_count = queryset.count()
-    start_index = (page - 1) * page_size
-    end_index = start_index + page_size
-    recent_alerts = queryset[start_index:end_index]
-    
-    events_data = []
-    for alert in recent_alerts:
-        events_data.append({
-            'company': alert.company.name,
-            'date': alert.alert_date.strftime('%Y-%m-%d'),
-            'area': f"{alert.area:.2f}" if alert.area else "0.00",
-            'confidence': alert.confidence or 0,
-            'event_id': alert.event_id,
-            'aoi_id': alert.company.id
-        })
-    
-    return Response({
-        'data': events_data,
-        'pagination': {
-            'current_page': page,
-            'page_size': page_size,
-            'total_count': total_count,
-            'total_pages': (total_count + page_size - 1) // page_size,
-            'has_next': end_index < total_count,
-            'has_previous': page > 1
-        }
-    })
+    """API untuk EventList.tsx - daftar deforestation alerts terbaru dengan pagination.
+    Mode cursor sama dengan event_list_data"""
+    try:
+        return Response(event_list_page('deforestation', get_user_aoi_ids(request.user), request.query_params))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def deforestation_stats_data(request):
     """API untuk DeforestationStats.tsx - statistik deforestation dengan filter tanggal"""
-    user = request.user
-    
-    # Ambil parameter tanggal
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    if not start_date or not end_date:
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=365)
-    else:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except ValueError:
-            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
-    
-    # Total kejadian dengan filter tanggal
-    total_events = DeforestationAlerts.objects.filter(
-        company__users_aoi=user,
-        alert_date__range=[start_date, end_date]
-    ).count()
-    
-    # Total area yang terdeforestasi
-    total_area = DeforestationAlerts.objects.filter(
-        company__users_aoi=user,
-        alert_date__range=[start_date, end_date]
-    ).aggregate(total=Sum('area'))['total'] or 0
-    
-    # Total PT/AOI yang terlibat
-    total_companies = AreaOfInterest.objects.filter(
-        users_aoi=user,
-        deforestation_alerts__alert_date__range=[start_date, end_date]
-    ).distinct().count()
-    
-    return Response({
-        'total_events': total_events,
-        'total_area': float(total_area),
-        'total_companies': total_companies
-    })
+    try:
+        start_date, end_date = parse_date_range(request.query_params)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    return Response(deforestation_stats(get_user_aoi_ids(request.user), start_date, end_date))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def hotspot_dashboard_data(request):
+    """Semua panel dashboard hotspot (stats, chart, company_table, event_list) dalam satu request.
+    Pilih panel dengan ?panels=stats,chart; parameter lain sama dengan endpoint per panel"""
+    try:
+        return Response(dashboard_bundle('hotspotalert', get_user_aoi_ids(request.user), request.query_params))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def deforestation_dashboard_data(request):
+    """Semua panel dashboard deforestation dalam satu request, lihat hotspot_dashboard_data"""
+    try:
+        return Response(dashboard_bundle('deforestation', get_user_aoi_ids(request.user), request.query_params))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def analytics_cache_stats_data(request):
+    """Statistik cache analytics (hit rate, jumlah entry) untuk proses yang melayani request ini"""
+    return Response(analytics_cache_stats())
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def hotspot_density_data(request):
+    """Kepadatan hotspot alert per sel grid untuk semua AOI user.
+    ?shape=hex|square&size=<meter>&start_date=&end_date= (default 30 hari terakhir)"""
+    try:
+        start_date, end_date = parse_date_range(request.query_params, default_days=30)
+        shape, size = parse_grid_params(request.query_params)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    return Response(hotspot_density(get_user_aoi_ids(request.user), start_date, end_date, shape, size))
+
+def _alert_export_response(request, layer, filename, export_format):
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {'error': f"Invalid export format. Choose from: {', '.join(EXPORT_FORMATS)}"}, status=404
+        )
+    try:
+        aoi_ids, start_date, end_date, include_geom = parse_export_params(
+            request.query_params, get_user_aoi_ids(request.user)
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    response = StreamingHttpResponse(
+        stream_export(layer, export_format, aoi_ids, start_date, end_date, include_geom),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{start_date}-{end_date}.{export_format}"'
+    return response
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def hotspot_alert_export(request, export_format):
+    """Ekspor streaming HotspotAlert user sebagai csv, ndjson atau geojson (segmen URL).
+    Filter: start_date/end_date, aoi_id; ?geom=true menambah geometry di csv/ndjson"""
+    return _alert_export_response(request, 'hotspotalert', 'hotspot-alerts', export_format)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def deforestation_alert_export(request, export_format):
+    """Ekspor streaming DeforestationAlerts user, parameter sama dengan hotspot_alert_export"""
+    return _alert_export_response(request, 'deforestation', 'deforestation-alerts', export_format)
 
 
 
@@ -13,4 +13,27 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'monitoringbackend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Diimport setelah Django siap. Request tile di bawah settings.TILE_ASYNC['PREFIX'] dilayani
+# jalur async (data/async_tiles.py), sisanya oleh Django.
+from data.async_tiles import tile_application, close_pool, get_async_tile_settings  # noqa: E402
+
+TILE_PREFIX = get_async_tile_settings()['PREFIX']
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and TILE_PREFIX and scope['path'].startswith(TILE_PREFIX):
+        return await tile_application(scope, receive, send)
+
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await close_pool()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    return await django_application(scope, receive, send)
@@ -62,6 +62,9 @@ CORS_ALLOW_METHODS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Header respons yang boleh dibaca frontend (jumlah baris tabel perusahaan)
+CORS_EXPOSE_HEADERS = ['X-Total-Count']
+
 
 AUTH_USER_MODEL = 'accounts.Users'
 # Application definition
@@ -100,10 +103,33 @@ ROOT_URLCONF = 'monitoringbackend.urls'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ]
 }
 
+# Cache in-memory token -> user dan daftar AOI user (accounts/authentication.py)
+AUTH_TOKEN_CACHE = {
+    # Cache per proses: invalidasi lewat signal (token dihapus, user dinonaktifkan, AOI user berubah)
+    # hanya berlaku di worker yang menjalankannya. Worker lain masih bisa menerima token/AOI lama
+    # paling lama TIMEOUT detik, jadi perkecil nilai ini jika pencabutan akses harus lebih cepat.
+    # Harus > 0; 0 berarti entry tidak pernah kedaluwarsa.
+    'TIMEOUT': int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 60)),
+    'MAX_ENTRIES': int(os.getenv('AUTH_TOKEN_CACHE_MAX_ENTRIES', 10000)),
+}
+
+# Cache in-memory hasil endpoint analytics (data/analytics.py) per proses. Kunci memuat versi
+# data TileDataVersion scope AOI, jadi entry basi begitu ada alert baru; TIMEOUT sebagai batas atas
+ANALYTICS_CACHE = {
+    'ENABLED': os.getenv('ANALYTICS_CACHE_ENABLED', 'true').lower() == 'true',
+    'TIMEOUT': int(os.getenv('ANALYTICS_CACHE_TIMEOUT', 300)),
+    'MAX_ENTRIES': int(os.getenv('ANALYTICS_CACHE_MAX_ENTRIES', 2048)),
+}
+
+# Ekspor streaming alert (data/exports.py): jumlah baris per fetch server-side cursor
+ALERT_EXPORT = {
+    'CHUNK_SIZE': int(os.getenv('ALERT_EXPORT_CHUNK_SIZE', 2000)),
+}
+
 
 TEMPLATES = [
     {
@@ -129,6 +155,8 @@ WSGI_APPLICATION = 'monitoringbackend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Django memakai psycopg 3 (package psycopg) karena terpasang untuk jalur tile async, jadi koneksi
+# sync juga memakai psycopg 3. psycopg2-binary hanya dipakai worker notifikasi (app.py).
 DATABASES = {
     'default': {
         'ENGINE': 'django.contrib.gis.db.backends.postgis',
@@ -199,4 +227,98 @@ EMAIL_PORT = int(os.getenv('SMTP_PORT', 587))
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_PASSWORD')
-DEFAULT_FROM_EMAIL = os.getenv('FROM_EMAIL')
\ No newline at end of file
+DEFAULT_FROM_EMAIL = os.getenv('FROM_EMAIL')
+
+# Cache tile MVT (lihat data/tile_cache.py). Kosongkan TILE_CACHE_BACKEND untuk mematikan cache.
+# data.tile_cache.FileSystemTileCache dipakai bersama antar worker gunicorn,
+# data.tile_cache.MemoryTileCache hanya per proses.
+TILE_CACHE = {
+    'BACKEND': os.getenv('TILE_CACHE_BACKEND', 'data.tile_cache.FileSystemTileCache'),
+    'LOCATION': os.getenv('TILE_CACHE_DIR', os.path.join(BASE_DIR, 'tilecache')),
+    'TIMEOUT': int(os.getenv('TILE_CACHE_TIMEOUT', 86400)),
+    'MAX_ENTRIES': int(os.getenv('TILE_CACHE_MAX_ENTRIES', 20000)),
+    'MAX_ZOOM': int(os.getenv('TILE_CACHE_MAX_ZOOM', 16)),
+    # Render tile yang sama di worker lain ditunggu maksimal sekian detik (advisory lock PostgreSQL)
+    'LOCK_TIMEOUT': float(os.getenv('TILE_CACHE_LOCK_TIMEOUT', 10)),
+    # Batas ukuran FileSystemTileCache dalam MB untuk `python manage.py purge_tile_cache`
+    # (jalankan berkala, mis. cron per jam). File lebih tua dari TIMEOUT selalu dihapus.
+    'MAX_SIZE_MB': int(os.getenv('TILE_CACHE_MAX_SIZE_MB', 2048)),
+}
+
+# Kompresi tile saat disimpan ke cache: 'gzip', 'br' (butuh package brotli) atau '' (tanpa kompresi).
+# Tile dikirim apa adanya dengan Content-Encoding jika client menerimanya.
+TILE_COMPRESSION = os.getenv('TILE_COMPRESSION', 'gzip')
+
+# Jalur tile async untuk deployment ASGI (uvicorn monitoringbackend.asgi:application),
+# memakai pool koneksi psycopg 3. URL: <PREFIX><user-aois|hotspotalert|deforestation|combined>/<z>/<x>/<y>/
+# Berbeda dengan view sync, tile hotspot rentang tanggal tidak disusun dari fragmen per hari
+# (HOTSPOT_DAY_FRAGMENTS) tetapi dirender utuh; cache, ETag dan advisory lock render sama.
+TILE_ASYNC = {
+    'PREFIX': os.getenv('TILE_ASYNC_PREFIX', '/data/async-tiles/'),
+    'MIN_SIZE': int(os.getenv('TILE_ASYNC_POOL_MIN_SIZE', 2)),
+    'MAX_SIZE': int(os.getenv('TILE_ASYNC_POOL_MAX_SIZE', 20)),
+    'TIMEOUT': float(os.getenv('TILE_ASYNC_POOL_TIMEOUT', 10)),
+}
+
+# URL tile bersama tanpa token (GET /data/tiles/shared/): descriptor bertanda tangan per scope AOI,
+# berlaku minimal TTL detik. Tile dikirim dengan Cache-Control public, max-age <= MAX_AGE
+# sehingga bisa di-cache CDN. Akses hanya dicabut saat descriptor kedaluwarsa.
+SHARED_TILES = {
+    'TTL': int(os.getenv('SHARED_TILES_TTL', 86400)),
+    'MAX_AGE': int(os.getenv('SHARED_TILES_MAX_AGE', 3600)),
+}
+
+# Arsip tile pre-render (python manage.py pregenerate_tiles). Jika LOCATION diisi,
+# tile view melayani tile tanpa filter dari arsip dan hanya render live saat tile tidak ada.
+TILE_ARCHIVE = {
+    'LOCATION': os.getenv('TILE_ARCHIVE_DIR', ''),
+    'MIN_ZOOM': int(os.getenv('TILE_ARCHIVE_MIN_ZOOM', 4)),
+    'MAX_ZOOM': int(os.getenv('TILE_ARCHIVE_MAX_ZOOM', 12)),
+}
+
+# Prewarm tile yang terdampak alert baru (python manage.py prewarm_tiles setelah ingest).
+# ENABLED juga menjalankan prewarm di background thread untuk alert yang disimpan lewat ORM.
+TILE_PREWARM = {
+    'ENABLED': os.getenv('TILE_PREWARM_ENABLED', 'false').lower() == 'true',
+    'MIN_ZOOM': int(os.getenv('TILE_PREWARM_MIN_ZOOM', 5)),
+    'MAX_ZOOM': int(os.getenv('TILE_PREWARM_MAX_ZOOM', 12)),
+    'WORKERS': int(os.getenv('TILE_PREWARM_WORKERS', 2)),
+    'MAX_TILES': int(os.getenv('TILE_PREWARM_MAX_TILES', 5000)),
+    'WATERMARK_FILE': os.getenv('TILE_PREWARM_WATERMARK_FILE', os.path.join(BASE_DIR, 'tilecache', 'prewarm_watermark.json')),
+}
+
+# Pada zoom <= MAX_ZOOM tile hotspot alert berisi cluster per sel grid (count, max_category,
+# max_confidence) alih-alih titik individual. GRID 'square' (ST_SnapToGrid) atau 'hex'
+# (ST_HexagonGrid, PostGIS >= 3.1). CELLS_PER_TILE menentukan ukuran sel relatif terhadap tile.
+HOTSPOT_CLUSTER = {
+    'MAX_ZOOM': int(os.getenv('HOTSPOT_CLUSTER_MAX_ZOOM', 8)),
+    'GRID': os.getenv('HOTSPOT_CLUSTER_GRID', 'square'),
+    'CELLS_PER_TILE': int(os.getenv('HOTSPOT_CLUSTER_CELLS_PER_TILE', 32)),
+}
+
+# Grid kepadatan hotspot (GET /data/hotspot-density/?shape=hex|square&size=<meter>). Resolusi
+# di PRECOMPUTED ("shape:size" dipisah koma) dibaca dari tabel harian yang diisi
+# `python manage.py build_hotspot_grid` setelah ingest; hari setelahnya dihitung live.
+HOTSPOT_GRID = {
+    'MIN_SIZE': int(os.getenv('HOTSPOT_GRID_MIN_SIZE', 250)),
+    'MAX_SIZE': int(os.getenv('HOTSPOT_GRID_MAX_SIZE', 200000)),
+    'PRECOMPUTED': os.getenv('HOTSPOT_GRID_PRECOMPUTED', ''),
+    # Hanya hari yang lebih tua dari sekian hari yang dibaca dari tabel (alert bisa datang terlambat)
+    'LAG_DAYS': int(os.getenv('HOTSPOT_GRID_LAG_DAYS', 2)),
+}
+
+# Representasi tile deforestation per zoom: titik (dengan atribut area/confidence) sampai
+# CENTROID_MAX_ZOOM, polygon yang disederhanakan trigger database sampai SIMPLIFIED_MAX_ZOOM,
+# polygon penuh di atasnya.
+DEFORESTATION_TILES = {
+    'CENTROID_MAX_ZOOM': int(os.getenv('DEFORESTATION_TILES_CENTROID_MAX_ZOOM', 9)),
+    'SIMPLIFIED_MAX_ZOOM': int(os.getenv('DEFORESTATION_TILES_SIMPLIFIED_MAX_ZOOM', 12)),
+}
+
+# Tile hotspot alert dengan filter startdate/enddate (di atas zoom cluster) disusun dari fragmen
+# tile per hari yang di-cache, sehingga rentang yang berbeda memakai ulang fragmen yang sama.
+# Rentang lebih panjang dari MAX_DAYS dirender langsung dengan satu query rentang.
+HOTSPOT_DAY_FRAGMENTS = {
+    'ENABLED': os.getenv('HOTSPOT_DAY_FRAGMENTS_ENABLED', 'true').lower() == 'true',
+    'MAX_DAYS': int(os.getenv('HOTSPOT_DAY_FRAGMENTS_MAX_DAYS', 92)),
+}